@@ -1,5 +1,6 @@
 import streamlit as st
-import pandas as pd
+
+from children_da.store import get_assets, show_memory_usage
 
 
 
@@ -20,10 +21,7 @@ st.markdown("""
 
 
 
-if 'df' not in st.session_state:
-    st.session_state.df = pd.read_csv('data.csv')
-
-df = st.session_state.df
+show_memory_usage()
 
 
 
@@ -31,7 +29,12 @@ df = st.session_state.df
 st.title("Childhood Overweight: Country, Behaviour & Lifestyle Factors")
 st.subheader("Data Analysis Based on the International HBSC Study (2002–2018)")
 
-st.image("pic.png", use_container_width=True) 
+# zmenšené WebP varianty s hashem v názvu (python -m children_da.assets)
+hero = get_assets().hero_html(alt="Children playing")
+if hero is not None:
+    st.markdown(hero, unsafe_allow_html=True)
+else:
+    st.image("pic.png", use_container_width=True)
 
 
 st.markdown("### 🧭 Project Overview")
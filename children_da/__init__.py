@@ -0,0 +1,6 @@
+"""
+Sdílené pomocné moduly pro Streamlit aplikaci (načítání dat, cache, výpočty).
+
+Stránky v `pages/` importují odsud, aby se stejná logika nekopírovala
+mezi soubory.
+"""
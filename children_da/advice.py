@@ -0,0 +1,143 @@
+"""
+Doporučení pro Barometer bez LLM – z pravidel a šablon tipů.
+
+Bez `OPENAI_API_KEY`, při chybě volání nebo když jsou všichni klienti
+OpenAI obsazení (`ClientPool.has_capacity`), stránka dřív neukázala nic
+užitečného. Tady se doporučení složí lokálně za pár milisekund:
+
+- riziko každé odpovědi 0–1 (`factors.barometer_component_risks`, stejné
+  složky jako ruční skóre Barometru),
+- nejrizikovější odpovědi (≥ CONCERN_FROM) → obavy a 2–3 konkrétní tipy,
+- nejzdravější (≤ PRAISE_UNTIL) → pochvala rodičům,
+- věk a pohlaví podle pokynů v SYSTEM_PROMPT stránky: chlapci mají asi
+  1.6–1.7× častěji nadváhu a mladší děti (kolem 11 let) vyšší riziko než
+  starší teenageři – u mladších chlapců s vysokým skóre je text
+  naléhavější, u dívek a starších dětí se riziko nepřehání.
+
+Výstup je Markdown ve stejné struktuře, o jakou stránka žádá LLM, a je
+deterministický (stejné odpovědi → stejný text).
+"""
+from children_da.factors import barometer_component_risks
+
+
+CONCERN_FROM = 0.5
+PRAISE_UNTIL = 0.17
+MAX_CONCERNS = 3
+MAX_PRAISE = 2
+MAX_TIPS = 3
+
+# hranice úrovní rizika (stejné jako v promptu stránky)
+RISK_LEVELS = ((30, "low"), (60, "medium"))
+
+# faktor → (obava, tip, pochvala)
+TIPS = {
+    "SOFT_DRINKS": (
+        "Sweet drinks come up quite often in the week.",
+        "Keep water or unsweetened tea on the table at meals and save soft drinks for special occasions.",
+        "Soft drinks are rare at home – that is one of the best habits a family can have.",
+    ),
+    "SWEETS": (
+        "Sweets are a regular part of the week.",
+        "Agree on one planned treat a day and keep fruit or nuts within easy reach for snacks.",
+        "Sweets are kept in check – well done.",
+    ),
+    "VEGETABLES": (
+        "Vegetables do not appear on the plate very often.",
+        "Add one vegetable to a meal your child already likes, and let them choose or help prepare it.",
+        "Vegetables are a normal part of the menu – keep it up.",
+    ),
+    "PHYS_ACT_60": (
+        "There are only a few days with an hour of movement.",
+        "Plan active time into the week – walking or cycling to school, a club or a weekend family outing.",
+        "Your child moves a lot during the week – that is a great base.",
+    ),
+    "BREAKFAST_WEEKDAYS": (
+        "Breakfast on school days is often skipped.",
+        "Prepare a simple breakfast the evening before, such as yoghurt with oats or a wholegrain sandwich.",
+        "Regular breakfasts on school days help your child a lot.",
+    ),
+    "TOOTH_BRUSHING": (
+        "Tooth brushing is not yet a steady daily routine.",
+        "Tie tooth brushing to fixed moments (after breakfast and before bed) so it becomes automatic.",
+        "Tooth brushing is a solid routine – a sign of good everyday habits.",
+    ),
+    "FEEL_LOW": (
+        "Your child often feels low, which can affect eating and activity.",
+        "Find a calm moment each day to talk, and if low moods last for weeks, mention it to the paediatrician or school counsellor.",
+        "Your child rarely feels low – a good sign of emotional wellbeing.",
+    ),
+    "FRIEND_TALK": (
+        "It is not easy for your child to share problems with friends.",
+        "Support time with friends through shared activities such as sport, a hobby group or inviting a friend home.",
+        "Your child can rely on friends to talk things over.",
+    ),
+    "TALK_FATHER": (
+        "Talking about problems with their father is difficult.",
+        "Make room for regular one-to-one time with their father, for example a walk or cooking together.",
+        "Your child can talk to their father openly – that support matters.",
+    ),
+}
+
+# když chybí tipy z odpovědí (vše vypadá dobře)
+GENERAL_TIPS = [
+    "Eat together as a family when you can – children copy what they see at the table.",
+    "Keep regular bedtimes and screens out of the bedroom at night; good sleep helps appetite and energy.",
+    "Limit leisure screen time on school days and swap part of it for something active.",
+]
+
+OPENING = {
+    "low": "Your child's everyday habits look healthy overall.",
+    "medium": "Your child has a good mix of habits, with a few areas worth working on.",
+    "high": "Several everyday habits could increase the risk of overweight, and small changes can help a lot.",
+}
+
+
+def risk_level(score: int) -> str:
+    """'low' / 'medium' / 'high' for a 0–100 Barometer score."""
+    for upper, level in RISK_LEVELS:
+        if score < upper:
+            return level
+    return "high"
+
+
+def _group_note(sex: int, age: int, level: str):
+    """Age/sex guidance from the study (boys and younger children are at higher risk)."""
+    boy, young = sex == 1, age <= 12
+    if boy and young and level == "high":
+        return ("Boys around this age are the group where overweight is most common, "
+                "so it is worth starting with these steps now rather than later.")
+    if boy and level != "low":
+        return "Boys are more often affected by overweight than girls, so steady small steps really pay off."
+    if level == "high":
+        return "There is no need for strict rules – small, steady changes at home make a real difference."
+    return None
+
+
+def rule_based_recommendation(answers: dict, score: int) -> str:
+    """Markdown recommendation assembled from tip templates (no LLM)."""
+    risks = barometer_component_risks(answers)
+    level = risk_level(score)
+    # při shodě rozhoduje pořadí v TIPS (strava a pohyb první)
+    order = {f: i for i, f in enumerate(TIPS)}
+    ranked = sorted(risks, key=lambda f: (-risks[f], order[f]))
+
+    concerns = [f for f in ranked if risks[f] >= CONCERN_FROM][:MAX_CONCERNS]
+    praise = sorted(
+        (f for f in risks if risks[f] <= PRAISE_UNTIL), key=lambda f: (risks[f], order[f])
+    )[:MAX_PRAISE]
+    # bez výrazných obav: tipy k odpovědím, které mají nejdál k ideálu
+    tip_factors = concerns or [f for f in ranked if risks[f] > PRAISE_UNTIL][:2]
+
+    tips = [TIPS[f][1] for f in tip_factors][:MAX_TIPS]
+    tips += GENERAL_TIPS[:max(0, 2 - len(tips))]
+
+    parts = [OPENING[level]]
+    if praise:
+        parts.append("**What is going well:** " + " ".join(TIPS[f][2] for f in praise))
+    if concerns:
+        parts.append("**Main concerns:** " + " ".join(TIPS[f][0] for f in concerns))
+    parts.append("**Where to start:**\n" + "\n".join(f"- {tip}" for tip in tips))
+    note = _group_note(answers["SEX"], answers["AGE"], level)
+    if note:
+        parts.append(note)
+    return "\n\n".join(parts)
@@ -0,0 +1,196 @@
+"""
+Lokální statické soubory aplikace (vlajky v KPI, úvodní obrázek).
+
+KPI boxy na stránce Countries načítaly vlajky z flagcdn.com a Home
+posílal 1.9 MB `pic.png` v plné velikosti každému prohlížeči. Teď se
+jednorázově vyrobí:
+
+- vlajky CZ a EU jako malá SVG (kreslená podle oficiálních rozměrů),
+- `pic.png` v několika šířkách jako WebP (+ JPEG pro staré prohlížeče),
+
+a uloží se do `static/assets/` pod jménem s hashem obsahu
+(`flag-cz.3f2a9c1b0d.svg`). Streamlit je servíruje na
+`app/static/assets/…` (`server.enableStaticServing` v
+`.streamlit/config.toml`). Při změně obsahu se změní jméno, takže
+prohlížeč nebo proxy mohou soubory cachovat natrvalo.
+
+    python -m children_da.assets            # pic.png -> static/assets/
+
+Přehled logické jméno → soubor je v `static/assets/manifest.json`.
+Bez něj vlajky jdou jako inline SVG a Home použije `st.image`.
+"""
+import base64
+import hashlib
+import io
+import json
+import math
+import sys
+from pathlib import Path
+
+
+# Streamlit hledá static/ vedle hlavního skriptu (1_Home.py), ne v pracovním adresáři
+APP_DIR = Path(__file__).resolve().parent.parent
+STATIC_DIR = APP_DIR / "static"
+ASSET_DIR = STATIC_DIR / "assets"
+ASSET_URL = "app/static/assets"
+MANIFEST_NAME = "manifest.json"
+
+HERO_IMAGE = APP_DIR / "pic.png"
+HERO_WIDTHS = (480, 960, 1536)
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+
+HASH_LENGTH = 10
+
+
+# ------------------------------------------------------------
+# VLAJKY (SVG)
+# ------------------------------------------------------------
+def _flag_cz_svg() -> str:
+    # 2:3, modrý klín do poloviny šířky
+    return (
+        '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 900 600">'
+        '<rect width="900" height="600" fill="#d7141a"/>'
+        '<rect width="900" height="300" fill="#fff"/>'
+        '<path d="M0 0 450 300 0 600z" fill="#11457e"/>'
+        "</svg>"
+    )
+
+
+def _star(cx, cy, r) -> str:
+    """Five-pointed star (one point up) as an SVG polygon."""
+    points = []
+    for i in range(10):
+        radius = r if i % 2 == 0 else r * 0.381966
+        angle = math.pi / 2 - i * math.pi / 5
+        points.append(f"{cx + radius * math.cos(angle):.1f},{cy - radius * math.sin(angle):.1f}")
+    return f'<polygon points="{" ".join(points)}"/>'
+
+
+def _flag_eu_svg() -> str:
+    # 2:3, 12 hvězd na kružnici o poloměru 1/3 výšky, hvězda 1/18 výšky
+    stars = "".join(
+        _star(405 + 180 * math.sin(k * math.pi / 6), 270 - 180 * math.cos(k * math.pi / 6), 30)
+        for k in range(12)
+    )
+    return (
+        '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 810 540">'
+        '<rect width="810" height="540" fill="#039"/>'
+        f'<g fill="#fc0">{stars}</g>'
+        "</svg>"
+    )
+
+
+FLAGS = {
+    "cz": _flag_cz_svg,
+    "eu": _flag_eu_svg,
+}
+
+
+# ------------------------------------------------------------
+# BUILD
+# ------------------------------------------------------------
+def _hashed_name(stem: str, suffix: str, payload: bytes) -> str:
+    digest = hashlib.sha256(payload).hexdigest()[:HASH_LENGTH]
+    return f"{stem}.{digest}{suffix}"
+
+
+def _hero_variants(src: Path) -> dict:
+    """{logical name: encoded bytes} – WebP per width, JPEG at the largest one."""
+    from PIL import Image  # Pillow potřebuje jen build, ne běžící aplikace
+
+    variants = {}
+    with Image.open(src) as image:
+        image = image.convert("RGB")
+        widths = sorted({min(w, image.width) for w in HERO_WIDTHS})
+        for width in widths:
+            height = round(image.height * width / image.width)
+            resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+            buf = io.BytesIO()
+            resized.save(buf, "WEBP", quality=WEBP_QUALITY, method=6)
+            variants[f"hero-{width}.webp"] = buf.getvalue()
+        buf = io.BytesIO()
+        resized.save(buf, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+        variants[f"hero-{widths[-1]}.jpg"] = buf.getvalue()
+    return variants
+
+
+def build_assets(hero=HERO_IMAGE, out_dir=ASSET_DIR) -> dict:
+    """Write content-hashed assets and the manifest; old hashed files are removed."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    payloads = {f"flag-{code}.svg": draw().encode("utf-8") for code, draw in FLAGS.items()}
+    if Path(hero).exists():
+        payloads.update(_hero_variants(Path(hero)))
+
+    manifest = {}
+    for name, payload in payloads.items():
+        stem, suffix = name.rsplit(".", 1)
+        filename = _hashed_name(stem, f".{suffix}", payload)
+        (out_dir / filename).write_bytes(payload)
+        manifest[name] = filename
+
+    for path in out_dir.iterdir():
+        if path.name != MANIFEST_NAME and path.name not in manifest.values():
+            path.unlink()
+    (out_dir / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+    return {name: (out_dir / filename).stat().st_size for name, filename in manifest.items()}
+
+
+def load_manifest(out_dir=ASSET_DIR) -> dict:
+    path = Path(out_dir) / MANIFEST_NAME
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+# ------------------------------------------------------------
+# HTML PRO STRÁNKY
+# ------------------------------------------------------------
+class Assets:
+    """URLs and HTML snippets for the built assets (see module docstring)."""
+
+    def __init__(self, manifest: dict):
+        self.manifest = manifest
+
+    def url(self, name: str):
+        filename = self.manifest.get(name)
+        return None if filename is None else f"{ASSET_URL}/{filename}"
+
+    def flag_img(self, code: str, height=18) -> str:
+        """<img> of a flag from FLAGS – served asset, or inline SVG when not built."""
+        src = self.url(f"flag-{code}.svg")
+        if src is None:
+            svg = FLAGS[code]().encode("utf-8")
+            src = "data:image/svg+xml;base64," + base64.b64encode(svg).decode("ascii")
+        return (
+            f'<img src="{src}" alt="{code.upper()} flag"'
+            f' style="height:{height}px; vertical-align:middle; margin-right:6px;">'
+        )
+
+    def hero_html(self, alt=""):
+        """Responsive <picture> of the hero image, or None when it has not been built."""
+        webp = sorted(
+            (int(name[5:-5]), self.url(name)) for name in self.manifest
+            if name.startswith("hero-") and name.endswith(".webp")
+        )
+        fallback = next(
+            (self.url(n) for n in self.manifest if n.startswith("hero-") and n.endswith(".jpg")), None
+        )
+        if not webp or fallback is None:
+            return None
+        srcset = ", ".join(f"{url} {width}w" for width, url in webp)
+        return (
+            "<picture>"
+            f'<source type="image/webp" srcset="{srcset}" sizes="(max-width: 1200px) 100vw, 1200px">'
+            f'<img src="{fallback}" alt="{alt}" style="width:100%; height:auto;" loading="eager">'
+            "</picture>"
+        )
+
+
+if __name__ == "__main__":
+    src = Path(sys.argv[1]) if len(sys.argv) > 1 else HERO_IMAGE
+    sizes = build_assets(src)
+    for name, size in sorted(sizes.items()):
+        print(f"{name:<18} {size / 1024:8.1f} kB")
@@ -0,0 +1,120 @@
+"""
+Riziko nadváhy pro stránku Barometer z natrénovaného náhodného lesa.
+
+`app_old.py` pro každou predikci skládal `pd.Series` přes všechny
+one-hot sloupce, balil ji do DataFrame a volal sklearn. Tady se při
+načtení modelu jednou připraví:
+
+- mapa příznak → pozice ve vektoru (včetně `COUNTRY_NAME_<země>`),
+- pozice odpovědí z Barometru v pořadí `CONTROLLED_FEATURES`,
+- převod odpovědí na kódy průzkumu (`SURVEY_CODES`) – formulář má
+  u každé otázky 1 = nejzdravější, les je ale učený na kódech HBSC,
+  kde jsou některé škály obrácené nebo kratší,
+- předalokovaný float32 vektor (nepoužité příznaky = 0 jako v app_old),
+- les v plochých polích (`forest.FlatForest`).
+
+Predikce pak jen přepíše pár položek vektoru a projde stromy – pod
+milisekundu. Model se načítá jednou za proces (`store.get_barometer_model`):
+přednostně exportovaný `model_forest.npz` (`python -m children_da.forest
+export`, bez sklearn a bez unpicklování), jinak `model.pkl` z
+`random_forest/Final_random_forest.ipynb` (`{"model":
+RandomForestClassifier, "features": [...]}`). Když chybí obojí,
+Barometer počítá původní ruční skóre.
+"""
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from children_da.forest import FOREST_PATH, FlatForest
+
+
+MODEL_PATH = Path("model.pkl")
+COUNTRY_PREFIX = "COUNTRY_NAME_"
+
+# odpovědi z formuláře Barometru (stejné jako v app_old.py)
+CONTROLLED_FEATURES = [
+    "SEX", "AGE", "SOFT_DRINKS", "SWEETS", "VEGETABLES", "FRIEND_TALK",
+    "PHYS_ACT_60", "BREAKFAST_WEEKDAYS", "TOOTH_BRUSHING",
+    "FEEL_LOW", "TALK_FATHER",
+]
+
+# odpověď Barometru (1 = nejzdravější) → kód HBSC, na kterém je model učený
+# (škály a směr viz factors.SCALE_MAX / REVERSE_SCALES); co tu chybí, jde beze změny
+SURVEY_CODES = {
+    # 1 denně … 7 nikdy → 1 nikdy … 7 víckrát denně
+    "VEGETABLES": {1: 6, 2: 5, 3: 4, 4: 3, 5: 2, 6: 2, 7: 1},
+    # 1 velmi snadno … 7 velmi obtížně → 7 rozhodně souhlasí … 1 rozhodně nesouhlasí
+    "FRIEND_TALK": {1: 7, 2: 6, 3: 5, 4: 4, 5: 3, 6: 2, 7: 1},
+    # 1 = 6–7 dní … 7 = 0 dní → 1 = 0 dní … 7 = 6–7 dní
+    "PHYS_ACT_60": {1: 7, 2: 6, 3: 5, 4: 4, 5: 3, 6: 2, 7: 1},
+    # 1 každý den … 7 nikdy → 1 nikdy … 6 pět dní
+    "BREAKFAST_WEEKDAYS": {1: 6, 2: 5, 3: 4, 4: 3, 5: 2, 6: 1, 7: 1},
+    # 1 nikdy … 7 denně → 1 skoro denně … 5 zřídka nebo nikdy
+    "FEEL_LOW": {1: 5, 2: 5, 3: 4, 4: 3, 5: 2, 6: 1, 7: 1},
+    # 1 velmi snadno … 7 nestýká se → 1 velmi snadno … 5 nemá / nevídá
+    "TALK_FATHER": {1: 1, 2: 2, 3: 2, 4: 3, 5: 3, 6: 4, 7: 5},
+}
+
+
+class BarometerModel:
+    """Trained forest + precomputed feature layout for single-child scoring."""
+
+    def __init__(self, forest: FlatForest, features):
+        self.features = list(features)
+        self.index = {name: i for i, name in enumerate(self.features)}
+        self.countries = [
+            name[len(COUNTRY_PREFIX):] for name in self.features if name.startswith(COUNTRY_PREFIX)
+        ]
+        # odpovědi, které model nezná, se přeskočí
+        self._answers = [
+            (f, self.index[f], SURVEY_CODES.get(f)) for f in CONTROLLED_FEATURES if f in self.index
+        ]
+        self._x = np.zeros(len(self.features), dtype="float32")
+        self._country_pos = None
+        # vektor je sdílený mezi sessions
+        self._lock = threading.Lock()
+        self.forest = forest
+
+    def _fill(self, answers: dict, country=None):
+        for name, pos, codes in self._answers:
+            value = answers[name]
+            self._x[pos] = codes[value] if codes is not None else value
+        if self._country_pos is not None:
+            self._x[self._country_pos] = 0.0
+        self._country_pos = self.index.get(f"{COUNTRY_PREFIX}{country}")
+        if self._country_pos is not None:
+            self._x[self._country_pos] = 1.0
+
+    def vector(self, answers: dict, country=None) -> np.ndarray:
+        """Copy of the model input row for `answers` (mainly for checks)."""
+        with self._lock:
+            self._fill(answers, country)
+            return self._x.copy()
+
+    def predict(self, answers: dict, country=None) -> float:
+        """P(overweight) for one child (Barometer answers keyed by CONTROLLED_FEATURES)."""
+        with self._lock:
+            self._fill(answers, country)
+            return self.forest.predict_one(self._x)
+
+
+def load_barometer_model(forest_path=FOREST_PATH, model_path=MODEL_PATH):
+    """
+    BarometerModel from the exported forest, else from the pickled model;
+    None when neither is available.
+    """
+    forest_path, model_path = Path(forest_path), Path(model_path)
+    if forest_path.exists():
+        forest = FlatForest.load(forest_path)
+        if forest.features is not None:
+            return BarometerModel(forest, forest.features)
+    if not model_path.exists():
+        return None
+    try:
+        import joblib
+    except ImportError:  # sklearn / joblib nejsou v requirements dashboardu
+        return None
+    bundle = joblib.load(model_path)
+    forest = FlatForest.from_sklearn(bundle["model"], features=bundle["features"])
+    return BarometerModel(forest, bundle["features"])
@@ -0,0 +1,100 @@
+"""
+Bootstrapové 95% intervaly spolehlivosti prevalence nadváhy.
+
+Klasický (multinomický) bootstrap nad počty z kostky: OVERWEIGHT je klíč
+buňky, takže pro bod grafu (součet buněk) stačí dva počty – všech dětí
+n = Σ N a dětí s nadváhou k = Σ N_OW. Převzorkování n dětí s vracením
+dá počet s nadváhou ~ Binomial(n, k / n), replikace prevalence je
+
+    p* = Binomial(n, k / n) / n
+
+(jeden los na replikaci; Poissonova varianta by potřebovala dva a byla
+zhruba o polovinu pomalejší). Všechny body a tisíce replikací se losují
+najednou (pole body × B), meze jsou pořadové statistiky replikací.
+Interval závisí jen na dvojici (k, n), proto se pamatuje v
+`PrevalenceBootstrap` (jedna instance na verzi dat, `store.get_bootstrap`)
+a rerun s již viděnými body nic nelosuje.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from children_da.colors import to_rgba
+
+
+BOOTSTRAP_REPLICATES = 2000
+CI_LEVEL = 0.95
+
+
+class PrevalenceBootstrap:
+    """Memoised bootstrap CIs for N_OW / N, keyed by (N_OW, N)."""
+
+    def __init__(self, replicates=BOOTSTRAP_REPLICATES, level=CI_LEVEL, seed=0):
+        self.replicates = replicates
+        # pořadové statistiky místo np.quantile (partition je levnější)
+        alpha = (1 - level) / 2
+        self._ranks = [int(np.floor(alpha * (replicates - 1))),
+                       int(np.ceil((1 - alpha) * (replicates - 1)))]
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+        self._intervals = {}
+
+    def _draw(self, k: np.ndarray, n: np.ndarray) -> np.ndarray:
+        """(len(k), 2) lower / upper bounds, one batch of replicates."""
+        shape = (len(k), self.replicates)
+        hits = self._rng.binomial(n.astype("int64")[:, None], (k / n)[:, None], size=shape)
+        bounds = np.partition(hits, self._ranks, axis=1)[:, self._ranks]
+        return bounds / n[:, None]
+
+    def interval(self, n_ow, n):
+        """Lower and upper bounds (arrays) for prevalences n_ow / n."""
+        pairs = list(zip(np.asarray(n_ow, dtype="int64").tolist(),
+                         np.asarray(n, dtype="int64").tolist()))
+        with self._lock:
+            missing = sorted({p for p in pairs if p[1] > 0 and p not in self._intervals})
+            if missing:
+                k, total = np.array(missing, dtype="float64").T
+                for pair, bounds in zip(missing, self._draw(k, total)):
+                    self._intervals[pair] = tuple(bounds)
+            bounds = [self._intervals.get(p, (np.nan, np.nan)) for p in pairs]
+        bounds = np.array(bounds, dtype="float64").reshape(-1, 2)
+        return bounds[:, 0], bounds[:, 1]
+
+    def add_ci(self, df: pd.DataFrame) -> pd.DataFrame:
+        """`df` (a `cube.query` result) with OVERWEIGHT_LO / OVERWEIGHT_HI."""
+        lo, hi = self.interval(df["N_OW"], df["N"])
+        return df.assign(OVERWEIGHT_LO=lo, OVERWEIGHT_HI=hi)
+
+
+def add_ci_bands(fig: go.Figure, df: pd.DataFrame, x: str, group: str, alpha=0.18):
+    """
+    Shaded CI band under every line of a px line chart (one trace per
+    `group` value). The band shares the line's colour and legend group,
+    so hiding a series in the legend hides its band as well.
+    """
+    lines = [t for t in fig.data if t.name is not None]
+    bands = []
+    for trace in lines:
+        rows = df[df[group].astype(str) == trace.name].sort_values(x)
+        if rows.empty:
+            continue
+        color = trace.line.color or trace.marker.color
+        bands.append(go.Scatter(
+            x=pd.concat([rows[x], rows[x][::-1]]),
+            y=pd.concat([rows["OVERWEIGHT_HI"], rows["OVERWEIGHT_LO"][::-1]]),
+            fill="toself",
+            fillcolor=to_rgba(color, alpha),
+            line=dict(width=0),
+            hoverinfo="skip",
+            showlegend=False,
+            legendgroup=trace.legendgroup or trace.name,
+            name=f"{trace.name} 95% CI",
+        ))
+    if bands:
+        n_lines = len(fig.data)
+        fig.add_traces(bands)
+        # pásy pod čarami
+        fig.data = fig.data[n_lines:] + fig.data[:n_lines]
+    return fig
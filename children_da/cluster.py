@@ -0,0 +1,174 @@
+"""
+Směrodatné chyby se shlukováním podle škol.
+
+HBSC vybírá celé třídy ve školách, děti ze stejné školy si jsou podobnější
+než náhodný výběr – naivní SE průměrů jsou proto příliš malé. Tady se
+počítá cluster-robust (linearizační) rozptyl podílového odhadu
+R = ΣY / ΣN přes školy g:
+
+    e_g   = Y_g − R · N_g
+    var R = G / (G − 1) · Σ e_g² / (ΣN)²
+
+Prevalence je Y = N_OW, průměr faktoru Y = <F>_SUM a N = <F>_CNT.
+
+Postačující statistiky se jednou sečtou po buňkách (YEAR, COUNTRY_CODE,
+SEX, AGE, OVERWEIGHT, SCHOOL_NO) jedním groupby; dotazy pak filtrují
+a sčítají jen tyto buňky, ne řádky žáků. Škola je (YEAR, COUNTRY_CODE,
+SCHOOL_NO) – čísla škol jsou jen v rámci země a vlny. Žák bez čísla
+školy je vlastní shluk; když v datech SCHOOL_NO chybí úplně, je tak každý
+žák a SE jsou obyčejné (neshlukované) robustní chyby.
+
+Filtry (`where`) a klíče (`by`) mají stejný tvar jako u `cube.query`.
+"""
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from children_da.cube import CUBE_KEYS, cell_mask, key_arrays
+from children_da.factors import DASHBOARD_FACTORS
+
+
+CLUSTER_KEYS = ["YEAR", "COUNTRY_CODE", "SCHOOL_NO"]
+SCHOOL_COLUMNS = CUBE_KEYS + ["SCHOOL_NO"]
+
+
+def build_school_cells(df: pd.DataFrame, factors=DASHBOARD_FACTORS) -> pd.DataFrame:
+    """
+    Per-school cube cells: N, N_OW and factor SUM / CNT (float32 / int32),
+    plus CLUSTER – one integer id per school.
+    """
+    factors = [f for f in factors if f in df.columns]
+    if "SCHOOL_NO" in df.columns:
+        school = df["SCHOOL_NO"].to_numpy(dtype="float64", na_value=np.nan)
+    else:
+        # load_data vynechá chybějící sloupce → SE bez shlukování
+        warnings.warn("Data have no SCHOOL_NO column, standard errors are not clustered by school.",
+                      stacklevel=2)
+        school = np.full(len(df), np.nan)
+    # bez čísla školy → jedinečné záporné číslo (žák = vlastní shluk)
+    missing = np.isnan(school)
+    school[missing] = -np.arange(1, missing.sum() + 1)
+    keys = [df[k] for k in CUBE_KEYS] + [pd.Series(school, index=df.index, name="SCHOOL_NO")]
+
+    vals = df[factors].astype("float32")
+    sums = vals.groupby(keys, dropna=False, observed=True).sum().add_suffix("_SUM")
+    cnts = vals.notna().groupby(keys, dropna=False, observed=True).sum() \
+        .astype("int32").add_suffix("_CNT")
+    n = df.groupby(keys, dropna=False, observed=True).size().rename("N").astype("int32")
+
+    cells = pd.concat([n, sums, cnts], axis=1).reset_index()
+    # děti bez OVERWEIGHT zůstávají v součtech faktorů, ale ne v prevalenci (jako v kostce)
+    known = cells["OVERWEIGHT"].notna().to_numpy()
+    overweight = cells["OVERWEIGHT"].eq(1).fillna(False).to_numpy(dtype=bool)
+    cells["N"] = np.where(known, cells["N"], 0).astype("int32")
+    cells["N_OW"] = np.where(overweight, cells["N"], 0).astype("int32")
+    cells["CLUSTER"] = cells.groupby(CLUSTER_KEYS, observed=True).ngroup().astype("int32")
+    return cells
+
+
+class SchoolClusters:
+    """Cluster-robust SEs of prevalences and factor means from per-school cells."""
+
+    def __init__(self, cells: pd.DataFrame, country_names=None):
+        self.cells = cells
+        self.keys = key_arrays(cells, CUBE_KEYS)
+        self.factors = [c[:-4] for c in cells.columns if c.endswith("_SUM")]
+        self.country_names = country_names
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.cells.memory_usage(deep=True).sum())
+
+    def _influence(self, group_keys, where, pairs):
+        """
+        Per (group, school) linearised influence z = e_g / ΣN of each ratio
+        in `pairs` = {name: (numerator, denominator)}, and the ratios per group.
+        """
+        cols = list(dict.fromkeys(c for pair in pairs.values() for c in pair))
+        cells = self.cells[cell_mask(self.keys, where)]
+        if "_ALL" in group_keys:
+            cells = cells.assign(_ALL=0)
+
+        per_school = cells.groupby(group_keys + ["CLUSTER"], observed=True)[cols].sum() \
+            .astype("float64")
+        # škola bez jediné odpovědi (např. jen děti bez OVERWEIGHT) se do G nepočítá
+        denominators = list(dict.fromkeys(n for _, n in pairs.values()))
+        per_school = per_school[(per_school[denominators] > 0).any(axis=1)]
+        level = list(range(len(group_keys)))
+        grouped = per_school.groupby(level=level, observed=True)
+        totals = grouped.sum()
+        aligned = grouped.transform("sum")
+
+        ratios, z = pd.DataFrame(index=totals.index), pd.DataFrame(index=per_school.index)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            for name, (y, n) in pairs.items():
+                ratios[name] = totals[y] / totals[n]
+                z[name] = (per_school[y] - aligned[y] / aligned[n] * per_school[n]) / aligned[n]
+        if "N" in cols:
+            ratios["N"] = totals["N"]
+        return ratios, z
+
+    def _finish(self, ratios, z, by, names) -> pd.DataFrame:
+        """Clustered SE per group: G / (G − 1) · Σ z² (z per school)."""
+        level = list(range(z.index.nlevels - 1))
+        grouped = (z ** 2).groupby(level=level, observed=True)
+        sq, g = grouped.sum(), grouped.size().to_numpy(dtype="float64")
+        with np.errstate(invalid="ignore", divide="ignore"):
+            small_sample = np.where(g > 1, g / (g - 1), np.nan)
+        for name in names:
+            ratios[f"{name}_SE"] = np.sqrt(small_sample * sq[name].to_numpy())
+        ratios["N_SCHOOLS"] = g.astype("int64")
+
+        result = ratios.reset_index()
+        if not by:
+            result = result.drop(columns="_ALL")
+        if "COUNTRY_CODE" in by and self.country_names is not None:
+            result["COUNTRY_NAME"] = result["COUNTRY_CODE"].map(self.country_names).astype(str)
+        return result
+
+    def _ratio_se(self, by, where, pairs) -> pd.DataFrame:
+        by = list(by)
+        ratios, z = self._influence(by or ["_ALL"], where, pairs)
+        return self._finish(ratios, z, by, pairs)
+
+    def prevalence(self, by, where=None) -> pd.DataFrame:
+        """`by` + OVERWEIGHT, OVERWEIGHT_SE (clustered), N, N_SCHOOLS, DEFF."""
+        out = self._ratio_se(by, where, {"OVERWEIGHT": ("N_OW", "N")})
+        p = out["OVERWEIGHT"]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            # design effect: kolikrát je rozptyl větší než u prostého náhodného výběru
+            out["DEFF"] = out["OVERWEIGHT_SE"] ** 2 / (p * (1 - p) / out["N"])
+        return out
+
+    def factor_means(self, by, where=None, factors=()) -> pd.DataFrame:
+        """`by` + raw-scale mean and clustered `<F>_SE` for each factor."""
+        return self._ratio_se(by, where, {f: (f"{f}_SUM", f"{f}_CNT") for f in factors})
+
+    def gap(self, by, where=None, factors=None, column="SEX", levels=(2, 1)) -> pd.DataFrame:
+        """
+        Difference levels[0] − levels[1] of `column` (default girls − boys)
+        per `by` group, with its clustered SE. Both groups share schools, so
+        the SE comes from the per-school difference of influences, not from
+        adding the two variances. Prevalence when `factors` is None,
+        otherwise raw-scale factor means.
+        """
+        by = list(by)
+        if factors is None:
+            pairs = {"OVERWEIGHT": ("N_OW", "N")}
+        else:
+            pairs = {f: (f"{f}_SUM", f"{f}_CNT") for f in factors}
+        group_keys = (by or ["_ALL"]) + [column]
+        ratios, z = self._influence(group_keys, where, pairs)
+        ratios = ratios[list(pairs)]
+
+        a, b = levels
+        present = set(ratios.index.get_level_values(column))
+        if a not in present or b not in present:
+            # jedna z úrovní je odfiltrovaná → žádný rozdíl
+            return pd.DataFrame(columns=by + list(pairs) + [f"{n}_SE" for n in pairs] + ["N_SCHOOLS"])
+        est = ratios.xs(a, level=column) - ratios.xs(b, level=column)
+        z_diff = z.xs(a, level=column).sub(z.xs(b, level=column), fill_value=0.0)
+        # jen skupiny, kde existují obě úrovně
+        z_diff = z_diff[z_diff.index.droplevel(-1).isin(est.dropna(how="all").index)]
+        return self._finish(est.dropna(how="all"), z_diff, by, pairs)
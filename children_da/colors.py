@@ -0,0 +1,82 @@
+"""
+Barvy pro divergentní sloupcové grafy (odchylka od průměru apod.).
+
+`px.colors.sample_colorscale` se dřív volalo pro každou zemi zvlášť
+a Česko se hledalo přes `str.contains("Czech")`. Tady se celé pole
+hodnot interpoluje proti škále najednou (NumPy) a zvýraznění jde podle
+kódu země (`countries.CZ_CODE`), ne podle podřetězce názvu.
+
+Výsledné řetězce `rgb(r, g, b)` jsou stejné jako z Plotly (stejná
+interpolace, zaokrouhlení na sudou).
+"""
+import numpy as np
+import pandas as pd
+
+
+# výrazná škála – nejhorší hodnoty do vínové
+DEVIATION_SCALE = [
+    [0.00, "#08306b"],   # tmavá modrá
+    [0.35, "#2171b5"],
+    [0.50, "#f7f7f7"],   # bílá
+    [0.70, "#cb181d"],   # červená
+    [1.00, "#4a001f"],   # tmavě vínová
+]
+
+HIGHLIGHT_COLOR = "#ffb400"   # zlatá
+
+
+def _hex_to_unit(color: str):
+    color = color.lstrip("#")
+    return [int(color[i:i + 2], 16) / 255.0 for i in (0, 2, 4)]
+
+
+def sample_colorscale(scale, points) -> list:
+    """
+    Colours of `points` (0–1) on a `[[stop, "#rrggbb"], …]` scale, as
+    'rgb(r, g, b)' strings. NaN points get the middle of the scale.
+    """
+    stops = np.array([s for s, _ in scale], dtype="float64")
+    rgb = np.array([_hex_to_unit(c) for _, c in scale])
+
+    points = np.asarray(points, dtype="float64")
+    points = np.where(np.isnan(points), 0.5, points)
+
+    # stejné indexy jako bisect_left v Plotly (bod 0 → poslední + 1 × rozdíl)
+    high = np.clip(np.searchsorted(stops, points, side="left"), 0, len(stops) - 1)
+    low = high - 1
+    t = (points - stops[low]) / (stops[high] - stops[low])
+    mixed = rgb[low] + t[:, None] * (rgb[high] - rgb[low])
+
+    channels = np.rint(mixed * 255.0).astype(int)
+    return [f"rgb({r}, {g}, {b})" for r, g, b in channels.tolist()]
+
+
+def diverging_colors(values, scale=DEVIATION_SCALE, codes=None, highlight=None) -> list:
+    """
+    Min–max normalise `values` onto `scale` and return one colour per value.
+    `highlight` maps a country code to a fixed colour; `codes` gives the
+    code of each value (same order).
+    """
+    values = np.asarray(values, dtype="float64")
+    if len(values) == 0:
+        return []
+    lo, hi = np.nanmin(values), np.nanmax(values)
+    # jediná hodnota (hi == lo) → NaN → střed škály
+    with np.errstate(invalid="ignore", divide="ignore"):
+        points = (values - lo) / (hi - lo)
+    colors = np.array(sample_colorscale(scale, points), dtype=object)
+
+    if highlight and codes is not None:
+        codes = pd.Series(codes).to_numpy()
+        for code, color in highlight.items():
+            colors[codes == code] = color
+    return colors.tolist()
+
+
+def to_rgba(color: str, alpha: float) -> str:
+    """'#rrggbb' or 'rgb(r, g, b)' with transparency, e.g. for CI bands."""
+    if color.startswith("#"):
+        r, g, b = (round(c * 255) for c in _hex_to_unit(color))
+    else:
+        r, g, b = (int(float(c)) for c in color[color.index("(") + 1:color.index(")")].split(",")[:3])
+    return f"rgba({r}, {g}, {b}, {alpha})"
@@ -0,0 +1,72 @@
+"""
+Korelace faktorů s OVERWEIGHT z postačujících statistik kostky.
+
+KPI „Top Risk Factor“, grafy TOP 5 / TOP X (Countries) a `top5_corr`
+(Gender) potřebují jen sloupec OVERWEIGHT z korelační matice. Místo
+`.corr()` přes statisíce řádků se Pearsonův koeficient složí ze součtů
+v buňkách kostky (cube.py):
+
+    n = Σ CNT,  Σx = Σ SUM,  Σx² = Σ SQ
+    Σy, Σy², Σxy – OVERWEIGHT je klíč buňky, takže y je v buňce konstantní
+                   a stačí y·CNT, y²·CNT, y·SUM
+
+Počty jsou po faktorech (jen řádky, kde faktor není NaN), výsledek tedy
+odpovídá pandas `.corr()` s párově úplnými pozorováními.
+
+Normalizace na 0–1 je lineární – absolutní hodnota korelace se nemění,
+u obrácených škál se jen otočí znaménko (`reverse`).
+"""
+import numpy as np
+import pandas as pd
+
+from children_da.cube import CUBE_KEYS, cell_mask, key_arrays
+from children_da.factors import DASHBOARD_FACTORS
+
+
+class CorrelationStats:
+    """Per-cell sufficient statistics, stacked as NumPy arrays for fast filtering."""
+
+    def __init__(self, cube: pd.DataFrame, factors=DASHBOARD_FACTORS):
+        self.factors = [f for f in factors if f"{f}_SQ" in cube.columns]
+        self.keys = key_arrays(cube, CUBE_KEYS)
+
+        def block(suffix):
+            return cube[[f"{f}_{suffix}" for f in self.factors]].to_numpy(dtype="float64")
+
+        cnt, sx, sxx = block("CNT"), block("SUM"), block("SQ")
+        y = self.keys["OVERWEIGHT"][:, None]
+        # buňky bez OVERWEIGHT do korelace nepatří (pandas je také vynechá);
+        # jinak by jediné NaN zničilo součty pro všechny faktory a filtry
+        known = ~np.isnan(y)
+        y = np.where(known, y, 0.0)
+        cnt, sx, sxx = cnt * known, sx * known, sxx * known
+        # (6, buňky, faktory): n, Σx, Σx², Σy, Σy², Σxy
+        self._stats = np.stack([cnt, sx, sxx, y * cnt, y * y * cnt, y * sx])
+
+    def corr(self, where=None, reverse=()) -> pd.Series:
+        """
+        Correlation of every factor with OVERWEIGHT over the cells matching
+        `where` (same syntax as `cube.filter_cube`). Factors in `reverse`
+        get their sign flipped, as if the scale had been reversed first.
+        """
+        mask = cell_mask(self.keys, where)
+        n, sx, sxx, sy, syy, sxy = np.tensordot(mask.astype("float64"), self._stats, axes=([0], [1]))
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cov = sxy - sx * sy / n
+            var_x = sxx - sx * sx / n
+            var_y = syy - sy * sy / n
+            r = cov / np.sqrt(var_x * var_y)
+        # konstantní sloupec nebo < 2 pozorování → NaN, stejně jako pandas
+        r[(n < 2) | (var_x <= 0) | (var_y <= 0)] = np.nan
+        r = np.clip(r, -1.0, 1.0)
+
+        sign = np.array([-1.0 if f in reverse else 1.0 for f in self.factors])
+        return pd.Series(r * sign, index=self.factors, name="OVERWEIGHT")
+
+    def ranking(self, where=None, factors=None) -> pd.Series:
+        """|r| with OVERWEIGHT, strongest first (NaN last)."""
+        r = self.corr(where).abs()
+        if factors is not None:
+            r = r.reindex([f for f in factors if f in r.index])
+        return r.sort_values(ascending=False)
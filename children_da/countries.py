@@ -0,0 +1,172 @@
+"""
+Číselník zemí – jedna kanonická podoba názvu, ISO3 kód a příznak EU.
+
+Harmonizace (Belgie a UK jsou v datech rozdělené na regiony) se dělá
+jednou při ingestu (`harmonise_countries`), ne na stránkách. Stránky pak
+filtrují podle celočíselného `COUNTRY_CODE` místo porovnávání řetězců.
+"""
+import warnings
+import zlib
+
+import numpy as np
+import pandas as pd
+
+
+# (kód, kanonický název, ISO3, člen EU v roce 2018)
+# Kódy jsou pevné, aby se nezměnily při přidání další vlny dat.
+_COUNTRY_ROWS = [
+    (1, "Albania", "ALB", False),
+    (2, "Armenia", "ARM", False),
+    (3, "Austria", "AUT", True),
+    (4, "Azerbaijan", "AZE", False),
+    (5, "Belgium", "BEL", True),
+    (6, "Bulgaria", "BGR", True),
+    (7, "Canada", "CAN", False),
+    (8, "Croatia", "HRV", True),
+    (9, "Cyprus", "CYP", True),
+    (10, "Czech Republic", "CZE", True),
+    (11, "Denmark", "DNK", True),
+    (12, "Estonia", "EST", True),
+    (13, "Finland", "FIN", True),
+    (14, "France", "FRA", True),
+    (15, "Georgia", "GEO", False),
+    (16, "Germany", "DEU", True),
+    (17, "Greece", "GRC", True),
+    (18, "Greenland", "GRL", False),
+    (19, "Hungary", "HUN", True),
+    (20, "Iceland", "ISL", False),
+    (21, "Ireland", "IRL", True),
+    (22, "Israel", "ISR", False),
+    (23, "Italy", "ITA", True),
+    (24, "Kazakhstan", "KAZ", False),
+    (25, "Latvia", "LVA", True),
+    (26, "Lithuania", "LTU", True),
+    (27, "Luxembourg", "LUX", True),
+    (28, "Macedonia", "MKD", False),
+    (29, "Malta", "MLT", True),
+    (30, "Netherlands", "NLD", True),
+    (31, "Norway", "NOR", False),
+    (32, "Poland", "POL", True),
+    (33, "Portugal", "PRT", True),
+    (34, "Republic of Moldova", "MDA", False),
+    (35, "Romania", "ROU", True),
+    (36, "Russia", "RUS", False),
+    (37, "Serbia", "SRB", False),
+    (38, "Slovakia", "SVK", True),
+    (39, "Slovenia", "SVN", True),
+    (40, "Spain", "ESP", True),
+    (41, "Sweden", "SWE", True),
+    (42, "Switzerland", "CHE", False),
+    (43, "Turkey", "TUR", False),
+    (44, "Ukraine", "UKR", False),
+    (45, "United Kingdom", "GBR", True),
+    (46, "USA", "USA", False),
+    (47, "Montenegro", "MNE", False),
+]
+
+COUNTRY_DIM = pd.DataFrame(
+    _COUNTRY_ROWS, columns=["COUNTRY_CODE", "COUNTRY_NAME", "ISO3", "EU"]
+).astype({"COUNTRY_CODE": "int16"})
+
+# názvy v surových datech → kanonický název
+COUNTRY_ALIASES = {
+    "Belgium (Flemish)": "Belgium",
+    "Belgium (French)": "Belgium",
+    "England": "United Kingdom",
+    "Scotland": "United Kingdom",
+    "Wales": "United Kingdom",
+    "Northern Ireland": "United Kingdom",
+    "Great Britain": "United Kingdom",
+    "UK (England)": "United Kingdom",
+    "UK (Wales)": "United Kingdom",
+    "UK (Scotland)": "United Kingdom",
+    "North Macedonia": "Macedonia",
+    "Moldova": "Republic of Moldova",
+    "United States": "USA",
+}
+
+# neznámé země dostanou kód 1000–31999 odvozený z názvu (stabilní mezi
+# procesy i verzemi dat, bez nutnosti si ho někam ukládat)
+_UNKNOWN_CODE_START = 1000
+_UNKNOWN_CODE_RANGE = 31000
+# řádky bez země
+NO_COUNTRY_CODE = -1
+
+CODE_BY_NAME = dict(zip(COUNTRY_DIM["COUNTRY_NAME"], COUNTRY_DIM["COUNTRY_CODE"]))
+NAME_BY_CODE = dict(zip(COUNTRY_DIM["COUNTRY_CODE"], COUNTRY_DIM["COUNTRY_NAME"]))
+ISO3_BY_CODE = dict(zip(COUNTRY_DIM["COUNTRY_CODE"], COUNTRY_DIM["ISO3"]))
+EU_CODES = COUNTRY_DIM.loc[COUNTRY_DIM["EU"], "COUNTRY_CODE"].tolist()
+
+CZ_CODE = CODE_BY_NAME["Czech Republic"]
+
+# ISO 3166-1 numerické kódy – HBSC `countryno` je ISO × 1000 + číslo regionu
+# (např. 56001 = Belgie, vlámská část), viz `name_from_countryno`
+ISO_NUMERIC = {
+    "ALB": 8, "ARM": 51, "AUT": 40, "AZE": 31, "BEL": 56, "BGR": 100,
+    "CAN": 124, "HRV": 191, "CYP": 196, "CZE": 203, "DNK": 208, "EST": 233,
+    "FIN": 246, "FRA": 250, "GEO": 268, "DEU": 276, "GRC": 300, "GRL": 304,
+    "HUN": 348, "ISL": 352, "IRL": 372, "ISR": 376, "ITA": 380, "KAZ": 398,
+    "LVA": 428, "LTU": 440, "LUX": 442, "MKD": 807, "MLT": 470, "NLD": 528,
+    "NOR": 578, "POL": 616, "PRT": 620, "MDA": 498, "ROU": 642, "RUS": 643,
+    "SRB": 688, "SVK": 703, "SVN": 705, "ESP": 724, "SWE": 752, "CHE": 756,
+    "TUR": 792, "UKR": 804, "GBR": 826, "USA": 840, "MNE": 499,
+}
+NAME_BY_ISO_NUMERIC = {
+    ISO_NUMERIC[iso3]: name for name, iso3 in zip(COUNTRY_DIM["COUNTRY_NAME"], COUNTRY_DIM["ISO3"])
+}
+
+
+def canonical_name(raw: str) -> str:
+    return COUNTRY_ALIASES.get(raw, raw)
+
+
+def country_code(name: str) -> int:
+    """Code of a canonical (or raw) country name."""
+    name = canonical_name(name)
+    if name in CODE_BY_NAME:
+        return CODE_BY_NAME[name]
+    return _UNKNOWN_CODE_START + zlib.crc32(name.encode("utf-8")) % _UNKNOWN_CODE_RANGE
+
+
+def name_from_countryno(countryno: pd.Series) -> pd.Series:
+    """Canonical COUNTRY_NAME for HBSC `countryno` values (regions merged)."""
+    iso = pd.to_numeric(countryno, errors="coerce") // 1000
+    names = iso.map(NAME_BY_ISO_NUMERIC)
+    unknown = sorted(iso[names.isna() & iso.notna()].unique())
+    if unknown:
+        warnings.warn(f"countryno without a COUNTRY_DIM entry (ISO numeric): {unknown}", stacklevel=2)
+    return names
+
+
+def harmonise_countries(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Canonical COUNTRY_NAME (category) + integer COUNTRY_CODE.
+
+    Works on the ~50 distinct names, not on the rows.
+    """
+    df = df.copy(deep=False)
+    raw = df["COUNTRY_NAME"].astype("category")
+    canon = pd.Series(raw.cat.categories).map(canonical_name)
+
+    unknown = sorted(set(canon) - set(CODE_BY_NAME))
+    if unknown:
+        warnings.warn(f"Countries missing from COUNTRY_DIM: {unknown}", stacklevel=2)
+    codes_per_cat = canon.map(country_code).to_numpy("int16")
+
+    names = sorted(set(canon))
+    name_idx = pd.Index(names).get_indexer(canon)
+
+    # řádky bez země (NaN) mají kód kategorie -1
+    cat_codes = raw.cat.codes.to_numpy()
+    has_country = cat_codes >= 0
+    safe = np.where(has_country, cat_codes, 0)
+    if len(canon):
+        row_name = np.where(has_country, name_idx[safe], -1)
+        row_code = np.where(has_country, codes_per_cat[safe], NO_COUNTRY_CODE)
+    else:
+        row_name = np.full(len(df), -1)
+        row_code = np.full(len(df), NO_COUNTRY_CODE)
+
+    df["COUNTRY_NAME"] = pd.Categorical.from_codes(row_name, categories=names)
+    df["COUNTRY_CODE"] = row_code.astype("int16")
+    return df
@@ -0,0 +1,225 @@
+"""
+Předpočítaná kostka prevalence nadváhy.
+
+Skoro každý graf na stránkách Countries a Gender je
+`groupby(...)["OVERWEIGHT"].mean()` nebo průměr faktoru přes surové řádky.
+Kostka uloží pro každou buňku (YEAR, COUNTRY_CODE, SEX, AGE, OVERWEIGHT):
+
+- N            počet dětí se známou hodnotou OVERWEIGHT (jmenovatel prevalence;
+               v buňkách s OVERWEIGHT = <NA> je 0, jako `.mean()` NaN přeskočí)
+- N_OW         z toho s nadváhou (= N, když OVERWEIGHT == 1, jinak 0)
+- <F>_SUM      součet hodnot faktoru F (bez NaN)
+- <F>_SQ       součet čtverců hodnot faktoru F (pro rozptyl / korelace)
+- <F>_CNT      počet ne-NaN hodnot faktoru F
+
+Z několika tisíc buněk se pak dá složit libovolný průměr přes filtr
+(`query`). OVERWEIGHT je v klíči proto, aby šly počítat i průměry faktorů
+jen u dětí s nadváhou (stránka Gender).
+
+Kostka se ukládá vedle Parquet cache jako `cube.parquet`.
+"""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from children_da.data import CACHE_DIR
+from children_da.factors import DASHBOARD_FACTORS
+
+
+CUBE_FILE = "cube.parquet"
+CUBE_KEYS = ["YEAR", "COUNTRY_CODE", "SEX", "AGE", "OVERWEIGHT"]
+
+
+def build_cube(df: pd.DataFrame, factors=DASHBOARD_FACTORS) -> pd.DataFrame:
+    """Aggregate raw rows into cube cells (one pass, vectorised groupby)."""
+    factors = [f for f in factors if f in df.columns]
+    keys = [df[k] for k in CUBE_KEYS]
+
+    vals = df[factors].astype("float64")
+    grouped_vals = vals.groupby(keys, dropna=False, observed=True)
+    sums = grouped_vals.sum().add_suffix("_SUM")
+    squares = (vals * vals).groupby(keys, dropna=False, observed=True).sum().add_suffix("_SQ")
+    cnts = vals.notna().groupby(keys, dropna=False, observed=True).sum() \
+        .astype("int32").add_suffix("_CNT")
+    n = df.groupby(keys, dropna=False, observed=True).size().rename("N").astype("int32")
+
+    # název země nese kostka s sebou (popisky grafů), je funkčně závislý na kódu
+    names = df.groupby("COUNTRY_CODE", observed=True)["COUNTRY_NAME"].first()
+
+    cube = pd.concat([n, sums, squares, cnts], axis=1).reset_index()
+    # děti bez OVERWEIGHT zůstávají v součtech faktorů, ale ne v prevalenci
+    known = cube["OVERWEIGHT"].notna().to_numpy()
+    overweight = cube["OVERWEIGHT"].eq(1).fillna(False).to_numpy(dtype=bool)
+    cube["N"] = np.where(known, cube["N"], 0).astype("int32")
+    cube["N_OW"] = np.where(overweight, cube["N"], 0).astype("int32")
+    cube["COUNTRY_NAME"] = cube["COUNTRY_CODE"].map(names).astype("category")
+    return cube
+
+
+def save_cube(cube: pd.DataFrame, cache_dir=CACHE_DIR) -> Path:
+    path = Path(cache_dir) / CUBE_FILE
+    cube.to_parquet(path, index=False)
+    return path
+
+
+def load_cube(cache_dir=CACHE_DIR):
+    """Cube saved by the ingest step, or None."""
+    path = Path(cache_dir) / CUBE_FILE
+    if not path.exists():
+        return None
+    return pd.read_parquet(path)
+
+
+# ------------------------------------------------------------
+# DOTAZY
+# ------------------------------------------------------------
+def key_arrays(cube: pd.DataFrame, columns=CUBE_KEYS) -> dict:
+    """Key columns as float arrays (<NA> → NaN, which never matches a filter)."""
+    return {c: cube[c].to_numpy(dtype="float64", na_value=np.nan) for c in columns}
+
+
+def cell_mask(keys: dict, where) -> np.ndarray:
+    """
+    Boolean mask over cells. `where` maps a key column to
+
+    - a scalar        → equality
+    - a list / set    → membership
+    - a tuple (lo, hi) → inclusive range (e.g. AGE)
+    """
+    n = len(next(iter(keys.values())))
+    mask = np.ones(n, dtype=bool)
+    for col, cond in (where or {}).items():
+        values = keys[col]
+        if isinstance(cond, tuple):
+            lo, hi = cond
+            mask &= (values >= lo) & (values <= hi)
+        elif isinstance(cond, (list, set, frozenset, np.ndarray, pd.Index)):
+            mask &= np.isin(values, list(cond))
+        else:
+            mask &= values == cond
+    return mask
+
+
+def filter_cube(cube: pd.DataFrame, where=None) -> pd.DataFrame:
+    """Cells matching `where` (see `cell_mask`)."""
+    if not where:
+        return cube
+    return cube[cell_mask(key_arrays(cube, list(where)), where)]
+
+
+def query(cube: pd.DataFrame, by, where=None, factors=()) -> pd.DataFrame:
+    """
+    Aggregate cube cells.
+
+    by      – key columns to group on (COUNTRY_NAME comes along with COUNTRY_CODE)
+    where   – filter, see `filter_cube`
+    factors – factors whose raw-scale mean should be returned
+
+    Returns `by` + N, N_OW, OVERWEIGHT (prevalence) + one column per factor.
+    Rows are sorted like a raw-row groupby would sort them (by name, not code).
+    """
+    keys = list(by)
+    by = keys + (["COUNTRY_NAME"] if "COUNTRY_CODE" in keys and "COUNTRY_NAME" not in keys else [])
+    cells = filter_cube(cube, where)
+
+    measures = ["N", "N_OW"] + [f"{f}_SUM" for f in factors] + [f"{f}_CNT" for f in factors]
+    if by:
+        out = cells.groupby(by, observed=True)[measures].sum().reset_index()
+    else:
+        out = cells[measures].sum().to_frame().T
+
+    out["OVERWEIGHT"] = out["N_OW"] / out["N"].where(out["N"] > 0)
+    for f in factors:
+        out[f] = out[f"{f}_SUM"] / out[f"{f}_CNT"].where(out[f"{f}_CNT"] > 0)
+    out = out.drop(columns=[c for c in out.columns if c.endswith(("_SUM", "_SQ", "_CNT"))])
+
+    if "COUNTRY_NAME" in out.columns:
+        out["COUNTRY_NAME"] = out["COUNTRY_NAME"].astype(str)
+    sort_keys = list(dict.fromkeys("COUNTRY_NAME" if k == "COUNTRY_CODE" else k for k in keys))
+    if sort_keys:
+        out = out.sort_values(sort_keys).reset_index(drop=True)
+    return out
+
+
+# ------------------------------------------------------------
+# PLÁN DOTAZŮ
+# ------------------------------------------------------------
+def _freeze(cond):
+    """Hashable form of one `where` condition (a range and a list stay distinct)."""
+    if isinstance(cond, tuple):
+        return ("range",) + tuple(cond)
+    if isinstance(cond, (list, set, frozenset, np.ndarray, pd.Index)):
+        return ("in", tuple(sorted(cond)))
+    return ("eq", cond)
+
+
+class QueryPlan:
+    """
+    Aggregations needed by the charts of one rerun.
+
+    Charts declare what they need with `add` (same arguments as `query`),
+    then `run` executes everything at once:
+
+    - every distinct predicate (e.g. YEAR == 2018) is evaluated once,
+    - every distinct filter selects its cells once,
+    - requests with the same filter and group keys share one groupby
+      (with the union of their factors).
+
+    `run` returns {name: DataFrame}; each result is its own frame (`drop`
+    returns a new one, copy-on-write), so adding columns to one of them does
+    not affect the others.
+    """
+
+    def __init__(self, cube: pd.DataFrame):
+        self.cube = cube
+        self._requests = {}
+        self.stats = {}
+
+    def add(self, name: str, by, where=None, factors=()) -> str:
+        self._requests[name] = (list(by), dict(where or {}), list(factors))
+        return name
+
+    def run(self) -> dict:
+        keys = key_arrays(self.cube, CUBE_KEYS)
+        predicates, cells_by_filter = {}, {}
+
+        def cells_for(where):
+            fkey = tuple(sorted((col, _freeze(cond)) for col, cond in where.items()))
+            if fkey not in cells_by_filter:
+                mask = np.ones(len(self.cube), dtype=bool)
+                for col, cond in where.items():
+                    pkey = (col, _freeze(cond))
+                    if pkey not in predicates:
+                        predicates[pkey] = cell_mask(keys, {col: cond})
+                    mask &= predicates[pkey]
+                cells_by_filter[fkey] = self.cube[mask]
+            return fkey
+
+        # stejný filtr + stejné klíče → jeden groupby se sjednocenými faktory
+        groups, group_of = {}, {}
+        for name, (by, where, factors) in self._requests.items():
+            fkey = cells_for(where)
+            gkey = (fkey, tuple(by))
+            group = groups.setdefault(gkey, {"by": by, "factors": []})
+            group["factors"] += [f for f in factors if f not in group["factors"]]
+            group_of[name] = gkey
+
+        aggregated = {
+            gkey: query(cells_by_filter[gkey[0]], g["by"], factors=g["factors"])
+            for gkey, g in groups.items()
+        }
+
+        results = {}
+        for name, (_, _, factors) in self._requests.items():
+            gkey = group_of[name]
+            extra = [f for f in groups[gkey]["factors"] if f not in factors]
+            results[name] = aggregated[gkey].drop(columns=extra)
+
+        self.stats = {
+            "requests": len(self._requests),
+            "predicates": len(predicates),
+            "filters": len(cells_by_filter),
+            "groupbys": len(aggregated),
+        }
+        return results
@@ -0,0 +1,247 @@
+"""
+Načítání HBSC dat přes sloupcovou cache.
+
+`data.csv` má ~1.25M řádků a jeho parsování z textu je nejdražší část
+studeného startu aplikace. Ingest krok ho jednou převede do Parquet
+souborů rozdělených podle YEAR (jeden soubor na vlnu průzkumu) s pevným
+schématem (kompaktní typy ze `schema.py`). Stránky pak čtou jen sloupce
+a roky, které potřebují.
+
+Spuštění ingestu:
+
+    python -m children_da.data            # data.csv -> data_cache/
+    python -m children_da.data other.csv  # jiný vstup
+
+Pokud cache chybí nebo je starší než `data.csv`, `load_data()` potichu
+spadne zpět na čtení CSV.
+
+Nová vlna průzkumu se dá do existující cache přidat bez přestavby
+(`append_wave`, z příkazové řádky přes `python -m children_da.ingest
+--append`). Zapíše se jen oddíl nového roku, kostka se přepočítá jen
+pro tento rok a v manifestu se zvýší `revision`, podle které si
+dashboardy data znovu načtou.
+"""
+import json
+import os
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from children_da.countries import harmonise_countries
+from children_da.factors import DASHBOARD_FACTORS, check_scales
+from children_da.schema import apply_dtypes
+
+
+DATA_CSV = Path("data.csv")
+CACHE_DIR = Path("data_cache")
+MANIFEST_NAME = "manifest.json"
+
+# Zvýšit při každé změně schématu, aby se stará cache nepoužila.
+SCHEMA_VERSION = 5
+
+
+# Sloupce, které potřebují stránky Countries a Gender.
+DASHBOARD_COLUMNS = [
+    "YEAR", "COUNTRY_NAME", "COUNTRY_CODE", "SEX", "AGE", "OVERWEIGHT",
+] + DASHBOARD_FACTORS
+
+
+# ------------------------------------------------------------
+# INGEST
+# ------------------------------------------------------------
+def prepare(df: pd.DataFrame) -> pd.DataFrame:
+    """Compact dtypes + scale check + country harmonisation (run once, at ingest)."""
+    df = apply_dtypes(df)
+    check_scales(df)
+    if "COUNTRY_NAME" in df.columns:
+        df = harmonise_countries(df)
+    return df
+
+
+def _source_stamp(csv_path: Path) -> dict:
+    stat = csv_path.stat()
+    return {
+        "source": str(csv_path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "schema_version": SCHEMA_VERSION,
+    }
+
+
+def _partition_path(cache_dir: Path, year: int) -> Path:
+    return cache_dir / f"YEAR={int(year)}.parquet"
+
+
+def build_cache(csv_path=DATA_CSV, cache_dir=CACHE_DIR) -> dict:
+    """
+    Convert `csv_path` into one Parquet file per YEAR under `cache_dir`.
+    Returns the manifest that was written.
+    """
+    csv_path, cache_dir = Path(csv_path), Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    df = prepare(pd.read_csv(csv_path))
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    schema = table.schema
+
+    for old in cache_dir.glob("YEAR=*.parquet"):
+        old.unlink()
+
+    years = sorted(int(y) for y in df["YEAR"].dropna().unique())
+    year_col = table.column("YEAR")
+    for year in years:
+        part = table.filter(pc.equal(year_col, year))
+        pq.write_table(part, _partition_path(cache_dir, year), compression="zstd")
+
+    # předpočítaná kostka prevalence vedle dat (viz cube.py)
+    from children_da.cube import CUBE_FILE, build_cube, save_cube
+    save_cube(build_cube(df), cache_dir)
+
+    manifest = _source_stamp(csv_path)
+    manifest["cube"] = CUBE_FILE
+    manifest["years"] = years
+    manifest["rows"] = int(table.num_rows)
+    manifest["columns"] = schema.names
+    manifest["revision"] = 0
+    manifest["appended"] = []
+    _write_manifest(cache_dir, manifest)
+    return manifest
+
+
+def append_wave(df: pd.DataFrame, cache_dir=CACHE_DIR, source=None) -> dict:
+    """
+    Add the survey year(s) in `df` to an existing cache (an existing year
+    is replaced). Only the new partitions and their cube cells are
+    computed; the manifest revision is bumped last.
+    """
+    from children_da.cube import build_cube, load_cube, save_cube
+
+    cache_dir = Path(cache_dir)
+    manifest = read_manifest(cache_dir)
+    if manifest is None or manifest.get("schema_version") != SCHEMA_VERSION:
+        raise RuntimeError(f"No current cache in {cache_dir} – run `python -m children_da.data` first")
+
+    df = prepare(df)
+    years = sorted(int(y) for y in df["YEAR"].dropna().unique())
+    if not years:
+        raise ValueError("The new wave has no YEAR values")
+
+    # stejné sloupce a typy jako stávající oddíly
+    schema = pq.read_schema(_partition_path(cache_dir, manifest["years"][0]))
+    df = df.reindex(columns=schema.names)
+    table = pa.Table.from_pandas(df, preserve_index=False).cast(schema)
+
+    replaced_rows = 0
+    year_col = table.column("YEAR")
+    for year in years:
+        path = _partition_path(cache_dir, year)
+        if year in manifest["years"]:
+            replaced_rows += pq.read_metadata(path).num_rows
+        pq.write_table(table.filter(pc.equal(year_col, year)), path, compression="zstd")
+
+    cube = load_cube(cache_dir)
+    cube = pd.concat(
+        [cube[~cube["YEAR"].isin(years)], build_cube(df)], ignore_index=True
+    )
+    cube["COUNTRY_NAME"] = cube["COUNTRY_NAME"].astype(object).astype("category")
+    save_cube(cube, cache_dir)
+
+    manifest["years"] = sorted(set(manifest["years"]) | set(years))
+    manifest["rows"] = manifest["rows"] - replaced_rows + int(table.num_rows)
+    manifest["revision"] = manifest.get("revision", 0) + 1
+    manifest.setdefault("appended", []).append({
+        "years": years, "rows": int(table.num_rows), "source": str(source) if source else None,
+    })
+    _write_manifest(cache_dir, manifest)
+    return manifest
+
+
+def _write_manifest(cache_dir: Path, manifest: dict):
+    # přes dočasný soubor, aby běžící aplikace nikdy nečetla půlku JSONu
+    tmp = cache_dir / (MANIFEST_NAME + ".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2))
+    os.replace(tmp, cache_dir / MANIFEST_NAME)
+
+
+def read_manifest(cache_dir=CACHE_DIR):
+    path = Path(cache_dir) / MANIFEST_NAME
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def cache_is_fresh(csv_path=DATA_CSV, cache_dir=CACHE_DIR) -> bool:
+    """True if the cache was built from the current `csv_path` with the current schema."""
+    csv_path = Path(csv_path)
+    manifest = read_manifest(cache_dir)
+    if manifest is None:
+        return False
+    if not csv_path.exists():
+        # CSV není k dispozici (např. nasazení jen s cache) → věříme cache
+        return manifest.get("schema_version") == SCHEMA_VERSION
+    stamp = _source_stamp(csv_path)
+    return all(manifest.get(k) == stamp[k] for k in ("size", "mtime_ns", "schema_version"))
+
+
+# ------------------------------------------------------------
+# NAČÍTÁNÍ
+# ------------------------------------------------------------
+def _read_cache(cache_dir: Path, manifest: dict, columns, years) -> pd.DataFrame:
+    wanted_years = manifest["years"] if years is None else [y for y in manifest["years"] if y in set(years)]
+    if columns is not None:
+        columns = [c for c in columns if c in manifest["columns"]]
+
+    tables = [
+        pq.read_table(_partition_path(cache_dir, y), columns=columns)
+        for y in wanted_years
+    ]
+    if not tables:
+        schema = pq.read_schema(_partition_path(cache_dir, manifest["years"][0]))
+        if columns is not None:
+            schema = pa.schema([schema.field(c) for c in columns])
+        return apply_dtypes(schema.empty_table().to_pandas())
+    return apply_dtypes(pa.concat_tables(tables).to_pandas())
+
+
+def _read_csv(csv_path: Path, columns, years) -> pd.DataFrame:
+    usecols = None
+    if columns is not None:
+        extra = ["YEAR"] if years is not None else []
+        if "COUNTRY_CODE" in columns:
+            extra.append("COUNTRY_NAME")  # COUNTRY_CODE se dopočítá z názvu
+        usecols = list(dict.fromkeys(list(columns) + extra))
+        header = pd.read_csv(csv_path, nrows=0).columns
+        usecols = [c for c in usecols if c in header]
+
+    df = prepare(pd.read_csv(csv_path, usecols=usecols))
+    if years is not None:
+        df = df[df["YEAR"].isin(list(years))].reset_index(drop=True)
+    if columns is not None:
+        df = df[[c for c in columns if c in df.columns]]
+    return df
+
+
+def load_data(columns=None, years=None, csv_path=DATA_CSV, cache_dir=CACHE_DIR) -> pd.DataFrame:
+    """
+    Load the HBSC table.
+
+    columns – list of columns to read (None = all)
+    years   – iterable of survey years to read (None = all)
+
+    Reads from the Parquet cache when it is fresh, otherwise from the CSV.
+    """
+    csv_path, cache_dir = Path(csv_path), Path(cache_dir)
+    if cache_is_fresh(csv_path, cache_dir):
+        return _read_cache(cache_dir, read_manifest(cache_dir), columns, years)
+    return _read_csv(csv_path, columns, years)
+
+
+if __name__ == "__main__":
+    src = Path(sys.argv[1]) if len(sys.argv) > 1 else DATA_CSV
+    dst = Path(sys.argv[2]) if len(sys.argv) > 2 else CACHE_DIR
+    info = build_cache(src, dst)
+    print(f"Cache built in {dst}: {info['rows']} rows, years {info['years']}")
@@ -0,0 +1,144 @@
+"""
+Číselník faktorů – maximum škály, směr škály a popisek pro grafy.
+
+Dřív měla každá stránka vlastní `dictionary` / `dict_scales` a
+`reverse_scales` a nesouhlasily (FAMILY_MEALS_TOGETHER, BREAKFAST_WEEKDAYS,
+DRUNK_30) a lišil se i vzorec pro obrácené škály. Teď je jediný zdroj
+pravdy tady. Platí maxima z Countries a analytických notebooků
+(FAMILY_MEALS_TOGETHER 6, BREAKFAST_WEEKDAYS 6, DRUNK_30 7); grafy
+Gender, které dřív počítaly s 5, 5 a 5, se u těchto faktorů posunuly.
+Maxima a směr škál drží `tests/test_factors.py`.
+
+Normalizace na 0–1 (1 = rizikovější chování):
+
+    běžná škála      x / max
+    obrácená škála   (max + 1 - x) / max
+
+Je lineární, takže průměr normalizovaných hodnot = normalizovaný průměr
+a stránky mohou normalizovat rovnou průměry z kostky (`normalize_means`).
+Normalizovaná matice po řádcích by proto nebyla nikde potřeba.
+"""
+import warnings
+
+import numpy as np
+import pandas as pd
+
+
+# (faktor, maximum škály, obrácená škála, popisek v grafech)
+# Obrácená škála = vyšší hodnota znamená zdravější chování.
+_FACTOR_ROWS = [
+    ("FRUITS", 7, True, "No fruit"),
+    ("SOFT_DRINKS", 7, False, "Soft drinks"),
+    ("SWEETS", 7, False, "Sweets"),
+    ("VEGETABLES", 7, True, "No vegetables"),
+    ("FRIEND_TALK", 7, True, "No friends talk"),
+    ("TIME_EXE", 7, False, "No exercise"),
+    ("PHYS_ACT_60", 7, True, "Below 60 min/day"),
+    ("DRUNK_30", 7, False, "Alcohol"),
+    ("FAMILY_MEALS_TOGETHER", 6, False, "No family meals"),
+    ("BREAKFAST_WEEKDAYS", 6, True, "No breakfast (weekdays)"),
+    ("BREAKFAST_WEEKEND", 3, True, "No breakfast (weekend)"),
+    ("TOOTH_BRUSHING", 5, False, "Poor teeth care"),
+    ("STUD_TOGETHER", 5, False, "No friend time"),
+    ("BUL_OTHERS", 5, False, "Bullies others"),
+    ("BUL_BEEN", 5, False, "Been bullied"),
+    ("FIGHT_YEAR", 5, False, "Often fights"),
+    ("INJURED_YEAR", 5, False, "Often injured"),
+    ("HEADACHE", 5, True, "Frequent headaches"),
+    ("FEEL_LOW", 5, True, "Feels low"),
+    ("NERVOUS", 5, True, "Feels nervous"),
+    ("SLEEP_DIF", 5, True, "Sleep problems"),
+    ("DIZZY", 5, True, "Feels dizzy"),
+    ("TALK_MOTHER", 5, False, "No mom talk"),
+    ("TALK_FATHER", 5, False, "No dad talk"),
+    ("LIKE_SCHOOL", 4, False, "Dislikes school"),
+    ("SCHOOL_PRESSURE", 4, False, "High school pressure"),
+    ("COMPUTER_NO", 4, False, "Computer/Gaming use"),
+    # mimo dashboard (model, notebooky)
+    ("STOMACHACHE", 5, True, "Stomach aches"),
+    ("HEALTH", 4, False, "Poor health"),
+    ("LIFESAT", 10, True, "Low life satisfaction"),
+    ("THINK_BODY", 5, False, "Body image"),
+]
+
+FACTOR_DIM = pd.DataFrame(
+    _FACTOR_ROWS, columns=["FACTOR", "SCALE_MAX", "REVERSE", "ALIAS"]
+).astype({"SCALE_MAX": "int8"})
+
+# faktory, se kterými pracují stránky Countries a Gender (pořadí = pořadí v grafech)
+DASHBOARD_FACTORS = [f for f, *_ in _FACTOR_ROWS[:27]]
+
+SCALE_MAX = dict(zip(FACTOR_DIM["FACTOR"], FACTOR_DIM["SCALE_MAX"].astype(int)))
+REVERSE_SCALES = frozenset(FACTOR_DIM.loc[FACTOR_DIM["REVERSE"], "FACTOR"])
+FACTOR_ALIAS = dict(zip(FACTOR_DIM["FACTOR"], FACTOR_DIM["ALIAS"]))
+
+# Barometr se ptá vlastními odpověďmi seřazenými od nejzdravější (1) po
+# nejrizikovější, u některých otázek s jiným počtem možností než průzkum.
+BAROMETER_SCALE_MAX = {
+    "SOFT_DRINKS": 7,
+    "SWEETS": 7,
+    "VEGETABLES": 7,
+    "FRIEND_TALK": 7,
+    "PHYS_ACT_60": 7,
+    "BREAKFAST_WEEKDAYS": 7,
+    "TOOTH_BRUSHING": 5,
+    "FEEL_LOW": 7,
+    "TALK_FATHER": 7,
+}
+
+
+def barometer_component_risks(answers: dict) -> dict:
+    """0–1 risk per Barometer question (1 = healthiest answer → 0)."""
+    return {f: (answers[f] - 1) / (scale - 1) for f, scale in BAROMETER_SCALE_MAX.items()}
+
+
+def barometer_risk(answers: dict) -> float:
+    """Mean 0–1 risk of Barometer answers (1 = healthiest answer → 0)."""
+    risks = barometer_component_risks(answers)
+    return sum(risks.values()) / len(risks)
+
+
+def _coefficients(factors):
+    """(a, b) per factor so that normalised = a + b * x."""
+    scale = np.array([SCALE_MAX[f] for f in factors], dtype="float64")
+    reverse = np.array([f in REVERSE_SCALES for f in factors])
+    a = np.where(reverse, (scale + 1) / scale, 0.0)
+    b = np.where(reverse, -1.0 / scale, 1.0 / scale)
+    return a, b
+
+
+def normalize_means(df_means: pd.DataFrame, cols) -> pd.DataFrame:
+    """0–1 normalisation of factor columns (raw values or means from the cube)."""
+    cols = list(cols)
+    df_means = df_means.copy()
+    if cols:
+        a, b = _coefficients(cols)
+        df_means[cols] = a + b * df_means[cols].to_numpy(dtype="float64", na_value=np.nan)
+    return df_means
+
+
+def normalize_se(df_se: pd.DataFrame, cols) -> pd.DataFrame:
+    """`<F>_SE` columns of raw-scale means (or gaps) on the 0–1 scale of `normalize_means`."""
+    cols = list(cols)
+    df_se = df_se.copy()
+    if cols:
+        _, b = _coefficients(cols)
+        se_cols = [f"{c}_SE" for c in cols]
+        df_se[se_cols] = np.abs(b) * df_se[se_cols].to_numpy(dtype="float64", na_value=np.nan)
+    return df_se
+
+
+def check_scales(df: pd.DataFrame):
+    """Warn about answer codes outside 1..SCALE_MAX (normalised value would leave 0–1)."""
+    bad = {}
+    for factor, scale in SCALE_MAX.items():
+        if factor not in df.columns:
+            continue
+        col = df[factor]
+        lo, hi = col.min(), col.max()
+        if pd.notna(lo) and (lo < 1 or hi > scale):
+            bad[factor] = (lo, hi, scale)
+    if bad:
+        details = ", ".join(f"{f} {lo}–{hi} (scale 1–{s})" for f, (lo, hi, s) in bad.items())
+        warnings.warn(f"Factor codes outside the registered scale: {details}", stacklevel=2)
+    return bad
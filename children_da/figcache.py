@@ -0,0 +1,141 @@
+"""
+Sdílená cache hotových Plotly grafů.
+
+Většina návštěv vidí stejné stavy filtrů („All countries“ / „Both“,
+celý věkový rozsah) a každá session přesto znovu skládá stejné grafy
+a serializuje je. Graf se proto uloží pod klíčem
+
+    (stránka, graf, filtry, verze dat)
+
+a při dalším zobrazení se jen načte – bez dotazů nad kostkou i bez
+`px.*` / `go.Figure` stavby.
+
+Uložený je slovník grafu (`fig.to_dict()`), ne JSON. Zásah vrátí
+`CachedFigure` – obal, jehož `to_dict()` vrátí přímo sdílený slovník.
+`st.plotly_chart` u objektu typu Figure nic nevaliduje ani neskládá
+znovu, jen slovník jednou zakóduje do JSON (orjson). Graf z cache se
+proto už nesmí upravovat – úpravy (titulky, legenda) patří před `put`.
+„Graf není k dispozici“ (None) se ukládá také, aby se pro stejné
+filtry nepočítal znovu.
+
+Cache je jedna pro celý proces (`store.get_figure_cache`), vyhazuje
+nejdéle nepoužité grafy (LRU) a hlídá celkovou velikost JSON. Grafy
+staré verze dat se už nikdy nezasáhnou a postupně vypadnou.
+"""
+import threading
+from collections import OrderedDict
+
+import plotly.graph_objects as go
+import plotly.io as pio
+
+
+FIGURE_CACHE_MB = 64
+
+# uložené „graf není k dispozici“
+_UNAVAILABLE = object()
+
+
+class CachedFigure(go.Figure):
+    """
+    Read-only figure from the cache: `to_dict()` returns the shared dict
+    without building or validating a Figure (that is all `st.plotly_chart`
+    calls on a Figure).
+    """
+
+    def __init__(self, fig_dict: dict):
+        # BaseFigure.__init__ by celý graf znovu postavil a zvalidoval
+        object.__setattr__(self, "_fig_dict", fig_dict)
+
+    def to_dict(self) -> dict:
+        return self._fig_dict
+
+    def to_plotly_json(self) -> dict:
+        return self._fig_dict
+
+    def to_json(self, *args, **kwargs) -> str:
+        return pio.to_json(self._fig_dict, *args, validate=False, **kwargs)
+
+
+class FigureCache:
+    """Thread-safe LRU of figure dicts with a total size cap (bytes of their JSON)."""
+
+    def __init__(self, max_bytes=FIGURE_CACHE_MB * 2**20):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, key) -> tuple[bool, CachedFigure | None]:
+        """(hit, figure); a hit with None means the figure is not available."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        payload = entry[0]
+        return True, None if payload is _UNAVAILABLE else CachedFigure(payload)
+
+    def get(self, key) -> CachedFigure | None:
+        return self.lookup(key)[1]
+
+    def put(self, key, fig: go.Figure | None) -> go.Figure | None:
+        """Store `fig` (None = not available for these filters)."""
+        if fig is None:
+            payload, size = _UNAVAILABLE, 0
+        else:
+            payload = fig.to_dict()
+            size = len(pio.to_json(payload, validate=False))
+            if size > self.max_bytes:
+                return fig
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.nbytes -= old[1]
+            self._entries[key] = (payload, size)
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.nbytes -= evicted
+                self.evictions += 1
+        return fig
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "mb": self.nbytes / 2**20,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class PageFigures:
+    """Figures of one page for one filter state (keys into a `FigureCache`)."""
+
+    def __init__(self, cache: FigureCache, page: str, filters: tuple, version: str):
+        self.cache = cache
+        self.page = page
+        self.filters = tuple(filters)
+        self.version = version
+
+    def _key(self, chart: str, extra=()):
+        return (self.page, chart, self.filters + tuple(extra), self.version)
+
+    def get(self, chart: str, extra=()) -> CachedFigure | None:
+        """Cached figure, or None when it has to be built (or is not available)."""
+        return self.cache.get(self._key(chart, extra))
+
+    def lookup(self, chart: str, extra=()) -> tuple[bool, CachedFigure | None]:
+        """(hit, figure) – tells a cached "not available" apart from a miss."""
+        return self.cache.lookup(self._key(chart, extra))
+
+    def put(self, chart: str, fig, extra=()):
+        """Store a freshly built figure (None = not available for these filters)."""
+        self.cache.put(self._key(chart, extra), fig)
+        return fig
@@ -0,0 +1,262 @@
+"""
+Lokální geometrie zemí pro mapu na stránce Gender.
+
+`px.choropleth(locationmode="country names")` hledá země podle názvu
+(při každém vykreslení) a Plotly.js si k tomu stahuje světový topojson
+z CDN – na hostech bez internetu se mapa nevykreslí. Mapa proto jede
+podle ISO3 kódů z číselníku zemí (`countries.ISO3_BY_CODE`) a nad
+přibalenou geometrií, oříznutou na výřez mapy (MAP_LON_RANGE ×
+MAP_LAT_RANGE – Evropa a Severní Amerika). Souřadnice jsou zaokrouhlené
+na setiny stupně, víc na mapě 580 px vysoké vidět není.
+
+Plotly.js si ale topojson stahuje u každé geo mapy, která má
+`locationmode` – a `geojson=` nastaví `locationmode="geojson-id"`.
+Proto se vedle GeoJSONu uloží i topojson se stejnými zeměmi
+(`static/topojson/world_110m.json`) a stránka ho předá přes
+`config={"topojsonURL": TOPOJSON_URL}` – Streamlit ho servíruje sám.
+
+Geometrie se jednou vyrobí z Plotly `world_110m.json` (topojson, který
+by jinak Plotly.js stahovalo) nebo z Natural Earth GeoJSON; další zdroje
+jen doplní země, které v prvním chybí (Malta v měřítku 110m není):
+
+    python -m children_da.geometry ne_110m.geojson malta.geojson
+
+Výsledek je `children_da/map_geometry.json` (GeoJSON, `id` = ISO3)
+a topojson ve `static/topojson/`; obojí se commituje s kódem. Když
+GeoJSON chybí, `load_geometry()` vrátí None a stránka použije
+podkladovou mapu Plotly jako dřív.
+"""
+import json
+import sys
+from pathlib import Path
+
+
+GEOMETRY_PATH = Path(__file__).with_name("map_geometry.json")
+
+# Streamlit servíruje static/ vedle 1_Home.py na app/static/…
+TOPOJSON_DIR = Path(__file__).resolve().parent.parent / "static" / "topojson"
+TOPOJSON_URL = "app/static/topojson/"
+# jméno souboru, které Plotly.js skládá ze scope a rozlišení mapy
+TOPOJSON_NAME = "world_110m.json"
+# vrstvy, které Plotly.js v topojsonu hledá
+TOPOJSON_LAYERS = ("coastlines", "land", "ocean", "lakes", "rivers", "countries", "subunits")
+
+MAP_LON_RANGE = (-120, 80)
+MAP_LAT_RANGE = (30, 75)
+
+COORD_DECIMALS = 2
+
+
+# ------------------------------------------------------------
+# ČTENÍ ZDROJE (topojson / GeoJSON)
+# ------------------------------------------------------------
+def _decode_arcs(topology: dict) -> list:
+    """Absolute lon/lat arcs of a (possibly quantised, delta-encoded) topology."""
+    transform = topology.get("transform")
+    arcs = []
+    for arc in topology["arcs"]:
+        if transform is None:
+            arcs.append([tuple(p[:2]) for p in arc])
+            continue
+        (sx, sy), (tx, ty) = transform["scale"], transform["translate"]
+        x = y = 0
+        points = []
+        for dx, dy, *_ in arc:
+            x, y = x + dx, y + dy
+            points.append((x * sx + tx, y * sy + ty))
+        arcs.append(points)
+    return arcs
+
+
+def _ring(arcs: list, indexes) -> list:
+    """Join arcs of one ring; a negative index ~i means arc i reversed."""
+    ring = []
+    for i in indexes:
+        points = arcs[i] if i >= 0 else arcs[~i][::-1]
+        ring.extend(points if not ring else points[1:])
+    return ring
+
+
+def _topology_features(topology: dict, layer="countries") -> list:
+    arcs = _decode_arcs(topology)
+    features = []
+    for geom in topology["objects"][layer]["geometries"]:
+        if geom["type"] == "Polygon":
+            polygons = [[_ring(arcs, r) for r in geom["arcs"]]]
+        elif geom["type"] == "MultiPolygon":
+            polygons = [[_ring(arcs, r) for r in poly] for poly in geom["arcs"]]
+        else:
+            continue
+        features.append((geom.get("id"), polygons))
+    return features
+
+
+def _geojson_features(collection: dict) -> list:
+    features = []
+    for feature in collection["features"]:
+        props = feature.get("properties") or {}
+        # Natural Earth má u některých zemí ISO_A3 = -99 (Francie, Norsko)
+        iso3 = next(
+            (v for v in (feature.get("id"), props.get("ISO_A3"), props.get("ADM0_A3"))
+             if isinstance(v, str) and len(v) == 3 and v != "-99"),
+            None,
+        )
+        geom = feature["geometry"]
+        if geom is None:
+            continue
+        if geom["type"] == "Polygon":
+            polygons = [geom["coordinates"]]
+        elif geom["type"] == "MultiPolygon":
+            polygons = geom["coordinates"]
+        else:
+            continue
+        features.append((iso3, polygons))
+    return features
+
+
+# ------------------------------------------------------------
+# OŘEZ NA VÝŘEZ MAPY
+# ------------------------------------------------------------
+def _clip_ring(ring: list, lon_range, lat_range) -> list:
+    """Sutherland–Hodgman clip of one ring to the lon/lat rectangle."""
+    (x0, x1), (y0, y1) = lon_range, lat_range
+    edges = [
+        (lambda p: p[0] >= x0, lambda p, q: _cross_x(p, q, x0)),
+        (lambda p: p[0] <= x1, lambda p, q: _cross_x(p, q, x1)),
+        (lambda p: p[1] >= y0, lambda p, q: _cross_y(p, q, y0)),
+        (lambda p: p[1] <= y1, lambda p, q: _cross_y(p, q, y1)),
+    ]
+    points = list(ring)
+    for inside, cross in edges:
+        if not points:
+            break
+        clipped, prev = [], points[-1]
+        for cur in points:
+            if inside(cur):
+                if not inside(prev):
+                    clipped.append(cross(prev, cur))
+                clipped.append(cur)
+            elif inside(prev):
+                clipped.append(cross(prev, cur))
+            prev = cur
+        points = clipped
+    return points
+
+
+def _cross_x(p, q, x):
+    t = (x - p[0]) / (q[0] - p[0])
+    return (x, p[1] + t * (q[1] - p[1]))
+
+
+def _cross_y(p, q, y):
+    t = (y - p[1]) / (q[1] - p[1])
+    return (p[0] + t * (q[0] - p[0]), y)
+
+
+def _round_ring(ring: list) -> list:
+    """Rounded, closed ring without repeated points (None if degenerate)."""
+    out = []
+    for lon, lat in ring:
+        point = [round(lon, COORD_DECIMALS), round(lat, COORD_DECIMALS)]
+        if not out or point != out[-1]:
+            out.append(point)
+    if len(out) > 1 and out[0] == out[-1]:
+        out.pop()
+    if len(out) < 3:
+        return None
+    return out + [out[0]]
+
+
+def trim_features(features, lon_range=MAP_LON_RANGE, lat_range=MAP_LAT_RANGE) -> dict:
+    """GeoJSON FeatureCollection of (iso3, polygons) clipped to the map window."""
+    out = []
+    for iso3, polygons in features:
+        if iso3 is None:
+            continue
+        trimmed = []
+        for polygon in polygons:
+            rings = [_round_ring(_clip_ring(r, lon_range, lat_range)) for r in polygon]
+            # vnější prstenec mimo výřez → celý polygon pryč
+            if rings and rings[0] is not None:
+                trimmed.append([r for r in rings if r is not None])
+        if trimmed:
+            out.append({
+                "type": "Feature",
+                "id": iso3,
+                "properties": {},
+                "geometry": {"type": "MultiPolygon", "coordinates": trimmed},
+            })
+    return {"type": "FeatureCollection", "features": out}
+
+
+def to_topology(collection: dict) -> dict:
+    """
+    Topojson for Plotly.js with the trimmed countries: `countries` (id =
+    ISO3) and `land`, the other base-map layers empty. Every ring is its
+    own arc (no shared borders, no quantisation) – small enough here.
+    """
+    arcs, geometries = [], []
+    for feature in collection["features"]:
+        polygons = []
+        for polygon in feature["geometry"]["coordinates"]:
+            rings = []
+            for ring in polygon:
+                rings.append([len(arcs)])
+                arcs.append(ring)
+            polygons.append(rings)
+        geometries.append({"type": "MultiPolygon", "id": feature["id"], "arcs": polygons})
+
+    objects = {layer: {"type": "GeometryCollection", "geometries": []} for layer in TOPOJSON_LAYERS}
+    objects["countries"]["geometries"] = geometries
+    objects["land"]["geometries"] = [{k: v for k, v in g.items() if k != "id"} for g in geometries]
+    return {"type": "Topology", "objects": objects, "arcs": arcs}
+
+
+def _read_features(source) -> list:
+    data = json.loads(Path(source).read_text(encoding="utf-8"))
+    if data.get("type") == "Topology":
+        return _topology_features(data)
+    return _geojson_features(data)
+
+
+def build_geometry(sources, out_path=GEOMETRY_PATH, topojson_dir=TOPOJSON_DIR) -> dict:
+    """
+    Trim world topojson / GeoJSON `sources` into `out_path` (GeoJSON) and
+    `topojson_dir` (topojson for Plotly.js). Later sources only add
+    countries missing from the earlier ones.
+    """
+    if isinstance(sources, (str, Path)):
+        sources = [sources]
+    features, seen = [], set()
+    for source in sources:
+        for iso3, polygons in _read_features(source):
+            if iso3 not in seen:
+                seen.add(iso3)
+                features.append((iso3, polygons))
+    collection = trim_features(features)
+    Path(out_path).write_text(json.dumps(collection, separators=(",", ":")), encoding="utf-8")
+
+    topojson_path = Path(topojson_dir) / TOPOJSON_NAME
+    topojson_path.parent.mkdir(parents=True, exist_ok=True)
+    topojson_path.write_text(json.dumps(to_topology(collection), separators=(",", ":")), encoding="utf-8")
+    return {
+        "features": len(collection["features"]),
+        "bytes": Path(out_path).stat().st_size,
+        "topojson_bytes": topojson_path.stat().st_size,
+    }
+
+
+def load_geometry(path=GEOMETRY_PATH):
+    """Bundled map geometry (GeoJSON dict), or None when it has not been built."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit("usage: python -m children_da.geometry <world_110m.json | countries.geojson> [more.geojson ...]")
+    info = build_geometry(sys.argv[1:])
+    print(f"Map geometry written to {GEOMETRY_PATH}: {info['features']} countries, {info['bytes'] / 1024:.0f} kB;"
+          f" topojson {TOPOJSON_DIR / TOPOJSON_NAME}: {info['topojson_bytes'] / 1024:.0f} kB")
@@ -0,0 +1,297 @@
+"""
+Sjednocení surových HBSC vln do jedné tabulky – lokálně, bez Snowflake.
+
+Dřív se `data.csv` skládalo ve warehouse přes `union_code.sql` (UNION
+ručně psaných SELECTů nad HBSC_2001 … HBSC_2018). Stejná mapování sloupců
+jsou teď deklarativně v `COLUMN_MAP` a každá vlna se transformuje
+vektorově v pandas ve vlastním procesu.
+
+Surové soubory se hledají v adresáři `raw/` jako `HBSC_<rok>.csv`
+(nebo `.parquet`):
+
+    python -m children_da.ingest                 # raw/ -> data.csv
+    python -m children_da.ingest raw/ out.csv --workers 3
+
+Výstup má sloupce z SQL velkými písmeny a navíc COUNTRY_NAME odvozený
+z `countryno` (`countries.name_from_countryno`). Pak stačí znovu
+postavit cache: `python -m children_da.data`.
+
+Nová vlna (např. `raw/HBSC_2022.csv`) se dá přidat do existující cache
+bez přestavby ostatních let; mapování sloupců se převezme z poslední
+známé vlny, pokud pro ni v `COLUMN_MAP` nic není:
+
+    python -m children_da.ingest --append HBSC_2022 [--like HBSC_2018]
+"""
+import argparse
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from children_da.countries import name_from_countryno
+from children_da.data import CACHE_DIR, DATA_CSV, append_wave
+
+
+RAW_DIR = Path("raw")
+
+# zdrojové tabulky (= soubory v RAW_DIR), v pořadí vln
+SOURCES = ["HBSC_2001", "HBSC_2006", "HBSC_2010", "HBSC_2014", "HBSC_2018"]
+
+
+# ------------------------------------------------------------
+# TYPY MAPOVÁNÍ
+# ------------------------------------------------------------
+@dataclass(frozen=True)
+class Recode:
+    """CASE WHEN column = code THEN value … ELSE NULL (or ELSE column)."""
+    column: str
+    codes: dict
+    keep_other: bool = False
+
+
+@dataclass(frozen=True)
+class Const:
+    """Constant value (NULL = Const(None))."""
+    value: object
+
+
+@dataclass(frozen=True)
+class Age:
+    """CAST(TRY_CAST(REPLACE(TRIM(column), ',', '.') AS NUMBER) AS INT)."""
+    column: str
+
+
+NULL = Const(None)
+
+_Y01, _Y06, _Y10, _Y14, _Y18 = SOURCES
+_NEW = (_Y14, _Y18)
+
+
+def _per_year(default, *overrides):
+    """Source per table: `default`, except for the (tables, source) overrides."""
+    spec = {table: default for table in SOURCES}
+    for tables, source in overrides:
+        for table in tables if isinstance(tables, tuple) else (tables,):
+            spec[table] = source
+    return spec
+
+
+# výstupní sloupec → zdroj pro každou tabulku
+# (řetězec = přejmenování, Recode / Const / Age = výraz z union_code.sql)
+COLUMN_MAP = {
+    "COUNTRY_NO": _per_year("countryno", (_Y14, "COUNTRYno")),
+    "YEAR": _per_year("surveyyear", (_NEW, "HBSC")),
+    "PUPIL_NO": _per_year("uniqueid", (_NEW, "id4")),
+    "SCHOOL_NO": _per_year("schoolno", (_NEW, "id2")),
+    "AGE": _per_year(Age("age"), (_Y14, Age("AGE"))),
+    "SEX": _per_year("sex"),
+    "FAM_CAR": _per_year("famcar", (_NEW, "fasfamcar")),
+    "OWN_BEDROOM_FLAG": _per_year(
+        Recode("bedroom", {1: 0, 2: 1}), (_NEW, Recode("fasbedroom", {1: 0, 2: 1})),
+    ),
+    "COMPUTER_NO": _per_year("computers", (_NEW, "fascomputers")),
+    "HEALTH": _per_year("health"),
+    "HEADACHE": _per_year("headache"),
+    "STOMACHACHE": _per_year("stomachache"),
+    "LIFESAT": _per_year("lifesat"),
+    "FEEL_LOW": _per_year("feellow"),
+    "NERVOUS": _per_year("nervous"),
+    "SLEEP_DIF": _per_year("sleepdifficulty", (_NEW, "sleepdificulty")),
+    "DIZZY": _per_year("dizzy"),
+    "THINK_BODY": _per_year("thinkbody"),
+    "PHYS_ACT_60": _per_year("physact60"),
+    "BREAKFAST_WEEKDAYS": _per_year("breakfastwd"),
+    "BREAKFAST_WEEKEND": _per_year("breakfastwe"),
+    "FRUITS": _per_year("fruits", (_Y18, "fruits_2")),
+    "VEGETABLES": _per_year("vegetables", (_Y18, "vegetables_2")),
+    "SWEETS": _per_year("sweets", (_Y18, "sweets_2")),
+    "SOFT_DRINKS": _per_year("softdrinks", (_Y18, "softdrinks_2")),
+    "FAMILY_MEALS_TOGETHER": _per_year(NULL, (_Y14, "m12"), (_Y18, "fmeal")),
+    "TOOTH_BRUSHING": _per_year("toothbr"),
+    "TIME_EXE": _per_year("timeexe", (_Y01, NULL), ((_Y06, _Y10), "timeexce")),
+    "ALCOHOL_LIFETIME": _per_year("alcltm", (_Y01, NULL), ((_Y06, _Y10), "alcopops")),
+    "ALCOHOL_30": _per_year("alc30d_2", ((_Y01, _Y06), NULL), (_Y10, "drink30d")),
+    "CANNABIS_LIFETIME": _per_year("cannabisltm", (_NEW, "cannabisltm_2")),
+    "CANNABIS_30": _per_year("cannabis30d", (_Y01, NULL), (_NEW, "cannabis30d_2")),
+    "DRUNK_30": _per_year("drunk30d", ((_Y01, _Y06), "drunk"), (_Y18, "drunkltm")),
+    # do 2014 v SQL NULL – tyto vlny jsou v kostce s N = 0 (bez prevalence,
+    # faktory ano), viz cube.build_cube
+    "OVERWEIGHT": _per_year(NULL, (_Y18, "oweight_who")),
+    "BMI": _per_year("MBMI", (_Y01, "mbmi"), (_Y06, NULL)),
+    "FAM_SUPPORT": _per_year(NULL, (_NEW, "famsup")),
+    "FAM_HELP": _per_year(NULL, (_NEW, "famhelp")),
+    "TALK_MOTHER": _per_year("talkmother"),
+    "TALK_FATHER": _per_year("talkfather"),
+    "FATHER_HOME_FLAG": _per_year(Recode("fatherhome1", {2: 0, 1: 1})),
+    # HBSC_2006: ELSE "motherhome1" – ostatní kódy projdou beze změny (jako v SQL)
+    "MOTHER_HOME_FLAG": _per_year(
+        Recode("motherhome1", {2: 0, 1: 1}),
+        (_Y06, Recode("motherhome1", {2: 0}, keep_other=True)),
+    ),
+    "SOCIAL_MEDIA_FLAG": _per_year(Const(-1), (_Y18, Recode("emcsocmed1", {1: 0, 2: 1}))),
+    "FEELINGS_ONLINE": _per_year(NULL, (_Y18, "emconlpref1")),
+    "SECRETS_ONLINE": _per_year(NULL, (_Y18, "emconlpref2")),
+    "ONLINE_GROUP": _per_year(NULL, (_Y18, "emconlfreq2")),
+    "ONLINE_FRIEND": _per_year(NULL, (_Y18, "emconlfreq1")),
+    "FRIEND_TALK": _per_year("talkbestfriend", (_NEW, "friendtalk")),
+    "FRIEND_HELP": _per_year(NULL, (_NEW, "friendhelp")),
+    "INJURED_YEAR": _per_year("injured12m"),
+    "FIGHT_YEAR": _per_year("fight12m"),
+    "CYBER_BUL_BEEN": _per_year(NULL, (_Y14, "cbullmess"), (_Y18, "cbeenbullied")),
+    "CYBER_BUL_OTHERS": _per_year(NULL, (_Y18, "cbulliedothers")),
+    "BUL_BEEN": _per_year("beenbullied"),
+    "BUL_OTHERS": _per_year("bulliedothers"),
+    "TEACHER_CARES": _per_year("teachercare", (_Y01, NULL), ((_Y06, _Y10), "acachieve")),
+    "TEACHER_ACCEPTS": _per_year(NULL, (_NEW, "teacheraccept")),
+    "STUD_ACCEPTS": _per_year("studaccept", (_Y01, NULL)),
+    "STUD_TOGETHER": _per_year("studtogether"),
+    "SCHOOL_PRESSURE": _per_year("schoolpressure"),
+    "LIKE_SCHOOL": _per_year("likeschool"),
+    "BODY_HIGHT": _per_year("bodyheight"),
+    "BODY_WEIGHT": _per_year("bodyweight"),
+}
+
+
+# ------------------------------------------------------------
+# TRANSFORMACE JEDNÉ VLNY
+# ------------------------------------------------------------
+def _source_columns(table: str) -> list:
+    cols = []
+    for spec in COLUMN_MAP.values():
+        source = spec[table]
+        if isinstance(source, str):
+            cols.append(source)
+        elif isinstance(source, (Recode, Age)):
+            cols.append(source.column)
+    return list(dict.fromkeys(cols))
+
+
+def raw_path(raw_dir, table: str) -> Path:
+    for suffix in (".parquet", ".csv"):
+        path = Path(raw_dir) / f"{table}{suffix}"
+        if path.exists():
+            return path
+    raise FileNotFoundError(f"No raw file for {table} in {raw_dir} (.parquet / .csv)")
+
+
+def _read_raw(path: Path, columns) -> pd.DataFrame:
+    if path.suffix == ".parquet":
+        raw = pd.read_parquet(path, columns=columns)
+    else:
+        header = pd.read_csv(path, nrows=0).columns
+        missing = sorted(set(columns) - set(header))
+        if missing:
+            raise KeyError(f"{path.name} is missing source columns {missing}")
+        # text jako ve warehouse; čísla se převádějí až v mapování (TRY_CAST)
+        raw = pd.read_csv(path, usecols=columns, dtype=str, keep_default_na=False, na_values=[""])
+    return raw
+
+
+def _number(values: pd.Series) -> pd.Series:
+    """TRY_CAST(... AS NUMBER) without the rounding – unparsable → NaN."""
+    return pd.to_numeric(values, errors="coerce")
+
+
+def _age(values: pd.Series) -> pd.Series:
+    text = values.astype("string").str.strip().str.replace(",", ".", regex=False)
+    x = _number(text).to_numpy(dtype="float64")
+    # NUMBER(38, 0) zaokrouhluje půlky od nuly
+    return pd.Series(np.sign(x) * np.floor(np.abs(x) + 0.5), index=values.index).astype("Int64")
+
+
+def _recode(values: pd.Series, spec: Recode) -> pd.Series:
+    x = _number(values)
+    out = x.map(spec.codes)
+    if spec.keep_other:
+        out = out.fillna(x.where(~x.isin(list(spec.codes))))
+    return out.astype("Float64")
+
+
+def _mapping_for(table: str, like=None) -> str:
+    """Which COLUMN_MAP entry a table uses (new waves borrow one)."""
+    if table in SOURCES:
+        return table
+    return like or SOURCES[-1]
+
+
+def transform(raw: pd.DataFrame, table: str) -> pd.DataFrame:
+    """Apply the COLUMN_MAP expressions for `table` (a key of SOURCES) to its raw columns."""
+    n = len(raw)
+    out = {}
+    for target, spec in COLUMN_MAP.items():
+        source = spec[table]
+        if isinstance(source, str):
+            out[target] = _number(raw[source])
+        elif isinstance(source, Recode):
+            out[target] = _recode(raw[source.column], source)
+        elif isinstance(source, Age):
+            out[target] = _age(raw[source.column])
+        elif source.value is None:
+            out[target] = pd.Series(np.nan, index=raw.index)
+        else:
+            out[target] = pd.Series(np.full(n, source.value), index=raw.index)
+    df = pd.DataFrame(out)
+    df.insert(1, "COUNTRY_NAME", name_from_countryno(df["COUNTRY_NO"]))
+    return df
+
+
+def ingest_table(raw_dir, table: str, like=None) -> pd.DataFrame:
+    """Read and transform one survey wave (runs in a worker process)."""
+    path = raw_path(raw_dir, table)
+    mapping = _mapping_for(table, like)
+    return transform(_read_raw(path, _source_columns(mapping)), mapping)
+
+
+# ------------------------------------------------------------
+# CELÝ UNION
+# ------------------------------------------------------------
+def build_union(raw_dir=RAW_DIR, tables=SOURCES, workers=None) -> pd.DataFrame:
+    """
+    All waves in one table – same rows as `T01_INPUT_UNION`
+    (UNION, i.e. duplicate rows removed).
+    """
+    tables = list(tables)
+    with ProcessPoolExecutor(max_workers=workers or len(tables)) as pool:
+        parts = list(pool.map(ingest_table, [raw_dir] * len(tables), tables))
+
+    df = pd.concat(parts, ignore_index=True)
+    n_before = len(df)
+    df = df.drop_duplicates(ignore_index=True)
+    if len(df) < n_before:
+        warnings.warn(f"UNION dropped {n_before - len(df)} duplicate rows", stacklevel=2)
+    return df
+
+
+def write_union(raw_dir=RAW_DIR, out_csv=DATA_CSV, workers=None) -> pd.DataFrame:
+    df = build_union(raw_dir, workers=workers)
+    df.to_csv(out_csv, index=False)
+    return df
+
+
+def append_table(table: str, raw_dir=RAW_DIR, cache_dir=CACHE_DIR, like=None) -> dict:
+    """Ingest one new wave straight into the Parquet cache (see data.append_wave)."""
+    df = ingest_table(raw_dir, table, like).drop_duplicates(ignore_index=True)
+    return append_wave(df, cache_dir, source=raw_path(raw_dir, table))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build data.csv from raw HBSC waves.")
+    parser.add_argument("raw_dir", nargs="?", default=RAW_DIR)
+    parser.add_argument("out_csv", nargs="?", default=DATA_CSV)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--append", metavar="TABLE", help="add one new wave to the cache")
+    parser.add_argument("--like", metavar="TABLE", help="column mapping for --append (default: latest)")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    args = parser.parse_args()
+
+    if args.append:
+        info = append_table(args.append, args.raw_dir, args.cache_dir, args.like)
+        print(f"{args.append} appended: years {info['years']}, {info['rows']} rows, revision {info['revision']}")
+        raise SystemExit
+
+    result = write_union(args.raw_dir, args.out_csv, args.workers)
+    print(f"{args.out_csv}: {len(result)} rows, years {sorted(result['YEAR'].dropna().unique().tolist())}")
+    print("Rebuild the cache with: python -m children_da.data")
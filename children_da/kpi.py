@@ -0,0 +1,121 @@
+"""
+KPI lišty stránek Countries a Gender.
+
+KPI nezávisí na filtrech stránky (zemi, pohlaví, věku), jen na datech.
+Počítají se proto jednou pro každou verzi dat (`store.dataset_version`)
+a při rerunech se jen čtou z `KpiService`. Počty zásahů / výpočtů ukazuje
+postranní panel (`store.show_kpi_cache_stats`).
+
+Hodnoty jsou už naformátované řetězce pro KPI boxy.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from children_da.countries import CZ_CODE, EU_CODES, NO_COUNTRY_CODE
+from children_da.cube import filter_cube, query
+from children_da.factors import DASHBOARD_FACTORS, FACTOR_ALIAS
+
+
+KPI_YEAR = 2018
+
+
+def _pct(value, fmt="{:.1f}%") -> str:
+    return fmt.format(value * 100) if not np.isnan(value) else "—"
+
+
+def countries_kpis(cube: pd.DataFrame, corr_stats) -> dict:
+    """Czech / EU / global prevalence, number of countries and top risk factor."""
+    cube_year = filter_cube(cube, {"YEAR": KPI_YEAR})
+    if cube_year.empty:
+        return {"cz": "—", "eu": "—", "global": "—", "n_countries": 0, "top_factor": "—"}
+
+    cz_over = query(cube_year, [], {"COUNTRY_CODE": CZ_CODE})["OVERWEIGHT"].iloc[0]
+    eu_over = query(cube_year, [], {"COUNTRY_CODE": EU_CODES})["OVERWEIGHT"].iloc[0]
+    global_over = query(cube_year, [])["OVERWEIGHT"].iloc[0]
+
+    corr_kpi = corr_stats.ranking({"YEAR": KPI_YEAR}, DASHBOARD_FACTORS)
+    top_factor = "—"
+    if not corr_kpi.empty:
+        top_factor = FACTOR_ALIAS.get(corr_kpi.index[0], corr_kpi.index[0])
+
+    codes = cube_year["COUNTRY_CODE"]
+    return {
+        "cz": _pct(cz_over),
+        "eu": _pct(eu_over),
+        "global": _pct(global_over),
+        # řádky bez země nejsou další země
+        "n_countries": codes[codes != NO_COUNTRY_CODE].nunique(),
+        "top_factor": top_factor,
+    }
+
+
+def gender_kpis(cube: pd.DataFrame) -> dict:
+    """Change since the first wave, girls / boys share, riskiest age and country."""
+    kpis = {f"kpi{i}": "N/A" for i in range(1, 6)}
+    if cube.empty:
+        return kpis
+
+    base_year = sorted(cube["YEAR"].unique().tolist())[0]
+    cube_year = filter_cube(cube, {"YEAR": KPI_YEAR})
+
+    # KPI 1 – změna prevalence mezi prvním rokem a KPI_YEAR
+    overall_detail = query(cube_year, [])["OVERWEIGHT"].iloc[0]
+    overall_base = query(cube, [], {"YEAR": base_year})["OVERWEIGHT"].iloc[0]
+    if pd.notna(overall_base) and pd.notna(overall_detail):
+        kpis["kpi1"] = f"{(overall_detail - overall_base) * 100:+.1f} %"
+
+    if cube_year.empty:
+        return kpis
+
+    # KPI 2 + 3 – podíl OW dívek a chlapců
+    counts = query(cube_year, ["SEX"], {"OVERWEIGHT": 1}).rename(columns={"N": "COUNT"})
+    counts = counts[counts["COUNT"] > 0]
+    if set(counts["SEX"]) == {1, 2}:
+        total = counts["COUNT"].sum()
+        boys_count = counts.loc[counts["SEX"] == 1, "COUNT"].iloc[0]
+        girls_count = counts.loc[counts["SEX"] == 2, "COUNT"].iloc[0]
+        kpis["kpi2"] = f"{girls_count / total * 100:.0f} %"
+        kpis["kpi3"] = f"{boys_count / total * 100:.0f} %"
+
+    # KPI 4 – věk s nejvyšší prevalencí OW
+    age_means = query(cube_year, ["AGE"])[["AGE", "OVERWEIGHT"]]
+    if not age_means.empty:
+        row_max = age_means.sort_values("OVERWEIGHT", ascending=False).iloc[0]
+        kpis["kpi4"] = f"{int(row_max['AGE'])}"
+
+    # KPI 5 – země s nejvyšší prevalencí OW
+    country_means = query(cube_year, ["COUNTRY_CODE"])[["COUNTRY_NAME", "OVERWEIGHT"]]
+    if not country_means.empty:
+        row_max = country_means.sort_values("OVERWEIGHT", ascending=False).iloc[0]
+        kpis["kpi5"] = f"{row_max['COUNTRY_NAME']} ({row_max['OVERWEIGHT'] * 100:.0f} %)"
+
+    return kpis
+
+
+class KpiService:
+    """Thread-safe memo of KPI dicts keyed by (name, dataset version)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name: str, version: str, compute) -> dict:
+        with self._lock:
+            cached = self._values.get(name)
+            if cached is not None and cached[0] == version:
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+        # výpočet mimo zámek; souběžný první výpočet téže verze nevadí
+        value = compute()
+        with self._lock:
+            self._values[name] = (version, value)
+        return value
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "cached": sorted(self._values)}
@@ -0,0 +1,155 @@
+"""
+Trvalá cache AI doporučení z Barometru.
+
+Prompt závisí jen na pohlaví, věku, skóre a devíti odpovědích na
+Likertových škálách, takže hodně rodičů odešle stejný profil – a každý
+z nich dosud čekal na celé volání LLM. Hotové doporučení se proto uloží
+do SQLite souboru vedle datové cache (`data_cache/recommendations.sqlite`)
+pod klíčem
+
+    sha256(model, SYSTEM_PROMPT, user_summary)
+
+po kanonizaci textu (ořezané řádky, bez prázdných), takže odsazení
+v kódu stránky klíč nemění. Soubor sdílí všechny procesy aplikace
+(WAL, každá operace má vlastní spojení).
+
+- záznam starší než RECOMMENDATION_TTL se nevrací a při zápisu se smaže,
+- nad RECOMMENDATION_CACHE_MB se mažou nejdéle nepoužitá doporučení,
+- u každého záznamu je doba, kterou jeho vygenerování trvalo, a počet
+  zásahů – z toho je vidět ušetřená latence.
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+from children_da.data import CACHE_DIR
+
+
+RECOMMENDATION_DB = "recommendations.sqlite"
+RECOMMENDATION_TTL = 7 * 24 * 3600   # s
+RECOMMENDATION_CACHE_MB = 16
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS recommendations (
+    key        TEXT PRIMARY KEY,
+    text       TEXT NOT NULL,
+    created    REAL NOT NULL,
+    used       REAL NOT NULL,
+    latency_ms REAL NOT NULL,
+    hits       INTEGER NOT NULL DEFAULT 0,
+    size       INTEGER NOT NULL
+)
+"""
+
+
+def canonical_key(*parts) -> str:
+    """Hash of prompt parts, ignoring indentation and blank lines."""
+    digest = hashlib.sha256()
+    for part in parts:
+        lines = (line.strip() for line in str(part).splitlines())
+        digest.update("\n".join(line for line in lines if line).encode("utf-8"))
+        digest.update(b"\x1e")
+    return digest.hexdigest()
+
+
+@dataclass(frozen=True)
+class CachedRecommendation:
+    text: str
+    latency_ms: float    # jak dlouho trvalo původní vygenerování
+    created: float
+
+
+class RecommendationCache:
+    """SQLite-backed recommendation cache with TTL and a size cap, shared by processes."""
+
+    def __init__(self, path=CACHE_DIR / RECOMMENDATION_DB, ttl=RECOMMENDATION_TTL,
+                 max_bytes=RECOMMENDATION_CACHE_MB * 2**20):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        # počítadla tohoto procesu; souhrn všech procesů je v tabulce (hits)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # autocommit; zavřením spojení se nedokončená transakce vrátí
+        conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key: str, now=None) -> CachedRecommendation | None:
+        now = time.time() if now is None else now
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT text, latency_ms, created FROM recommendations WHERE key = ? AND created > ?",
+                (key, now - self.ttl),
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE recommendations SET used = ?, hits = hits + 1 WHERE key = ?", (now, key)
+                )
+        self._count(row is not None)
+        return None if row is None else CachedRecommendation(*row)
+
+    def put(self, key: str, text: str, latency_ms: float, now=None):
+        """Store a finished recommendation, then drop expired / least recently used rows."""
+        now = time.time() if now is None else now
+        size = len(text.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR REPLACE INTO recommendations"
+                " (key, text, created, used, latency_ms, hits, size) VALUES (?, ?, ?, ?, ?, 0, ?)",
+                (key, text, now, now, float(latency_ms), size),
+            )
+            conn.execute("DELETE FROM recommendations WHERE created <= ?", (now - self.ttl,))
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM recommendations").fetchone()[0]
+            if total > self.max_bytes:
+                # nejdéle nepoužité, dokud se nevejdeme pod limit
+                stale = []
+                for old_key, old_size in conn.execute(
+                    "SELECT key, size FROM recommendations ORDER BY used"
+                ):
+                    if total <= self.max_bytes:
+                        break
+                    stale.append((old_key,))
+                    total -= old_size
+                conn.executemany("DELETE FROM recommendations WHERE key = ?", stale)
+            conn.execute("COMMIT")
+
+    def stats(self) -> dict:
+        with self._connect() as conn:
+            entries, nbytes, hits, saved_ms = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(hits), 0),"
+                " COALESCE(SUM(hits * latency_ms), 0) FROM recommendations"
+            ).fetchone()
+        with self._lock:
+            return {
+                "entries": entries,
+                "mb": nbytes / 2**20,
+                "hits": self.hits,
+                "misses": self.misses,
+                "total_hits": hits,
+                "saved_s": saved_ms / 1000,
+            }
@@ -0,0 +1,242 @@
+"""
+AI doporučení pro stránku Barometer – streamované, na pozadí, se zrušením.
+
+Stránka volala `client.responses.create(...)` synchronně: skript stál po
+celou dobu odpovědi a uživatel viděl jen „This may take a short while.“
+Teď se odpověď generuje ve vlákně na pozadí se `stream=True` a stránka
+vypisuje kousky textu, jak přicházejí (`st.write_stream(job.chunks())`).
+
+- Klienti OpenAI jsou ve sdíleném omezeném poolu (`ClientPool`, jeden na
+  proces přes `store.get_client_pool`) – víc souběžných dotazů, než je
+  klientů, čeká, dokud se některý neuvolní (nejdéle do timeoutu).
+- Timeout (`OPENAI_TIMEOUT` v secrets, výchozí REQUEST_TIMEOUT s) platí
+  pro síťové čtení i pro celé doporučení; po něm se stream zavře.
+- Rozpracované doporučení patří ke konkrétním odpovědím formuláře
+  (`job.key`). Když se odpovědi změní, `cancel_stale` ho zruší – vlákno
+  zavře HTTP stream a klienta vrátí do poolu.
+"""
+import hashlib
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+
+MODEL = "gpt-5-nano"
+
+# sekundy; přebíjí `OPENAI_TIMEOUT` v secrets
+REQUEST_TIMEOUT = 30.0
+# klientů OpenAI na proces; přebíjí `OPENAI_POOL_SIZE` v secrets
+CLIENT_POOL_SIZE = 4
+
+# jak často čtenář streamu kontroluje deadline
+POLL_INTERVAL = 0.1
+
+SESSION_KEY = "recommendation_job"
+
+_DELTA, _ERROR, _DONE = "delta", "error", "done"
+
+
+class RecommendationError(Exception):
+    """The recommendation could not be generated (API error, timeout, busy pool)."""
+
+
+# ------------------------------------------------------------
+# POOL KLIENTŮ
+# ------------------------------------------------------------
+def openai_client(api_key: str, timeout=REQUEST_TIMEOUT, base_url=None):
+    """OpenAI client with the page's timeout (SDK retries off – the deadline is ours)."""
+    from openai import OpenAI  # jen Barometer potřebuje openai
+
+    return OpenAI(api_key=api_key, base_url=base_url, timeout=timeout, max_retries=0)
+
+
+class ClientPool:
+    """At most `size` clients, created lazily and shared by all sessions."""
+
+    def __init__(self, factory, size=CLIENT_POOL_SIZE):
+        self.factory = factory
+        self.size = int(size)
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def client(self, timeout=REQUEST_TIMEOUT):
+        """Borrow a client; RecommendationError if none is free within `timeout`."""
+        client = self._acquire(timeout)
+        try:
+            yield client
+        finally:
+            self._idle.put(client)
+
+    def _acquire(self, timeout):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+        if create:
+            try:
+                return self.factory()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise RecommendationError("All AI clients are busy, please try again.") from None
+
+    @property
+    def in_use(self) -> int:
+        return self._created - self._idle.qsize()
+
+    def has_capacity(self) -> bool:
+        """A client is free (or can still be created) right now."""
+        return self._created < self.size or not self._idle.empty()
+
+
+# ------------------------------------------------------------
+# JEDNO DOPORUČENÍ
+# ------------------------------------------------------------
+def request_key(*parts) -> str:
+    """Stable key of the form answers a recommendation belongs to."""
+    return hashlib.sha256("\x1f".join(map(str, parts)).encode("utf-8")).hexdigest()[:16]
+
+
+class RecommendationJob:
+    """One streamed `responses.create` call running in a background thread."""
+
+    def __init__(self, pool: ClientPool, key: str, messages: list,
+                 model=MODEL, timeout=REQUEST_TIMEOUT):
+        self.pool = pool
+        self.key = key
+        self.messages = messages
+        self.model = model
+        self.timeout = float(timeout)
+        self.text = ""
+        self.error = None
+        self.done = False
+        # celý stream došel do konce (jen takové doporučení jde do cache)
+        self.completed = False
+        self.elapsed_ms = None
+        self._events = queue.Queue()
+        self._cancelled = threading.Event()
+        self._stream = None
+        self._thread = threading.Thread(target=self._run, name=f"recommendation-{key}", daemon=True)
+        self._started = self._deadline = None
+
+    def start(self) -> "RecommendationJob":
+        self._started = time.monotonic()
+        self._deadline = self._started + self.timeout
+        self._thread.start()
+        return self
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        """Stop the job; an open HTTP stream is closed so the thread exits promptly."""
+        self._cancelled.set()
+        stream = self._stream
+        if stream is not None:
+            try:
+                stream.close()
+            except Exception:  # stream může zavírat i vlákno samo
+                pass
+
+    def _run(self):
+        complete = False
+        try:
+            with self.pool.client(timeout=self.timeout) as client:
+                if self.cancelled:
+                    return
+                self._stream = client.responses.create(
+                    model=self.model, input=self.messages, stream=True, timeout=self.timeout,
+                )
+                try:
+                    for event in self._stream:
+                        if self.cancelled:
+                            break
+                        if event.type == "response.output_text.delta":
+                            self._events.put((_DELTA, event.delta))
+                        elif event.type == "error":
+                            self._events.put((_ERROR, event.message))
+                            break
+                        elif event.type in ("response.failed", "response.incomplete"):
+                            detail = getattr(event.response, "error", None) or event.type
+                            self._events.put((_ERROR, getattr(detail, "message", str(detail))))
+                            break
+                    else:
+                        complete = not self.cancelled
+                finally:
+                    self._stream.close()
+                    self._stream = None
+        except Exception as exc:
+            # po zrušení padá čtení zavřeného streamu – to není chyba
+            if not self.cancelled:
+                self._events.put((_ERROR, str(exc) or type(exc).__name__))
+        finally:
+            self._events.put((_DONE, complete))
+
+    def chunks(self):
+        """
+        Yield text deltas as they arrive (for `st.write_stream`).
+
+        Raises RecommendationError on an API error or when the timeout runs
+        out. If the consumer stops early (Streamlit rerun), the job is cancelled.
+        """
+        finished = False
+        try:
+            while True:
+                remaining = self._deadline - time.monotonic()
+                if remaining <= 0:
+                    raise RecommendationError(
+                        f"The recommendation took longer than {self.timeout:g} s."
+                    )
+                try:
+                    kind, payload = self._events.get(timeout=min(remaining, POLL_INTERVAL))
+                except queue.Empty:
+                    continue
+                if kind == _DELTA:
+                    self.text += payload
+                    yield payload
+                elif kind == _ERROR:
+                    self.error = payload
+                    raise RecommendationError(payload)
+                else:
+                    finished = True
+                    self.completed = payload
+                    return
+        finally:
+            self.done = True
+            self.elapsed_ms = (time.monotonic() - self._started) * 1000
+            if not finished:
+                self.cancel()
+
+
+# ------------------------------------------------------------
+# SESSION
+# ------------------------------------------------------------
+def cancel_stale(state, key=None):
+    """Cancel the session's running job unless it belongs to `key`."""
+    job = state.get(SESSION_KEY)
+    if job is not None and job.key != key:
+        job.cancel()
+        del state[SESSION_KEY]
+
+
+def start_job(state, pool: ClientPool, key: str, messages: list,
+              model=MODEL, timeout=REQUEST_TIMEOUT) -> RecommendationJob:
+    """Start a job for `key` (cancelling any other one) and remember it in `state`."""
+    cancel_stale(state)
+    job = RecommendationJob(pool, key, messages, model=model, timeout=timeout).start()
+    state[SESSION_KEY] = job
+    return job
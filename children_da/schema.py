@@ -0,0 +1,122 @@
+"""
+Kompaktní datové typy pro HBSC tabulku.
+
+Z CSV přichází faktory jako float64 (kvůli NaN) a COUNTRY_NAME jako
+Python objekty. Přitom jde o malé Likertovy kódy (1–10) a ~40 zemí, takže:
+
+- Likertovy faktory a příznaky → Int8 (nullable, NaN = <NA>)
+- SEX, OVERWEIGHT → int8, YEAR → int16, AGE → Int8
+- COUNTRY_NAME → category
+- spojité míry (BMI, váha, výška) → float32
+
+Přehled úspory paměti:
+
+    python -m children_da.schema            # data.csv
+    python -m children_da.schema other.csv
+"""
+import sys
+
+import numpy as np
+import pandas as pd
+
+
+LIKERT_COLUMNS = [
+    "FRUITS", "SOFT_DRINKS", "SWEETS", "VEGETABLES", "FRIEND_TALK",
+    "TIME_EXE", "PHYS_ACT_60", "DRUNK_30",
+    "FAMILY_MEALS_TOGETHER", "BREAKFAST_WEEKDAYS", "BREAKFAST_WEEKEND",
+    "TOOTH_BRUSHING", "STUD_TOGETHER", "BUL_OTHERS", "BUL_BEEN",
+    "FIGHT_YEAR", "INJURED_YEAR", "HEADACHE", "FEEL_LOW",
+    "NERVOUS", "SLEEP_DIF", "DIZZY",
+    "TALK_MOTHER", "TALK_FATHER",
+    "LIKE_SCHOOL", "SCHOOL_PRESSURE", "COMPUTER_NO",
+    "STOMACHACHE", "LIFESAT", "HEALTH", "THINK_BODY", "FAM_CAR",
+    "OWN_BEDROOM_FLAG", "MOTHER_HOME_FLAG", "FATHER_HOME_FLAG", "SOCIAL_MEDIA_FLAG",
+]
+
+FLOAT_COLUMNS = ["BMI", "Z_SCORE", "BODY_WEIGHT", "BODY_HIGHT"]
+
+DTYPES = {
+    "YEAR": "int16",
+    "SEX": "int8",
+    "AGE": "Int8",
+    "OVERWEIGHT": "int8",
+    "COUNTRY_NAME": "category",
+}
+for _col in LIKERT_COLUMNS:
+    DTYPES[_col] = "Int8"
+for _col in FLOAT_COLUMNS:
+    DTYPES[_col] = "float32"
+
+# kódy chybějící odpovědi, které se v datech objevují místo NaN
+MISSING_CODES = {
+    "BUL_BEEN": [999],
+}
+
+
+def _to_small_int(s: pd.Series, dtype: str) -> pd.Series:
+    """Cast to a small (nullable) int; keep float32 if the values do not fit."""
+    info = np.iinfo(dtype.lower())
+    vals = s.dropna()
+    fits = (vals % 1 == 0).all() and (vals.min() >= info.min if len(vals) else True) \
+        and (vals.max() <= info.max if len(vals) else True)
+    if not fits:
+        return s.astype("float32")
+    if dtype[0].islower() and s.isna().any():
+        dtype = dtype.capitalize()
+    return s.astype(dtype)
+
+
+def apply_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Return `df` with the compact schema applied to the columns it has."""
+    df = df.copy(deep=False)
+    for col, codes in MISSING_CODES.items():
+        if col in df.columns:
+            df[col] = df[col].mask(df[col].isin(codes))
+
+    for col, dtype in DTYPES.items():
+        if col not in df.columns or str(df[col].dtype) == dtype:
+            continue
+        if dtype == "category":
+            df[col] = df[col].astype("category")
+        elif dtype == "float32":
+            df[col] = df[col].astype("float32")
+        else:
+            df[col] = _to_small_int(df[col], dtype)
+    return df
+
+
+# ------------------------------------------------------------
+# MEMORY REPORT
+# ------------------------------------------------------------
+def memory_report(before: pd.DataFrame, after: pd.DataFrame) -> pd.DataFrame:
+    """
+    Bytes per row for every column before and after `apply_dtypes`,
+    plus a TOTAL row.
+    """
+    n = max(len(before), 1)
+    b = before.memory_usage(deep=True, index=False)
+    a = after.memory_usage(deep=True, index=False)
+    rep = pd.DataFrame({
+        "dtype_before": before.dtypes.astype(str),
+        "dtype_after": after.dtypes.astype(str),
+        "bytes_per_row_before": b / n,
+        "bytes_per_row_after": a / n,
+    })
+    rep.loc["TOTAL"] = ["", "", b.sum() / n, a.sum() / n]
+    rep["saving"] = 1 - rep["bytes_per_row_after"] / rep["bytes_per_row_before"]
+    return rep
+
+
+if __name__ == "__main__":
+    src = sys.argv[1] if len(sys.argv) > 1 else "data.csv"
+    raw = pd.read_csv(src)
+    compact = apply_dtypes(raw)
+    rep = memory_report(raw, compact)
+    pd.set_option("display.max_rows", None)
+    pd.set_option("display.width", 120)
+    print(rep.to_string(float_format=lambda v: f"{v:.2f}"))
+    total = rep.loc["TOTAL"]
+    print(
+        f"\n{len(raw)} rows: {total['bytes_per_row_before'] * len(raw) / 2**20:.1f} MB"
+        f" -> {total['bytes_per_row_after'] * len(raw) / 2**20:.1f} MB"
+    )
@@ -0,0 +1,326 @@
+"""
+Jeden sdílený dataset pro celý proces.
+
+Dřív si každá session ukládala vlastní DataFrame do `st.session_state.df`
+(a stránka Countries ho při každém rerunu ještě kopírovala). Při desítkách
+souběžných uživatelů to znamenalo desítky kopií stejné tabulky.
+
+Teď se data načtou jednou přes `st.cache_resource` a stránky dostávají
+jen pohledy (`SharedDataset.view()`). Díky copy-on-write se zápis do
+pohledu nikdy nepropíše do sdílených dat.
+"""
+import sys
+import threading
+import time
+import weakref
+from dataclasses import dataclass, field
+
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from children_da.ageindex import AgePrefixIndex
+from children_da.assets import Assets, load_manifest
+from children_da.barometer import load_barometer_model
+from children_da.bootstrap import PrevalenceBootstrap
+from children_da.cluster import SCHOOL_COLUMNS, SchoolClusters, build_school_cells
+from children_da.correlation import CorrelationStats
+from children_da.cube import build_cube, load_cube
+from children_da.data import DASHBOARD_COLUMNS, cache_is_fresh, load_data, read_manifest
+from children_da.factors import DASHBOARD_FACTORS
+from children_da.figcache import FigureCache, PageFigures
+from children_da.geometry import load_geometry
+from children_da.kpi import KpiService, countries_kpis, gender_kpis
+from children_da.reccache import RecommendationCache
+from children_da.recommendation import ClientPool, openai_client
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# pandas >= 3 má copy-on-write vždy zapnuté
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+
+# session, která se neozvala déle, se z přehledu paměti vyřadí
+SESSION_TTL = 3600
+
+
+@dataclass
+class SharedDataset:
+    """Immutable, process-wide HBSC table. Use `view()` to read it."""
+    _df: pd.DataFrame = field(repr=False)
+    version: str
+    nbytes: int
+
+    def view(self, columns=None) -> pd.DataFrame:
+        """Copy-on-write view of the shared table (optionally only `columns`)."""
+        if columns is None:
+            return self._df.copy(deep=False)
+        return self._df[list(columns)]
+
+    @property
+    def n_rows(self) -> int:
+        return len(self._df)
+
+
+def dataset_version() -> str:
+    """
+    Version of the data on disk. Changes when the cache is rebuilt or a
+    new wave is appended (manifest `revision`), so the cached objects below
+    are reloaded on the next rerun.
+    """
+    manifest = read_manifest()
+    if manifest is None:
+        return "csv"
+    return (
+        f"{manifest['schema_version']}-{manifest['size']}-{manifest['mtime_ns']}"
+        f"-r{manifest.get('revision', 0)}"
+    )
+
+
+# Každý objekt je v cache pod verzí dat; max_entries=1 zahodí starou verzi.
+@st.cache_resource(max_entries=1, show_spinner="Loading HBSC data…")
+def _load_dataset(version: str) -> SharedDataset:
+    # opravy dat (BUL_BEEN 999, Belgie/UK) proběhly už při ingestu
+    df = load_data(columns=DASHBOARD_COLUMNS)
+
+    dataset = SharedDataset(
+        _df=df,
+        version=version,
+        nbytes=int(df.memory_usage(deep=True).sum()),
+    )
+    _loaded_datasets()[version] = dataset
+    return dataset
+
+
+@st.cache_resource
+def _loaded_datasets() -> weakref.WeakValueDictionary:
+    # verze → už načtený dataset; přehled paměti se podívá sem, nic nenačítá
+    return weakref.WeakValueDictionary()
+
+
+@st.cache_resource(max_entries=1, show_spinner="Building prevalence cube…")
+def _load_cube(version: str) -> pd.DataFrame:
+    cube = load_cube() if cache_is_fresh() else None
+    if cube is None:
+        cube = build_cube(_load_dataset(version).view())
+    return cube
+
+
+@st.cache_resource(max_entries=1)
+def _load_corr_stats(version: str) -> CorrelationStats:
+    return CorrelationStats(_load_cube(version))
+
+
+@st.cache_resource(max_entries=1)
+def _load_age_index(version: str) -> AgePrefixIndex:
+    return AgePrefixIndex(_load_cube(version))
+
+
+@st.cache_resource(max_entries=1)
+def _load_bootstrap(version: str) -> PrevalenceBootstrap:
+    return PrevalenceBootstrap()
+
+
+@st.cache_resource(max_entries=1, show_spinner="Aggregating schools…")
+def _load_school_clusters(version: str) -> SchoolClusters:
+    # SCHOOL_NO se jinde nepoužívá – načte se jen pro tento jeden groupby;
+    # když v datech chybí, load_data ho vynechá a SE nejsou shlukované
+    cells = build_school_cells(load_data(columns=SCHOOL_COLUMNS + DASHBOARD_FACTORS))
+    names = _load_cube(version).groupby("COUNTRY_CODE", observed=True)["COUNTRY_NAME"].first()
+    return SchoolClusters(cells, country_names=names)
+
+
+def get_dataset() -> SharedDataset:
+    """The process-wide HBSC table for the current data version."""
+    return _load_dataset(dataset_version())
+
+
+def get_cube() -> pd.DataFrame:
+    """Prevalence cube (see cube.py) – from disk if the cache is fresh."""
+    return _load_cube(dataset_version())
+
+
+def get_corr_stats() -> CorrelationStats:
+    """Factor–OVERWEIGHT correlations for any filter (see correlation.py)."""
+    return _load_corr_stats(dataset_version())
+
+
+def get_age_index() -> AgePrefixIndex:
+    """Cube cells for any age range by prefix-sum subtraction (see ageindex.py)."""
+    return _load_age_index(dataset_version())
+
+
+def get_bootstrap() -> PrevalenceBootstrap:
+    """Prevalence CIs, memoised for the current data version (see bootstrap.py)."""
+    return _load_bootstrap(dataset_version())
+
+
+def get_school_clusters() -> SchoolClusters:
+    """School-clustered SEs for prevalences and factor means (see cluster.py)."""
+    return _load_school_clusters(dataset_version())
+
+
+@st.cache_resource(show_spinner="Loading prediction model…")
+def get_barometer_model():
+    """Trained forest for the Barometer (see barometer.py), or None without model.pkl."""
+    return load_barometer_model()
+
+
+@st.cache_resource
+def get_client_pool(api_key: str, size: int, timeout: float) -> ClientPool:
+    """OpenAI clients shared by all Barometer sessions (see recommendation.py)."""
+    return ClientPool(lambda: openai_client(api_key, timeout=timeout), size=size)
+
+
+@st.cache_resource
+def get_recommendation_cache() -> RecommendationCache:
+    """On-disk recommendation cache, shared with other processes (see reccache.py)."""
+    return RecommendationCache()
+
+
+def show_recommendation_cache_stats():
+    """Recommendation cache hits and saved LLM time in the sidebar."""
+    stats = get_recommendation_cache().stats()
+    st.sidebar.caption(
+        f"💬 Recommendation cache  \nHits: {stats['hits']} · generated: {stats['misses']}"
+        f" · {stats['entries']} stored, {stats['saved_s']:.1f} s saved (all workers)"
+    )
+
+
+# ------------------------------------------------------------
+# KPI
+# ------------------------------------------------------------
+_KPI_BUILDERS = {
+    "countries": lambda: countries_kpis(get_cube(), get_corr_stats()),
+    "gender": lambda: gender_kpis(get_cube()),
+}
+
+
+@st.cache_resource
+def get_kpi_service() -> KpiService:
+    return KpiService()
+
+
+def get_kpis(page: str) -> dict:
+    """KPI bar values for `page` ("countries" / "gender"), once per data version."""
+    return get_kpi_service().get(page, dataset_version(), _KPI_BUILDERS[page])
+
+
+def show_kpi_cache_stats():
+    """KPI cache hits / misses in the sidebar."""
+    stats = get_kpi_service().stats()
+    st.sidebar.caption(f"📊 KPI cache  \nHits: {stats['hits']} · computed: {stats['misses']}")
+
+
+# ------------------------------------------------------------
+# GRAFY
+# ------------------------------------------------------------
+@st.cache_resource
+def get_figure_cache() -> FigureCache:
+    return FigureCache()
+
+
+@st.cache_resource
+def get_assets() -> Assets:
+    """Content-hashed static assets (see assets.py)."""
+    return Assets(load_manifest())
+
+
+@st.cache_resource
+def get_map_geometry():
+    """Bundled, trimmed country geometry (see geometry.py), or None if not built."""
+    return load_geometry()
+
+
+def page_figures(page: str, filters: tuple) -> PageFigures:
+    """Shared figure cache of `page` for the current filters and data version."""
+    return PageFigures(get_figure_cache(), page, filters, dataset_version())
+
+
+def show_figure_cache_stats():
+    """Figure cache hits / size in the sidebar."""
+    stats = get_figure_cache().stats()
+    st.sidebar.caption(
+        f"🖼️ Figure cache  \nHits: {stats['hits']} · built: {stats['misses']}"
+        f" · {stats['entries']} figures, {stats['mb']:.1f} MB"
+    )
+
+
+# ------------------------------------------------------------
+# MEMORY REPORT
+# ------------------------------------------------------------
+@st.cache_resource
+def _session_registry() -> dict:
+    return {"lock": threading.Lock(), "sessions": {}}
+
+
+def _session_state_bytes() -> int:
+    total = 0
+    for value in st.session_state.values():
+        if isinstance(value, pd.DataFrame):
+            total += int(value.memory_usage(deep=True).sum())
+        elif isinstance(value, pd.Series):
+            total += int(value.memory_usage(deep=True))
+        elif hasattr(value, "nbytes"):
+            total += int(value.nbytes)
+    return total
+
+
+def _process_rss_bytes():
+    if resource is None:
+        return None
+    # ru_maxrss je v KiB na Linuxu, v bajtech na macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def memory_report() -> dict:
+    """
+    Per-session and process-wide memory numbers (bytes). The shared dataset
+    is only reported once some page has loaded it (None until then).
+    """
+    dataset = _loaded_datasets().get(dataset_version())
+    dataset_bytes = dataset.nbytes if dataset is not None else None
+    registry = _session_registry()
+    ctx = get_script_run_ctx()
+    session_id = ctx.session_id if ctx is not None else "bare"
+
+    session_bytes = _session_state_bytes()
+    now = time.time()
+    with registry["lock"]:
+        sessions = registry["sessions"]
+        sessions[session_id] = (session_bytes, now)
+        for sid in [sid for sid, (_, seen) in sessions.items() if now - seen > SESSION_TTL]:
+            del sessions[sid]
+        sessions_total = sum(b for b, _ in sessions.values())
+        n_sessions = len(sessions)
+
+    return {
+        "shared_dataset": dataset_bytes,
+        "session": session_bytes,
+        "sessions_total": sessions_total,
+        "n_sessions": n_sessions,
+        "total": (dataset_bytes or 0) + sessions_total,
+        "process_peak_rss": _process_rss_bytes(),
+    }
+
+
+def show_memory_usage():
+    """Small memory summary in the sidebar."""
+    rep = memory_report()
+    mb = 1024 * 1024
+    shared = rep["shared_dataset"]
+    lines = [
+        f"Shared dataset: {shared / mb:.1f} MB" if shared is not None else "Shared dataset: not loaded",
+        f"This session: {rep['session'] / mb:.2f} MB",
+        f"All sessions ({rep['n_sessions']}): {rep['sessions_total'] / mb:.2f} MB",
+        f"Total data: {rep['total'] / mb:.1f} MB",
+    ]
+    if rep["process_peak_rss"] is not None:
+        lines.append(f"Process peak RSS: {rep['process_peak_rss'] / mb:.0f} MB")
+    st.sidebar.caption("🧠 Memory  \n" + "  \n".join(lines))
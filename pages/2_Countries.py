@@ -1,86 +1,101 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 
+from children_da.bootstrap import add_ci_bands
+from children_da.colors import HIGHLIGHT_COLOR, diverging_colors
+from children_da.countries import CZ_CODE, EU_CODES, NAME_BY_CODE, country_code
+from children_da.cube import QueryPlan, query
+from children_da.factors import DASHBOARD_FACTORS, FACTOR_ALIAS, normalize_means
+from children_da.store import (
+    get_assets, get_bootstrap, get_corr_stats, get_cube, get_kpis, get_school_clusters,
+    page_figures,
+    show_figure_cache_stats, show_kpi_cache_stats, show_memory_usage,
+)
+
+
+
+
+DEFAULT_COLOR_CZ = "#1f77b4"
+DEFAULT_COLOR_OTHER = "#ff7f0e"
 
 
 
 # ------------------------------------------------------------
-# KONSTANTY: škály a faktory
+# SEKCE S VLASTNÍM WIDGETEM (st.fragment)
 # ------------------------------------------------------------
-factors = [
-    "FRUITS", "SOFT_DRINKS", "SWEETS", "VEGETABLES", "FRIEND_TALK",
-    "TIME_EXE", "PHYS_ACT_60", "DRUNK_30",
-    "FAMILY_MEALS_TOGETHER", "BREAKFAST_WEEKDAYS", "BREAKFAST_WEEKEND",
-    "TOOTH_BRUSHING", "STUD_TOGETHER", "BUL_OTHERS", "BUL_BEEN",
-    "FIGHT_YEAR", "INJURED_YEAR", "HEADACHE", "FEEL_LOW",
-    "NERVOUS", "SLEEP_DIF", "DIZZY",
-    "TALK_MOTHER", "TALK_FATHER",
-    "LIKE_SCHOOL", "SCHOOL_PRESSURE", "COMPUTER_NO"
-]
-
-dictionary = {
-    "HEADACHE": 5, "NERVOUS": 5, "SLEEP_DIF": 5, "FEEL_LOW": 5,
-    "DIZZY": 5, "TALK_FATHER": 5, "TALK_MOTHER": 5,
-    "FAMILY_MEALS_TOGETHER": 6, "TIME_EXE": 7,
-    "TOOTH_BRUSHING": 5, "LIKE_SCHOOL": 4, "STUD_TOGETHER": 5,
-    "FRUITS": 7, "SOFT_DRINKS": 7, "SWEETS": 7, "VEGETABLES": 7,
-    "FRIEND_TALK": 7, "PHYS_ACT_60": 7, "DRUNK_30": 7,
-    "BREAKFAST_WEEKDAYS": 6, "BREAKFAST_WEEKEND": 3,
-    "BUL_OTHERS": 5, "BUL_BEEN": 5,
-    "FIGHT_YEAR": 5, "INJURED_YEAR": 5,
-    "SCHOOL_PRESSURE": 4, "COMPUTER_NO": 4
-}
-
-reverse_scales = {
-    "HEADACHE", "NERVOUS", "SLEEP_DIF", "DIZZY", "FEEL_LOW",
-    "BREAKFAST_WEEKDAYS", "BREAKFAST_WEEKEND",
-    "FRIEND_TALK", "FRUITS", "PHYS_ACT_60", "VEGETABLES"
-} 
-
-factor_alias = {
-    "FRUITS": "No fruit",
-    "SOFT_DRINKS": "Soft drinks",
-    "SWEETS": "Sweets",
-    "VEGETABLES": "No vegetables",
-    "FRIEND_TALK": "No friends talk",
-    "TIME_EXE": "No exercise",
-    "PHYS_ACT_60": "Below 60 min/day",
-    "DRUNK_30": "Alcohol",
-    "FAMILY_MEALS_TOGETHER": "No family meals",
-    "BREAKFAST_WEEKDAYS": "No breakfast (weekdays)",
-    "BREAKFAST_WEEKEND": "No breakfast (weekend)",
-    "TOOTH_BRUSHING": "Poor teeth care",
-    "STUD_TOGETHER": "No friend time",
-    "BUL_OTHERS": "Bullies others",
-    "BUL_BEEN": "Been bullied",
-    "FIGHT_YEAR": "Often fights",
-    "INJURED_YEAR": "Often injured",
-    "HEADACHE": "Frequent headaches",
-    "FEEL_LOW": "Feels low",
-    "NERVOUS": "Feels nervous",
-    "SLEEP_DIF": "Sleep problems",
-    "DIZZY": "Feels dizzy",
-    "TALK_MOTHER": "No mom talk",
-    "TALK_FATHER": "No dad talk",
-    "LIKE_SCHOOL": "Dislikes school",
-    "SCHOOL_PRESSURE": "High school pressure",
-    "COMPUTER_NO": "Computer/Gaming use"
-}
+# Slider „Number of factors“ mění jen graf TOP X, proto je sekce fragment:
+# posun slideru přepočítá a pošle jen tento graf, ne celou stránku.
+# Parametry = filtry stránky, na kterých sekce závisí (země, pohlaví);
+# jejich změna spustí celý rerun a fragment se vykreslí s novými hodnotami.
+@st.fragment
+def top_x_section(cube, figures, ranking, where, color_map, all_countries_view):
+    top_n = st.slider("Number of factors:", 5, 15, 15)   # ← MAX = 15
 
+    fig_topX = figures.get("topX", extra=(top_n,))
+    if fig_topX is None:
+        fig_topX = _build_top_x(cube, ranking, where, color_map, all_countries_view, top_n)
+        figures.put("topX", fig_topX, extra=(top_n,))
 
-DEFAULT_COLOR_CZ = "#1f77b4"
-DEFAULT_COLOR_OTHER = "#ff7f0e"
+    st.plotly_chart(fig_topX, width='stretch', config={})
+
+
+def _build_top_x(cube, ranking, where, color_map, all_countries_view, top_n):
+    remaining = ranking[5:]
+    topX = remaining[:top_n]
+
+    df_tX = normalize_means(query(cube, ["COUNTRY_CODE"], where=where, factors=topX), topX)[
+        ["COUNTRY_NAME"] + topX
+    ]
+
+    df_tX_long = df_tX.melt(
+        id_vars="COUNTRY_NAME",
+        value_vars=topX,
+        var_name="FEATURE",
+        value_name="VALUE"
+    )
+
+    df_tX_long["FEATURE"] = df_tX_long["FEATURE"].map(lambda x: FACTOR_ALIAS.get(x, x))
+
+    fig_topX = px.bar(
+        df_tX_long,
+        x="FEATURE", y="VALUE",
+        color="COUNTRY_NAME",
+        barmode="group",
+        color_discrete_map=color_map,
+        title=f"TOP {top_n} Additional Factors (normalized)"
+    )
+
+    # ⭐ ZMĚNA VELIKOSTI NÁZVU
+    fig_topX.update_layout(title_font=dict(size=24))
+
+    # ⭐ STEJNÁ LOGIKA LEGENDY — KOPIE Z PŘEDCHOZÍCH GRAFŮ
+    if all_countries_view:
+        fig_topX.update_layout(
+            legend=dict(
+                title="Country",
+                orientation="v",
+                x=1.20,
+                y=1,
+                xanchor="left",
+                yanchor="top"
+            )
+        )
+    else:
+        fig_topX.update_layout(
+            margin=dict(t=110),
+            legend=dict(
+                title="Country",
+                orientation="h",
+                x=0.70,
+                y=1.18,
+                xanchor="center",
+                yanchor="bottom"
+            )
+        )
 
-eu_list = [
-    "Austria", "Belgium", "Bulgaria", "Croatia", "Czech Republic",
-    "Denmark", "Estonia", "Finland", "France", "Germany", "Greece",
-    "Hungary", "Ireland", "Italy", "Latvia", "Lithuania", "Malta",
-    "Netherlands", "Poland", "Portugal", "Romania", "Slovakia",
-    "Slovenia", "Spain", "Sweden", "United Kingdom"
-]
+    return fig_topX
 
 
 # ------------------------------------------------------------
@@ -90,7 +105,7 @@ def show_lenka_page():
 
     st.set_page_config(page_title="Analýza dětské obezity", layout="wide")
 
-   # ⭐ FUNKCE NA ZVĚTŠENÍ TITULKU GRAFŮ
+   # ⭐ FUNKCE NA ZVĚTŠENÍ TITULKU GRAFŮ (před uložením do cache – graf z cache se neupravuje)
     def title24(fig):
         fig.update_layout(title_font=dict(size=24))
         return fig
@@ -98,32 +113,12 @@ def show_lenka_page():
     # ------------------------------------------------------------
     # LOAD DATA
     # ------------------------------------------------------------
-    if "df" not in st.session_state:
-        df = pd.read_csv("data.csv")
-        st.session_state.df = df
-    else:
-        df = st.session_state.df.copy()
-
-    # ---- ALWAYS RUN NORMALIZATION (Belgium + UK) ----
-    df["COUNTRY_NAME"] = df["COUNTRY_NAME"].replace({
-        "Belgium (Flemish)": "Belgium",
-        "Belgium (French)": "Belgium"
-    })
-
-    uk_map = {
-        "England": "United Kingdom",
-        "Scotland": "United Kingdom",
-        "Wales": "United Kingdom",
-        "Northern Ireland": "United Kingdom",
-        "Great Britain": "United Kingdom",
-        "UK (England)": "United Kingdom",
-        "UK (Wales)": "United Kingdom",
-        "UK (Scotland)": "United Kingdom"
-    }
-    df["COUNTRY_NAME"] = df["COUNTRY_NAME"].replace(uk_map)
-
-    # ---- APPLY CORRECTIONS ----
-    df.loc[df["BUL_BEEN"] == 999, "BUL_BEEN"] = np.nan
+    # agregace (průměry OVERWEIGHT a faktorů) se skládají z předpočítané kostky,
+    # korelace s OVERWEIGHT z jejích součtů (children_da/correlation.py)
+    cube = get_cube()
+    corr_stats = get_corr_stats()
+    bootstrap = get_bootstrap()
+    show_memory_usage()
 
 
 
@@ -170,34 +165,11 @@ def show_lenka_page():
     # ============================================================
     # KPI – TOP BAR (ENGLISH + ALIASES + VALUES IN %)
     # ============================================================
-    df_2018 = df[df["YEAR"] == 2018].copy()
-    if df_2018.empty:
-        cz_over = eu_over = global_over = np.nan
-        n_countries_total = 0
-        top_factor_pretty = "—"
-    else:
-        cz_over = df_2018[df_2018["COUNTRY_NAME"] == "Czech Republic"]["OVERWEIGHT"].mean()
-        eu_over = df_2018[df_2018["COUNTRY_NAME"].isin(eu_list)]["OVERWEIGHT"].mean()
-        global_over = df_2018["OVERWEIGHT"].mean()
-        n_countries_total = df_2018["COUNTRY_NAME"].nunique()
-
-        df_norm_kpi = df_2018.copy()
-        for f in factors:
-            maxv = dictionary[f]
-            df_norm_kpi[f] = (maxv + 1 - df_norm_kpi[f]) / maxv if f in reverse_scales else df_norm_kpi[f] / maxv
-
-        corr_kpi = (
-            df_norm_kpi[factors + ["OVERWEIGHT"]]
-            .corr()["OVERWEIGHT"]
-            .drop("OVERWEIGHT")
-            .abs()
-            .sort_values(ascending=False)
-        )
-        if not corr_kpi.empty:
-            top_factor_code = corr_kpi.index[0]
-            top_factor_pretty = factor_alias.get(top_factor_code, top_factor_code)
-        else:
-            top_factor_pretty = "—"
+    # KPI nezávisí na filtrech → jednou za verzi dat (children_da/kpi.py)
+    kpis = get_kpis("countries")
+    assets = get_assets()
+    show_kpi_cache_stats()
+    show_figure_cache_stats()
     # ============================================================
     # KPI BOXES
     # ============================================================
@@ -205,12 +177,11 @@ def show_lenka_page():
     k1, k2, k3, k4, k5 = st.columns(5)
 
     with k1:
-        val = f"{cz_over * 100:.1f}%" if not np.isnan(cz_over) else "—"
+        val = kpis["cz"]
         st.markdown(f"""
         <div class="kpi-box">
             <div class="kpi-label">
-                <img src="https://flagcdn.com/w20/cz.png"
-                    style="height:18px; vertical-align:middle; margin-right:6px;">
+                {assets.flag_img("cz")}
                 Overweight in Czechia
             </div>
             <div class="kpi-value">{val}</div>
@@ -218,12 +189,11 @@ def show_lenka_page():
         """, unsafe_allow_html=True)
 
     with k2:
-        val = f"{eu_over * 100:.1f}%" if not np.isnan(eu_over) else "—"
+        val = kpis["eu"]
         st.markdown(f"""
         <div class="kpi-box">
             <div class="kpi-label">
-                <img src="https://flagcdn.com/w20/eu.png"
-                    style="height:18px; vertical-align:middle; margin-right:6px;">
+                {assets.flag_img("eu")}
                 EU Average
             </div>
             <div class="kpi-value">{val}</div>
@@ -231,7 +201,7 @@ def show_lenka_page():
         """, unsafe_allow_html=True)
 
     with k3:
-        val = f"{global_over * 100:.1f}%" if not np.isnan(global_over) else "—"
+        val = kpis["global"]
         st.markdown(f"""
         <div class="kpi-box">
             <div class="kpi-label">🌍 Global Average</div>
@@ -243,7 +213,7 @@ def show_lenka_page():
         st.markdown(f"""
         <div class="kpi-box">
             <div class="kpi-label">🌐 Number of Countries (2018)</div>
-            <div class="kpi-value">{n_countries_total}</div>
+            <div class="kpi-value">{kpis["n_countries"]}</div>
         </div>
         """, unsafe_allow_html=True)
 
@@ -251,7 +221,7 @@ def show_lenka_page():
         st.markdown(f"""
         <div class="kpi-box">
             <div class="kpi-label">🔥 Top Risk Factor</div>
-            <div class="kpi-value">{top_factor_pretty}</div>
+            <div class="kpi-value">{kpis["top_factor"]}</div>
         </div>
         """, unsafe_allow_html=True)
 
@@ -263,7 +233,7 @@ def show_lenka_page():
     # ------------------------------------------------------------
     row1_col1, row1_col2 = st.columns([3, 1])
     default_country = "Czech Republic"
-    all_countries = sorted(df["COUNTRY_NAME"].unique())
+    all_countries = sorted(cube["COUNTRY_NAME"].dropna().unique())
     options = ["All countries"] + all_countries
 
     with row1_col2:
@@ -271,35 +241,72 @@ def show_lenka_page():
         selected_country = st.selectbox("Select country:", options, index=0)
         sex_choice = st.radio("Gender:", ["Both", "Girls", "Boys"], horizontal=True)
 
-    df_current = df.copy()
+    sex_where = {}
     if sex_choice == "Girls":
-        df_current = df_current[df_current["SEX"] == 2]
+        sex_where = {"SEX": 2}
     elif sex_choice == "Boys":
-        df_current = df_current[df_current["SEX"] == 1]
-
-    df_trend = df_current[(df_current["YEAR"] >= 2002) & (df_current["YEAR"] <= 2018)].copy()
+        sex_where = {"SEX": 1}
 
     if selected_country == "All countries":
         compare_countries = all_countries
     else:
         compare_countries = [default_country, selected_country]
+    compare_codes = [country_code(c) for c in compare_countries]
 
     color_map = {
         "Czech Republic": DEFAULT_COLOR_CZ,
         selected_country: DEFAULT_COLOR_OTHER
     }
 
-    df_line = (
-        df_trend[df_trend["COUNTRY_NAME"].isin(compare_countries)]
-        .groupby(["YEAR", "COUNTRY_NAME"], as_index=False)["OVERWEIGHT"]
-        .mean()
-    )
+    corr_vals = corr_stats.ranking({**sex_where, "YEAR": 2018}, DASHBOARD_FACTORS)
+    top5 = corr_vals.head(5).index.tolist()
+
+    # hotové grafy pro tento stav filtrů (sdílené mezi sessions, figcache.py)
+    figures = page_figures("countries", (selected_country, sex_choice))
+    fig_line = figures.get("line")
+    fig_top5 = figures.get("top5")
+    fig_age = figures.get("age")
+    fig_dev = figures.get("dev")
+    fig_dumbbell = figures.get("dumbbell")
+
+    # ------------------------------------------------------------
+    # AGREGACE PRO GRAFY – deklarované předem, každá proběhne jednou
+    # ------------------------------------------------------------
+    if any(fig is None for fig in (fig_line, fig_top5, fig_age, fig_dev, fig_dumbbell)):
+        eu_where = {**sex_where, "YEAR": 2018, "COUNTRY_CODE": EU_CODES}
+        line_where = {**sex_where, "YEAR": (2002, 2018), "COUNTRY_CODE": compare_codes}
+        eu_gender_where = {"YEAR": 2018, "COUNTRY_CODE": EU_CODES}
+
+        plan = QueryPlan(cube)
+        plan.add("line", ["YEAR", "COUNTRY_CODE"], line_where)
+        plan.add("top5", ["COUNTRY_CODE"],
+                 {**sex_where, "YEAR": 2018, "COUNTRY_CODE": compare_codes}, factors=top5)
+        plan.add("age", ["AGE", "COUNTRY_CODE"], {**sex_where, "COUNTRY_CODE": compare_codes})
+        plan.add("eu_avg", [], eu_where)
+        plan.add("eu_dev", ["COUNTRY_CODE"], eu_where)
+        plan.add("eu_gender", ["COUNTRY_CODE", "SEX"], eu_gender_where)
+        results = plan.run()
+
+        # SE se shlukováním podle škol do tooltipů (children_da/cluster.py)
+        clusters = get_school_clusters()
+
+    if fig_line is None:
+        # 95% CI z bootstrapu nad počty kostky (children_da/bootstrap.py)
+        line_se = clusters.prevalence(["YEAR", "COUNTRY_CODE"], line_where)
+        df_line = bootstrap.add_ci(results["line"]).merge(
+            line_se[["YEAR", "COUNTRY_CODE", "OVERWEIGHT_SE", "N_SCHOOLS"]],
+            on=["YEAR", "COUNTRY_CODE"], how="left",
+        )[
+            ["YEAR", "COUNTRY_NAME", "OVERWEIGHT", "OVERWEIGHT_LO", "OVERWEIGHT_HI",
+             "OVERWEIGHT_SE", "N_SCHOOLS"]
+        ]
 
-    with row1_col1:
         fig_line = px.line(
             df_line, x="YEAR", y="OVERWEIGHT",
             color="COUNTRY_NAME", markers=True,
             color_discrete_map=color_map,
+            hover_data={"OVERWEIGHT_SE": ":.4f", "N_SCHOOLS": True},
+            labels={"OVERWEIGHT_SE": "SE (school-clustered)", "N_SCHOOLS": "Schools"},
             title="Trend of Childhood Overweight (2002-2018)"
         )
         fig_line.update_layout(
@@ -314,389 +321,318 @@ def show_lenka_page():
                 font=dict(size=12)
             )
         )
+        add_ci_bands(fig_line, df_line, x="YEAR", group="COUNTRY_NAME")
+        figures.put("line", title24(fig_line))
 
-        st.plotly_chart(title24(fig_line), width='stretch', config={})
+    with row1_col1:
+        st.plotly_chart(fig_line, width='stretch', config={})
 
 
     # ------------------------------------------------------------
     # GRAF 2 – TOP 5 (aliasy doplněny)
     # ------------------------------------------------------------
-    df_current_2018 = df_current[df_current["YEAR"] == 2018].copy()
-
-    df_norm = df_current_2018.copy()
-    for f in factors:
-        maxv = dictionary[f]
-        df_norm[f] = (maxv + 1 - df_norm[f]) / maxv if f in reverse_scales else df_norm[f] / maxv
-
-    corr_vals = (
-        df_norm[factors + ["OVERWEIGHT"]]
-        .corr()["OVERWEIGHT"]
-        .drop("OVERWEIGHT")
-        .abs()
-        .sort_values(ascending=False)
-    )
-
-    top5 = corr_vals.head(5).index.tolist()
-
-    df_t5 = (
-        df_norm[df_norm["COUNTRY_NAME"].isin(compare_countries)]
-        .groupby("COUNTRY_NAME")[top5]
-        .mean()
-        .reset_index()
-    )
-
-    df_t5_long = df_t5.melt(
-        id_vars="COUNTRY_NAME",
-        value_vars=top5,
-        var_name="FEATURE",
-        value_name="VALUE"
-    )
+    if fig_top5 is None:
+        df_t5 = normalize_means(results["top5"], top5)[["COUNTRY_NAME"] + top5]
+
+        df_t5_long = df_t5.melt(
+            id_vars="COUNTRY_NAME",
+            value_vars=top5,
+            var_name="FEATURE",
+            value_name="VALUE"
+        )
 
-    df_t5_long["FEATURE"] = df_t5_long["FEATURE"].map(lambda x: factor_alias.get(x, x))
+        df_t5_long["FEATURE"] = df_t5_long["FEATURE"].map(lambda x: FACTOR_ALIAS.get(x, x))
 
-    fig_top5 = px.bar(
-        df_t5_long,
-        x="FEATURE", y="VALUE",
-        color="COUNTRY_NAME",
-        barmode="group",
-        color_discrete_map=color_map,
-        title="TOP 5 Factors"
-    )
+        fig_top5 = px.bar(
+            df_t5_long,
+            x="FEATURE", y="VALUE",
+            color="COUNTRY_NAME",
+            barmode="group",
+            color_discrete_map=color_map,
+            title="TOP 5 Factors"
+        )
 
-    # smaller gaps between bars
-    fig_top5.update_layout(
-        bargap=0.05,
-        bargroupgap=0.05
-    )
+        # smaller gaps between bars
+        fig_top5.update_layout(
+            bargap=0.05,
+            bargroupgap=0.05
+        )
 
-    fig_top5.update_layout(
-        margin=dict(r=80)   # můžeš dát 60–120 podle toho, jak moc chceš místa
-    )
+        fig_top5.update_layout(
+            margin=dict(r=80)   # můžeš dát 60–120 podle toho, jak moc chceš místa
+        )
 
-    # ------------------------------------------------------------
-    # ÚPRAVA POPISKŮ OS – ZVĚTŠENÍ + TUČNÉ
-    # ------------------------------------------------------------
-    fig_top5.update_xaxes(
-        title_text="Factors",
-        title_font=dict(size=16, family="Arial Black"),
-        tickfont=dict(size=12, family="Arial Black")
-    )
+        # ------------------------------------------------------------
+        # ÚPRAVA POPISKŮ OS – ZVĚTŠENÍ + TUČNÉ
+        # ------------------------------------------------------------
+        fig_top5.update_xaxes(
+            title_text="Factors",
+            title_font=dict(size=16, family="Arial Black"),
+            tickfont=dict(size=12, family="Arial Black")
+        )
 
-    fig_top5.update_yaxes(
-        title_text="Score (normalized)",
-        title_font=dict(size=16, family="Arial Black"),
-        tickfont=dict(size=12, family="Arial Black")
-    )
+        fig_top5.update_yaxes(
+            title_text="Score (normalized)",
+            title_font=dict(size=16, family="Arial Black"),
+            tickfont=dict(size=12, family="Arial Black")
+        )
 
-    # ------------------------------------------------------------
-    # Legenda – podmíněné umístění
-    # ------------------------------------------------------------
-    if selected_country == "All countries":
-        # původní legenda vpravo
-        fig_top5.update_layout(
-            legend=dict(
-                title="Country",
-                orientation="v",
-                x=1.20,
-                y=1,
-                xanchor="left",
-                yanchor="top"
+        # ------------------------------------------------------------
+        # Legenda – podmíněné umístění
+        # ------------------------------------------------------------
+        if selected_country == "All countries":
+            # původní legenda vpravo
+            fig_top5.update_layout(
+                legend=dict(
+                    title="Country",
+                    orientation="v",
+                    x=1.20,
+                    y=1,
+                    xanchor="left",
+                    yanchor="top"
+                )
             )
-        )
-    else:
-        # legenda nahoře uprostřed
-        fig_top5.update_layout(
-            margin=dict(t=90),
-            legend=dict(
-                title="Country",
-                orientation="h",
-                x=0.70,
-                y=1.18,
-                xanchor="center",
-                yanchor="bottom"
+        else:
+            # legenda nahoře uprostřed
+            fig_top5.update_layout(
+                margin=dict(t=90),
+                legend=dict(
+                    title="Country",
+                    orientation="h",
+                    x=0.70,
+                    y=1.18,
+                    xanchor="center",
+                    yanchor="bottom"
+                )
             )
-        )
+        figures.put("top5", title24(fig_top5))
 
 
     # ------------------------------------------------------------
     # GRAF 3 – Overweight podle věku
     # ------------------------------------------------------------
-    df_age_plot = (
-        df_current[df_current["COUNTRY_NAME"].isin(compare_countries)]
-        .groupby(["AGE", "COUNTRY_NAME"], as_index=False)["OVERWEIGHT"]
-        .mean()
-    )
-
-    fig_age = px.line(
-        df_age_plot,
-        x="AGE", y="OVERWEIGHT",
-        color="COUNTRY_NAME",
-        markers=True,
-        color_discrete_map=color_map,
-        title="Overweight by Age"
-    )
-    # Legenda – podmíněné umístění (stejně jako u TOP5)
-    if selected_country == "All countries":
-        fig_age.update_layout(
-            legend=dict(
-                title="Country",      # ← vždy stejný název legendy
-                orientation="v",
-                x=1.02,
-                y=1,
-                xanchor="left",
-                yanchor="top"
-            )
+    if fig_age is None:
+        df_age_plot = bootstrap.add_ci(results["age"])[
+            ["AGE", "COUNTRY_NAME", "OVERWEIGHT", "OVERWEIGHT_LO", "OVERWEIGHT_HI"]
+        ]
+
+        fig_age = px.line(
+            df_age_plot,
+            x="AGE", y="OVERWEIGHT",
+            color="COUNTRY_NAME",
+            markers=True,
+            color_discrete_map=color_map,
+            title="Overweight by Age"
         )
-    else:
-        fig_age.update_layout(
-            margin=dict(t=90),
-            legend=dict(
-                title="Country",      # ← stejně i zde
-                orientation="h",
-                x=0.5,
-                y=1.18,
-                xanchor="center",
-                yanchor="bottom"
+        # Legenda – podmíněné umístění (stejně jako u TOP5)
+        if selected_country == "All countries":
+            fig_age.update_layout(
+                legend=dict(
+                    title="Country",      # ← vždy stejný název legendy
+                    orientation="v",
+                    x=1.02,
+                    y=1,
+                    xanchor="left",
+                    yanchor="top"
+                )
             )
-        )
+        else:
+            fig_age.update_layout(
+                margin=dict(t=90),
+                legend=dict(
+                    title="Country",      # ← stejně i zde
+                    orientation="h",
+                    x=0.5,
+                    y=1.18,
+                    xanchor="center",
+                    yanchor="bottom"
+                )
+            )
+        add_ci_bands(fig_age, df_age_plot, x="AGE", group="COUNTRY_NAME")
+        figures.put("age", title24(fig_age))
 
     col_g2, col_g3 = st.columns(2)
 
     with col_g2:
-        st.plotly_chart(title24(fig_top5), width='stretch', config={})
+        st.plotly_chart(fig_top5, width='stretch', config={})
 
     with col_g3:
-        st.plotly_chart(title24(fig_age), width='stretch', config={})
+        st.plotly_chart(fig_age, width='stretch', config={})
 
 
 
     # ------------------------------------------------------------
     # GRAF 4 – TOP X (aliasy doplněny)
     # ------------------------------------------------------------
-    top_n = st.slider("Number of factors:", 5, 15, 15)   # ← MAX = 15
-
-    remaining = corr_vals.index.tolist()[5:]
-    topX = remaining[:top_n]
-
-    df_tX = (
-        df_norm[df_norm["COUNTRY_NAME"].isin(compare_countries)]
-        .groupby("COUNTRY_NAME")[topX]
-        .mean()
-        .reset_index()
+    top_x_section(
+        cube,
+        figures,
+        ranking=corr_vals.index.tolist(),
+        where={**sex_where, "YEAR": 2018, "COUNTRY_CODE": compare_codes},
+        color_map=color_map,
+        all_countries_view=selected_country == "All countries",
     )
 
-    df_tX_long = df_tX.melt(
-        id_vars="COUNTRY_NAME",
-        value_vars=topX,
-        var_name="FEATURE",
-        value_name="VALUE"
-    )
-
-    df_tX_long["FEATURE"] = df_tX_long["FEATURE"].map(lambda x: factor_alias.get(x, x))
-
-    fig_topX = px.bar(
-        df_tX_long,
-        x="FEATURE", y="VALUE",
-        color="COUNTRY_NAME",
-        barmode="group",
-        color_discrete_map=color_map,
-        title=f"TOP {top_n} Additional Factors (normalized)"
-    )
-
-    # ⭐ ZMĚNA VELIKOSTI NÁZVU
-    fig_topX.update_layout(title_font=dict(size=24))
-
-    # ⭐ STEJNÁ LOGIKA LEGENDY — KOPIE Z PŘEDCHOZÍCH GRAFŮ
-    if selected_country == "All countries":
-        fig_topX.update_layout(
-            legend=dict(
-                title="Country",
-                orientation="v",
-                x=1.20,
-                y=1,
-                xanchor="left",
-                yanchor="top"
-            )
-        )
-    else:
-        fig_topX.update_layout(
-            margin=dict(t=110),
-            legend=dict(
-                title="Country",
-                orientation="h",
-                x=0.70,
-                y=1.18,
-                xanchor="center",
-                yanchor="bottom"
-            )
-        )
-
-    st.plotly_chart(fig_topX, width='stretch', config={})
-
     # ------------------------------------------------------------
-    # SPODNÍ GRAFY – upravené (výraznější barvy, zvýraznění ČR)
+    # SPODNÍ GRAFY – EU deviation + dumbbell (finální verze)
     # ------------------------------------------------------------
 
-    df_eu_2018 = df[df["YEAR"] == 2018].copy()
-    if sex_choice == "Girls":
-        df_eu_2018 = df_eu_2018[df_eu_2018["SEX"] == 2]
-    elif sex_choice == "Boys":
-        df_eu_2018 = df_eu_2018[df_eu_2018["SEX"] == 1]
-
-    df_eu_only = df_eu_2018[df_eu_2018["COUNTRY_NAME"].isin(eu_list)]
-    eu_avg = df_eu_only["OVERWEIGHT"].mean()
+    # === Připrava EU 2018 dat podle pohlaví ===
+    if fig_dev is None:
+        eu_avg = results["eu_avg"]["OVERWEIGHT"].iloc[0]
+
+        # ============================================================
+        #                  GRAF 1 – EU deviation
+        # ============================================================
+
+        # vypočítat deviation a RESETOVAT INDEX → klíč k opravení problému
+        dev_se = clusters.prevalence(["COUNTRY_CODE"], eu_where)
+        df_dev = bootstrap.add_ci(results["eu_dev"]).merge(
+            dev_se[["COUNTRY_CODE", "OVERWEIGHT_SE", "N_SCHOOLS"]], on="COUNTRY_CODE", how="left",
+        )[
+            ["COUNTRY_CODE", "COUNTRY_NAME", "OVERWEIGHT", "OVERWEIGHT_LO", "OVERWEIGHT_HI",
+             "OVERWEIGHT_SE", "N_SCHOOLS"]
+        ]
+        df_dev["DEVIATION"] = df_dev["OVERWEIGHT"] - eu_avg
+        df_dev = df_dev.sort_values("DEVIATION").reset_index(drop=True)
+
+        # 1:1 barvy podle pořadí v df_dev (škála DEVIATION_SCALE),
+        # Czech Republic zvýrazněná podle kódu země
+        colors = diverging_colors(
+            df_dev["DEVIATION"],
+            codes=df_dev["COUNTRY_CODE"],
+            highlight={CZ_CODE: HIGHLIGHT_COLOR},
+        )
 
-    df_dev = (
-        df_eu_only.groupby("COUNTRY_NAME", as_index=False)["OVERWEIGHT"]
-        .mean()
-    )
-    df_dev["DEVIATION"] = df_dev["OVERWEIGHT"] - eu_avg
-    df_dev = df_dev.sort_values("DEVIATION")
+        # vytvoření grafu
+        fig_dev = go.Figure()
+        fig_dev.add_trace(go.Bar(
+            x=df_dev["DEVIATION"],
+            y=df_dev["COUNTRY_NAME"],
+            orientation="h",
+            marker=dict(
+                color=colors,
+                line=dict(color="black", width=1.6)
+            ),
+            # 95% CI prevalence země (průměr EU bereme jako pevný)
+            error_x=dict(
+                type="data",
+                array=df_dev["OVERWEIGHT_HI"] - df_dev["OVERWEIGHT"],
+                arrayminus=df_dev["OVERWEIGHT"] - df_dev["OVERWEIGHT_LO"],
+                color="#334155",
+                thickness=1.2,
+                width=3,
+            ),
+            customdata=df_dev[["OVERWEIGHT", "OVERWEIGHT_SE", "N_SCHOOLS"]],
+            hovertemplate=(
+                "<b>%{y}</b><br>Deviation: %{x:+.3f}<br>"
+                "Overweight: %{customdata[0]:.3f}<br>"
+                "SE (school-clustered): %{customdata[1]:.4f}<br>"
+                "Schools: %{customdata[2]}<extra></extra>"
+            ),
+        ))
 
+        fig_dev.add_vline(x=0, line_width=2, line_color="black")
 
-    # ------------------------------------------------------------
-    # SPODNÍ GRAFY – EU deviation + dumbbell (finální verze)
-    # ------------------------------------------------------------
+        fig_dev.update_layout(
+            title="Deviation from EU Average (2018)",
+            height=650,
+            margin=dict(l=40, r=40, t=60, b=40),
+            title_x=0.0,
+            yaxis=dict(tickfont=dict(size=16, family="Arial Black")),
+            xaxis=dict(tickfont=dict(size=13))
+        )
+        figures.put("dev", title24(fig_dev))
 
-    # === Připrava EU 2018 dat podle pohlaví ===
-    df_eu_2018 = df[df["YEAR"] == 2018].copy()
-    if sex_choice == "Girls":
-        df_eu_2018 = df_eu_2018[df_eu_2018["SEX"] == 2]
-    elif sex_choice == "Boys":
-        df_eu_2018 = df_eu_2018[df_eu_2018["SEX"] == 1]
 
-    df_eu_only = df_eu_2018[df_eu_2018["COUNTRY_NAME"].isin(eu_list)]
-    eu_avg = df_eu_only["OVERWEIGHT"].mean()
 
     # ============================================================
-    #                  GRAF 1 – EU deviation
+    #            GRAF 2 – Dumbbell (Girls vs Boys)
     # ============================================================
 
-    # vypočítat deviation a RESETOVAT INDEX → klíč k opravení problému
-    df_dev = (
-        df_eu_only.groupby("COUNTRY_NAME", as_index=False)["OVERWEIGHT"].mean()
-    )
-    df_dev["DEVIATION"] = df_dev["OVERWEIGHT"] - eu_avg
-    df_dev = df_dev.sort_values("DEVIATION").reset_index(drop=True)
-
-    # výrazná škála – nejhorší hodnoty do vínové
-    color_scale = [
-        [0.00, "#08306b"],   # tmavá modrá
-        [0.35, "#2171b5"], 
-        [0.50, "#f7f7f7"],   # bílá
-        [0.70, "#cb181d"],   # červená
-        [1.00, "#4a001f"]    # tmavě vínová
-    ]
-
-    # normalizace
-    norm_vals = (df_dev["DEVIATION"] - df_dev["DEVIATION"].min()) / \
-                (df_dev["DEVIATION"].max() - df_dev["DEVIATION"].min())
+    if fig_dumbbell is None:
+        df_gender = results["eu_gender"]
+        df_gender["SEX_LABEL"] = df_gender["SEX"].map({1: "Boys", 2: "Girls"})
 
-    # 1:1 barvy podle pořadí v df_dev
-    colors = [
-        px.colors.sample_colorscale(color_scale, float(v))[0]
-        for v in norm_vals.tolist()
-    ]
-
-    # zvýraznění Czech Republic – nyní spolehlivě
-    cz_idx = df_dev.index[df_dev["COUNTRY_NAME"].str.contains("Czech", case=False)]
-    if len(cz_idx) > 0:
-        colors[cz_idx[0]] = "#ffb400"   # zlatá
-
-    # vytvoření grafu
-    fig_dev = go.Figure()
-    fig_dev.add_trace(go.Bar(
-        x=df_dev["DEVIATION"],
-        y=df_dev["COUNTRY_NAME"],
-        orientation="h",
-        marker=dict(
-            color=colors,
-            line=dict(color="black", width=1.6)
+        df_gender_pivot = (
+            df_gender
+            .pivot(index="COUNTRY_NAME", columns="SEX_LABEL", values="OVERWEIGHT")
+            .dropna()
+            .reset_index()
         )
-    ))
-
-    fig_dev.add_vline(x=0, line_width=2, line_color="black")
-
-    fig_dev.update_layout(
-        title="Deviation from EU Average (2018)",
-        height=650,
-        margin=dict(l=40, r=40, t=60, b=40),
-        title_x=0.0,
-        yaxis=dict(tickfont=dict(size=16, family="Arial Black")),
-        xaxis=dict(tickfont=dict(size=13))
-    )
 
+        df_gender_pivot["DIFF"] = df_gender_pivot["Girls"] - df_gender_pivot["Boys"]
 
+        # SE rozdílu Girls − Boys: stejné školy → kovariance se započítá
+        gap_se = clusters.gap(["COUNTRY_CODE"], eu_gender_where)
+        df_gender_pivot = df_gender_pivot.merge(
+            gap_se[["COUNTRY_NAME", "OVERWEIGHT_SE", "N_SCHOOLS"]].rename(
+                columns={"OVERWEIGHT_SE": "DIFF_SE"}),
+            on="COUNTRY_NAME", how="left",
+        )
+        df_gender_pivot = df_gender_pivot.sort_values("DIFF").reset_index(drop=True)
+        gap_hover = (
+            "<b>%{y}</b><br>%{fullData.name}: %{x:.3f}<br>"
+            "Girls − Boys: %{customdata[0]:+.3f} "
+            "(SE %{customdata[1]:.4f}, %{customdata[2]} schools)<extra></extra>"
+        )
+        gap_data = df_gender_pivot[["DIFF", "DIFF_SE", "N_SCHOOLS"]]
 
-    # ============================================================
-    #            GRAF 2 – Dumbbell (Girls vs Boys)
-    # ============================================================
+        fig_dumbbell = go.Figure()
 
-    df_gender = df[df["YEAR"] == 2018].copy()
-    df_gender = df_gender[df_gender["COUNTRY_NAME"].isin(eu_list)]
-    df_gender["SEX_LABEL"] = df_gender["SEX"].map({1: "Boys", 2: "Girls"})
+        # body Girls
+        fig_dumbbell.add_trace(go.Scatter(
+            x=df_gender_pivot["Girls"],
+            y=df_gender_pivot["COUNTRY_NAME"],
+            mode="markers",
+            marker=dict(color="hotpink", size=12),
+            name="Girls",
+            customdata=gap_data,
+            hovertemplate=gap_hover,
+        ))
 
-    df_gender_pivot = (
-        df_gender.groupby(["COUNTRY_NAME", "SEX_LABEL"], as_index=False)["OVERWEIGHT"]
-        .mean()
-        .pivot(index="COUNTRY_NAME", columns="SEX_LABEL", values="OVERWEIGHT")
-        .dropna()
-        .reset_index()
-    )
+        # body Boys
+        fig_dumbbell.add_trace(go.Scatter(
+            x=df_gender_pivot["Boys"],
+            y=df_gender_pivot["COUNTRY_NAME"],
+            mode="markers",
+            marker=dict(color="cornflowerblue", size=12),
+            name="Boys",
+            customdata=gap_data,
+            hovertemplate=gap_hover,
+        ))
 
-    df_gender_pivot["DIFF"] = df_gender_pivot["Girls"] - df_gender_pivot["Boys"]
-    df_gender_pivot = df_gender_pivot.sort_values("DIFF").reset_index(drop=True)
-
-    fig_dumbbell = go.Figure()
-
-    # body Girls
-    fig_dumbbell.add_trace(go.Scatter(
-        x=df_gender_pivot["Girls"],
-        y=df_gender_pivot["COUNTRY_NAME"],
-        mode="markers",
-        marker=dict(color="hotpink", size=12),
-        name="Girls"
-    ))
-
-    # body Boys
-    fig_dumbbell.add_trace(go.Scatter(
-        x=df_gender_pivot["Boys"],
-        y=df_gender_pivot["COUNTRY_NAME"],
-        mode="markers",
-        marker=dict(color="cornflowerblue", size=12),
-        name="Boys"
-    ))
-
-    # spojovací čáry
-    fig_dumbbell.add_trace(go.Scatter(
-        x=pd.concat([df_gender_pivot["Girls"], df_gender_pivot["Boys"]]),
-        y=pd.concat([df_gender_pivot["COUNTRY_NAME"], df_gender_pivot["COUNTRY_NAME"]]),
-        mode="lines",
-        line=dict(color="gray", width=1.5),
-        showlegend=False
-    ))
-
-    # zvýraznění Czech Republic
-    row = df_gender_pivot["COUNTRY_NAME"].str.contains("Czech", case=False)
-    if row.any():
+        # spojovací čáry
         fig_dumbbell.add_trace(go.Scatter(
-            x=[df_gender_pivot.loc[row, "Girls"].iloc[0],
-            df_gender_pivot.loc[row, "Boys"].iloc[0]],
-            y=["Czech Republic", "Czech Republic"],
-            mode="lines+markers",
-            line=dict(color="gold", width=4),
-            marker=dict(color="gold", size=18, line=dict(color="black", width=1)),
-            name="Czech Republic"
+            x=pd.concat([df_gender_pivot["Girls"], df_gender_pivot["Boys"]]),
+            y=pd.concat([df_gender_pivot["COUNTRY_NAME"], df_gender_pivot["COUNTRY_NAME"]]),
+            mode="lines",
+            line=dict(color="gray", width=1.5),
+            showlegend=False
         ))
 
-    fig_dumbbell.update_yaxes(tickfont=dict(size=15, family="Arial Black"))
-    fig_dumbbell.update_layout(
-        title="<b>Difference Between ♀️ Girls and ♂️ Boys</b>",
-        title_x=0.0,
-        height=650,
-        margin=dict(l=40, r=40, t=60, b=40),
-        showlegend=True
-    )
+        # zvýraznění Czech Republic
+        row = df_gender_pivot["COUNTRY_NAME"] == NAME_BY_CODE[CZ_CODE]
+        if row.any():
+            fig_dumbbell.add_trace(go.Scatter(
+                x=[df_gender_pivot.loc[row, "Girls"].iloc[0],
+                df_gender_pivot.loc[row, "Boys"].iloc[0]],
+                y=["Czech Republic", "Czech Republic"],
+                mode="lines+markers",
+                line=dict(color="gold", width=4),
+                marker=dict(color="gold", size=18, line=dict(color="black", width=1)),
+                name="Czech Republic"
+            ))
+
+        fig_dumbbell.update_yaxes(tickfont=dict(size=15, family="Arial Black"))
+        fig_dumbbell.update_layout(
+            title="<b>Difference Between ♀️ Girls and ♂️ Boys</b>",
+            title_x=0.0,
+            height=650,
+            margin=dict(l=40, r=40, t=60, b=40),
+            showlegend=True
+        )
+        figures.put("dumbbell", title24(fig_dumbbell))
 
 
 
@@ -707,10 +643,10 @@ def show_lenka_page():
     col4, col5 = st.columns([1, 1])
 
     with col4:
-        st.plotly_chart(title24(fig_dev), use_container_width=True, config={})
+        st.plotly_chart(fig_dev, use_container_width=True, config={})
 
     with col5:
-        st.plotly_chart(title24(fig_dumbbell), use_container_width=True, config={})
+        st.plotly_chart(fig_dumbbell, use_container_width=True, config={})
 
 
 # ------------------------------------------------------------
@@ -1,9 +1,21 @@
 import streamlit as st
-import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 
+from children_da.bootstrap import add_ci_bands
+from children_da.countries import ISO3_BY_CODE, country_code
+from children_da.cube import filter_cube, query
+from children_da.factors import (
+    DASHBOARD_FACTORS, FACTOR_ALIAS, REVERSE_SCALES, normalize_means, normalize_se,
+)
+from children_da.geometry import MAP_LAT_RANGE, MAP_LON_RANGE, TOPOJSON_URL
+from children_da.store import (
+    get_age_index, get_bootstrap, get_corr_stats, get_cube, get_kpis, get_map_geometry,
+    get_school_clusters, page_figures,
+    show_figure_cache_stats, show_kpi_cache_stats, show_memory_usage,
+)
+
 # ------------------------------------------------------------
 # PAGE CONFIG
 # ------------------------------------------------------------
@@ -111,28 +123,13 @@ st.title("Gender Differences in Childhood Overweight")
 # ------------------------------------------------------------
 # LOADING DATA
 # ------------------------------------------------------------
-if 'df' not in st.session_state:
-    df = pd.read_csv('data.csv')
-    df["COUNTRY_NAME"] = df["COUNTRY_NAME"].replace({
-        "Belgium (Flemish)": "Belgium",
-        "Belgium (French)": "Belgium"
-    })
-    uk_map = {
-        "England": "United Kingdom",
-        "Scotland": "United Kingdom",
-        "Wales": "United Kingdom",
-        "Northern Ireland": "United Kingdom",
-        "Great Britain": "United Kingdom",
-        "UK (England)": "United Kingdom",
-        "UK (Wales)": "United Kingdom",
-        "UK (Scotland)": "United Kingdom"
-    }
-    df["COUNTRY_NAME"] = df["COUNTRY_NAME"].replace(uk_map)
-    st.session_state.df = df
-else:
-    df = st.session_state.df
-
-df.loc[df["BUL_BEEN"] == 999, "BUL_BEEN"] = np.nan
+# průměry OVERWEIGHT a faktorů se skládají z předpočítané kostky,
+# korelace s OVERWEIGHT z jejích součtů (children_da/correlation.py)
+cube = get_cube()
+corr_stats = get_corr_stats()
+bootstrap = get_bootstrap()
+age_index = get_age_index()
+show_memory_usage()
 
 DETAIL_YEAR = 2018
 
@@ -145,77 +142,15 @@ kpi3_label = f"♂️ Boys Overweight ({DETAIL_YEAR})"
 kpi4_label = "🧒 Highest-Risk Age (2018)"
 kpi5_label = "🚨 Highest Overweight Country (2018)"
 
-if df.empty:
+# KPI nezávisí na filtrech → jednou za verzi dat (children_da/kpi.py)
+if cube.empty:
     st.warning("No data for selected filters.")
-else:
-    years_available = sorted(df["YEAR"].unique().tolist())
-    base_year = years_available[0]
-
-    df_detail_year = df[df["YEAR"] == DETAIL_YEAR].copy()
+kpis = get_kpis("gender")
+show_kpi_cache_stats()
+show_figure_cache_stats()
 
-    # KPI 1 – změna prevalence mezi prvním rokem a 2018
-    overall_detail = df_detail_year["OVERWEIGHT"].mean()
-    overall_base = df[df["YEAR"] == base_year]["OVERWEIGHT"].mean()
-
-    if pd.notna(overall_base) and pd.notna(overall_detail):
-        diff_pct = (overall_detail - overall_base) * 100
-        kpi1_value = f"{diff_pct:+.1f} %"
-    else:
-        kpi1_value = "N/A"
-
-    # KPI 2 + 3 – podíl OW dívek a chlapců v roce 2018
-    kpi2_value = "N/A"
-    kpi3_value = "N/A"
-
-    if not df_detail_year.empty:
-        df_ow_only = df_detail_year[df_detail_year["OVERWEIGHT"] == 1].copy()
-        if not df_ow_only.empty:
-            counts = (
-                df_ow_only
-                .groupby("SEX", observed=True)
-                .size()
-                .reset_index(name="COUNT")
-            )
-            if set(counts["SEX"]) == {1, 2}:
-                total = counts["COUNT"].sum()
-                boys_count = counts.loc[counts["SEX"] == 1, "COUNT"].iloc[0]
-                girls_count = counts.loc[counts["SEX"] == 2, "COUNT"].iloc[0]
-
-                boys_pct = boys_count / total * 100
-                girls_pct = girls_count / total * 100
-
-                kpi2_value = f"{girls_pct:.0f} %"
-                kpi3_value = f"{boys_pct:.0f} %"
-
-    # KPI 4 – věk s nejvyšší prevalencí OW v roce 2018
-    kpi4_value = "N/A"
-    if not df_detail_year.empty:
-        age_means = (
-            df_detail_year
-            .groupby("AGE", as_index=False, observed=True)["OVERWEIGHT"]
-            .mean()
-        )
-        if not age_means.empty:
-            row_max = age_means.sort_values("OVERWEIGHT", ascending=False).iloc[0]
-            best_age = int(row_max["AGE"])
-            kpi4_value = f"{best_age}"
-
-    # KPI 5 – země s nejvyšší prevalencí OW v roce 2018
-    kpi5_value = "N/A"
-    if not df_detail_year.empty:
-        country_means = (
-            df_detail_year
-            .groupby("COUNTRY_NAME", as_index=False)["OVERWEIGHT"]
-            .mean()
-        )
-        if not country_means.empty:
-            row_max = country_means.sort_values("OVERWEIGHT", ascending=False).iloc[0]
-            fattest_country = row_max["COUNTRY_NAME"]
-            fattest_value = row_max["OVERWEIGHT"] * 100
-            kpi5_value = f"{fattest_country} ({fattest_value:.0f} %)"
-
-    # KPI layout
-    st.markdown('<div class="kpi-wrapper">', unsafe_allow_html=True)
+# KPI layout
+st.markdown('<div class="kpi-wrapper">', unsafe_allow_html=True)
 
 kpi_col1, kpi_col2, kpi_col3, kpi_col4, kpi_col5 = st.columns(5)
 
@@ -223,7 +158,7 @@ with kpi_col1:
     st.markdown(f"""
     <div class="kpi-box">
         <div class="kpi-label">{kpi1_label}</div>
-        <div class="kpi-value">{kpi1_value}</div>
+        <div class="kpi-value">{kpis["kpi1"]}</div>
     </div>
     """, unsafe_allow_html=True)
 
@@ -231,7 +166,7 @@ with kpi_col2:
     st.markdown(f"""
     <div class="kpi-box">
         <div class="kpi-label">{kpi2_label}</div>
-        <div class="kpi-value">{kpi2_value}</div>
+        <div class="kpi-value">{kpis["kpi2"]}</div>
     </div>
     """, unsafe_allow_html=True)
 
@@ -239,7 +174,7 @@ with kpi_col3:
     st.markdown(f"""
     <div class="kpi-box">
         <div class="kpi-label">{kpi3_label}</div>
-        <div class="kpi-value">{kpi3_value}</div>
+        <div class="kpi-value">{kpis["kpi3"]}</div>
     </div>
     """, unsafe_allow_html=True)
 
@@ -247,7 +182,7 @@ with kpi_col4:
     st.markdown(f"""
     <div class="kpi-box">
         <div class="kpi-label">{kpi4_label}</div>
-        <div class="kpi-value">{kpi4_value}</div>
+        <div class="kpi-value">{kpis["kpi4"]}</div>
     </div>
     """, unsafe_allow_html=True)
 
@@ -255,7 +190,7 @@ with kpi_col5:
     st.markdown(f"""
     <div class="kpi-box">
         <div class="kpi-label">{kpi5_label}</div>
-        <div class="kpi-value">{kpi5_value}</div>
+        <div class="kpi-value">{kpis["kpi5"]}</div>
     </div>
     """, unsafe_allow_html=True)
 
@@ -269,7 +204,7 @@ with row1_col2:
     st.subheader("Filters")
 
     # Country filter
-    country_list = sorted(df["COUNTRY_NAME"].unique().tolist())
+    country_list = sorted(cube["COUNTRY_NAME"].dropna().unique().tolist())
     country_options = ["All countries"] + country_list
     selected_country = st.selectbox(
         "Select country",
@@ -278,7 +213,7 @@ with row1_col2:
     )
 
     # Age filter
-    min_age, max_age = int(df["AGE"].min()), int(df["AGE"].max())
+    min_age, max_age = int(cube["AGE"].min()), int(cube["AGE"].max())
     age_min, age_max = st.slider(
         "Select age",
         min_value=min_age,
@@ -287,136 +222,43 @@ with row1_col2:
         step=1
     )
 
-df_filtered = df.copy()
+# filtr pro dotazy nad kostkou
+filter_where = {"AGE": (age_min, age_max)}
 
 if selected_country != "All countries":
-    df_filtered = df_filtered[df_filtered["COUNTRY_NAME"] == selected_country]
+    filter_where["COUNTRY_CODE"] = country_code(selected_country)
 
-df_filtered = df_filtered[
-    (df_filtered["AGE"] >= age_min) &
-    (df_filtered["AGE"] <= age_max)
-]
+# buňky sečtené přes zvolený věkový rozsah – rozdíl prefixových součtů
+# (children_da/ageindex.py), ne nové filtrování a sčítání kostky
+cube_age = age_index.window(age_min, age_max)
+country_where = {k: v for k, v in filter_where.items() if k != "AGE"}
 
-# ------------------------------------------------------------
-# DEFINING FACTORS, SCALES
-# ------------------------------------------------------------
-list_columns = [
-    "FRUITS", "SOFT_DRINKS", "SWEETS", "VEGETABLES", "FRIEND_TALK",
-    "TIME_EXE", "PHYS_ACT_60", "DRUNK_30",
-    "FAMILY_MEALS_TOGETHER", "BREAKFAST_WEEKDAYS", "BREAKFAST_WEEKEND",
-    "TOOTH_BRUSHING", "STUD_TOGETHER",
-    "BUL_OTHERS", "BUL_BEEN", "FIGHT_YEAR", "INJURED_YEAR",
-    "HEADACHE", "FEEL_LOW", "NERVOUS", "SLEEP_DIF", "DIZZY",
-    "TALK_MOTHER", "TALK_FATHER", "LIKE_SCHOOL",
-    "SCHOOL_PRESSURE", "COMPUTER_NO"
-]
-
-dict_scales = {
-    "HEADACHE": 5,
-    "NERVOUS": 5,
-    "SLEEP_DIF": 5,
-    "FEEL_LOW": 5,
-    "STOMACHACHE": 5,
-    "DIZZY": 5,
-    "TALK_FATHER": 5,
-    "TALK_MOTHER": 5,
-    "FAMILY_MEALS_TOGETHER": 5,
-    "TIME_EXE": 7,
-    "TOOTH_BRUSHING": 5,
-    "HEALTH": 4,
-    "LIKE_SCHOOL": 4,
-    "STUD_TOGETHER": 5,
-    "FRUITS": 7,
-    "VEGETABLES": 7,
-    "FRIEND_TALK": 7,
-    "BREAKFAST_WEEKDAYS": 5,
-    "BREAKFAST_WEEKEND": 3,
-    "PHYS_ACT_60": 7,
-    "LIFESAT": 10,
-    "SWEETS": 7,
-    "SOFT_DRINKS": 7,
-    "DRUNK_30": 5,
-    "BUL_BEEN": 5,
-    "BUL_OTHERS": 5,
-    "FIGHT_YEAR": 5,
-    "INJURED_YEAR": 5,
-    "COMPUTER_NO": 4,
-    "THINK_BODY": 5,
-    "SCHOOL_PRESSURE": 4
-}
+cube_filtered = filter_cube(cube_age, country_where)
+detail_where = {**filter_where, "YEAR": DETAIL_YEAR}
+cube_detail = filter_cube(cube_filtered, {"YEAR": DETAIL_YEAR})
 
-reverse_scales = {
-    "HEADACHE",
-    "NERVOUS",
-    "SLEEP_DIF",
-    "DIZZY",
-    "FEEL_LOW",
-    "STOMACHACHE",
-    "BREAKFAST_WEEKDAYS",
-    "BREAKFAST_WEEKEND",
-    "FRIEND_TALK",
-    "FRUITS",
-    "LIFESAT",
-    "PHYS_ACT_60",
-    "VEGETABLES"
-}
-
-factor_alias = {
-    "FRUITS": "No fruit",
-    "SOFT_DRINKS": "Soft drinks",
-    "SWEETS": "Sweets",
-    "VEGETABLES": "No vegetables",
-    "FRIEND_TALK": "No friends talk",
-    "TIME_EXE": "No exercise",
-    "PHYS_ACT_60": "Below 60 min/day",
-    "DRUNK_30": "Alcohol",
-    "FAMILY_MEALS_TOGETHER": "No family meals",
-    "BREAKFAST_WEEKDAYS": "No breakfast (weekdays)",
-    "BREAKFAST_WEEKEND": "No breakfast (weekend)",
-    "TOOTH_BRUSHING": "Poor tooth care",
-    "STUD_TOGETHER": "No friend time",
-    "BUL_OTHERS": "Bullies others",
-    "BUL_BEEN": "Been bullied",
-    "FIGHT_YEAR": "Often fights",
-    "INJURED_YEAR": "Often injured",
-    "HEADACHE": "Headaches",
-    "FEEL_LOW": "Feels low",
-    "NERVOUS": "Nervous",
-    "SLEEP_DIF": "Sleep problems",
-    "DIZZY": "Dizzy",
-    "TALK_MOTHER": "No mom talk",
-    "TALK_FATHER": "No dad talk",
-    "LIKE_SCHOOL": "Dislikes school",
-    "SCHOOL_PRESSURE": "High school pressure",
-    "COMPUTER_NO": "Computer/Gaming use"
-}
-
-# ------------------------------------------------------------
-# NORMALIZACE 0–1 pro DETAIL_YEAR
-# ------------------------------------------------------------
-def prep_df_normalized_for_year(df_input, year):
-    df_year = df_input[df_input["YEAR"] == year].copy()
-    for factor in list_columns:
-        df_year[factor] = df_year[factor] / dict_scales[factor]
-        if factor in reverse_scales:
-            df_year[factor] = 1 - df_year[factor]
-    return df_year
+# hotové grafy pro tento stav filtrů (sdílené mezi sessions, figcache.py);
+# graf z cache – i uložené „není k dispozici“ – se nepočítá znovu
+figures = page_figures("gender", (selected_country, age_min, age_max))
+lookups = {f"fig{i}": figures.lookup(f"fig{i}") for i in range(1, 7)}
+fig1, fig2, fig3, fig4, fig5, fig6 = (fig for _, fig in lookups.values())
+cached_figs = {name for name, (hit, _) in lookups.items() if hit}
 
-df_norm_detail = prep_df_normalized_for_year(df_filtered, DETAIL_YEAR)
+colors = {'Girls': "#eb8fbd", 'Boys': "#3b8ee1"}
 
 # ------------------------------------------------------------
 # GRAPH 1 – trend OW v čase podle gender
 # ------------------------------------------------------------
-fig1 = fig2 = fig3 = fig4 = fig5 = fig6 = None
-
-if not df_filtered.empty:
-    df_trend = (
-        df_filtered
-        .groupby(["YEAR", "SEX"], as_index=False, observed=True)["OVERWEIGHT"]
-        .mean()
-    )
+if "fig1" not in cached_figs and not cube_filtered.empty:
+    # 95% CI z bootstrapu nad počty kostky (children_da/bootstrap.py)
+    # SE se shlukováním podle škol do tooltipu (children_da/cluster.py)
+    trend_se = get_school_clusters().prevalence(["YEAR", "SEX"], filter_where)
+    df_trend = bootstrap.add_ci(query(cube_filtered, ["YEAR", "SEX"])).merge(
+        trend_se[["YEAR", "SEX", "OVERWEIGHT_SE", "N_SCHOOLS"]], on=["YEAR", "SEX"], how="left",
+    )[
+        ["YEAR", "SEX", "OVERWEIGHT", "OVERWEIGHT_LO", "OVERWEIGHT_HI", "OVERWEIGHT_SE", "N_SCHOOLS"]
+    ]
     df_trend["SEX_LABEL"] = df_trend["SEX"].map({1: "Boys", 2: "Girls"})
-    colors = {'Girls': "#eb8fbd", 'Boys': "#3b8ee1"}
 
     fig1 = px.line(
         df_trend,
@@ -424,11 +266,14 @@ if not df_filtered.empty:
         x="YEAR",
         color="SEX_LABEL",
         color_discrete_map=colors,
+        hover_data={"OVERWEIGHT_SE": ":.4f", "N_SCHOOLS": True},
+        labels={"OVERWEIGHT_SE": "SE (school-clustered)", "N_SCHOOLS": "Schools"},
     )
 
     fig1.update_yaxes(range=[0, 0.5])
     fig1.update_xaxes(tickvals=[2002, 2006, 2010, 2014, 2018])
     fig1.update_traces(fill="tozeroy")
+    add_ci_bands(fig1, df_trend, x="YEAR", group="SEX_LABEL")
 
     fig1.update_layout(
         xaxis_title="Year",
@@ -459,12 +304,9 @@ with row1_col1:
 # ------------------------------------------------------------
 # GRAPH 2 – Top 5 behaviours (OW děti) – Boys vs Girls
 # ------------------------------------------------------------
-if not df_norm_detail.empty:
-    corr_series = (
-        df_norm_detail[list_columns + ["OVERWEIGHT"]]
-        .corr()["OVERWEIGHT"]
-        .drop("OVERWEIGHT")
-    )
+# top5_corr potřebuje i graf 3
+if not {"fig2", "fig3"} <= cached_figs and not cube_detail.empty:
+    corr_series = corr_stats.corr(detail_where, reverse=REVERSE_SCALES).reindex(DASHBOARD_FACTORS)
 
     top5_corr = (
         corr_series
@@ -475,16 +317,14 @@ if not df_norm_detail.empty:
         .tolist()
     )
 
-    df_ow = df_norm_detail[df_norm_detail["OVERWEIGHT"] == 1].copy()
+    sex_means = normalize_means(
+        query(cube_detail, ["SEX"], {"OVERWEIGHT": 1}, factors=top5_corr),
+        top5_corr,
+    )[["SEX"] + top5_corr]
 
-    if not df_ow.empty:
-        sex_means = (
-            df_ow
-            .groupby("SEX", as_index=False, observed=True)[top5_corr]
-            .mean()
-        )
+    if not sex_means.empty:
 
-        if set(sex_means["SEX"]) == {1, 2}:
+        if "fig2" not in cached_figs and set(sex_means["SEX"]) == {1, 2}:
             df_long = sex_means.melt(
                 id_vars="SEX",
                 value_vars=top5_corr,
@@ -493,7 +333,7 @@ if not df_norm_detail.empty:
             )
 
             df_long["SEX_LABEL"] = df_long["SEX"].map({1: "Boys", 2: "Girls"})
-            df_long["FACTOR_LABEL"] = df_long["FACTOR"].map(factor_alias)
+            df_long["FACTOR_LABEL"] = df_long["FACTOR"].map(FACTOR_ALIAS)
 
             order_help = (
                 df_long
@@ -528,18 +368,16 @@ if not df_norm_detail.empty:
 # ------------------------------------------------------------
 # GRAPH 3 – Gender gap by factor (OW děti, zbylé faktory)
 # ------------------------------------------------------------
-if not df_norm_detail.empty and "top5_corr" in locals():
-    remaining_factors = [f for f in list_columns if f not in top5_corr]
+if "fig3" not in cached_figs and not cube_detail.empty and "top5_corr" in locals():
+    remaining_factors = [f for f in DASHBOARD_FACTORS if f not in top5_corr]
 
-    df_ow_detail = df_norm_detail[df_norm_detail["OVERWEIGHT"] == 1].copy()
+    # průměry podle pohlaví (jen děti s nadváhou)
+    sex_means_all = normalize_means(
+        query(cube_detail, ["SEX"], {"OVERWEIGHT": 1}, factors=remaining_factors),
+        remaining_factors,
+    )[["SEX"] + remaining_factors]
 
-    if not df_ow_detail.empty and remaining_factors:
-        # průměry podle pohlaví
-        sex_means_all = (
-            df_ow_detail
-            .groupby("SEX", as_index=False, observed=True)[remaining_factors]
-            .mean()
-        )
+    if not sex_means_all.empty and remaining_factors:
 
         # potřebujeme obě pohlaví 1 = Boys, 2 = Girls
         if set(sex_means_all["SEX"]) == {1, 2}:
@@ -564,6 +402,19 @@ if not df_norm_detail.empty and "top5_corr" in locals():
             )
             df_gap = gap_table_rest.reset_index()
 
+            # SE rozdílu Girls − Boys se shlukováním podle škol, na škále 0–1
+            gap_se = normalize_se(
+                get_school_clusters().gap([], {**detail_where, "OVERWEIGHT": 1},
+                                          factors=remaining_factors),
+                remaining_factors,
+            )
+            if not gap_se.empty:
+                df_gap["GAP_SE"] = df_gap["FACTOR"].map(
+                    {f: gap_se[f"{f}_SE"].iloc[0] for f in remaining_factors}
+                )
+            else:
+                df_gap["GAP_SE"] = np.nan
+
             # pořadí faktorů podle velikosti rozdílu
             factor_order = (
                 df_gap
@@ -571,9 +422,9 @@ if not df_norm_detail.empty and "top5_corr" in locals():
                 .tolist()
             )
 
-            df_gap["FACTOR_LABEL"] = df_gap["FACTOR"].map(factor_alias)
+            df_gap["FACTOR_LABEL"] = df_gap["FACTOR"].map(FACTOR_ALIAS)
             factor_order_labels = [
-                factor_alias.get(f, f) for f in factor_order
+                FACTOR_ALIAS.get(f, f) for f in factor_order
             ]
 
             # kdo má vyšší riziko
@@ -597,6 +448,8 @@ if not df_norm_detail.empty and "top5_corr" in locals():
                 color="SIDE",
                 color_discrete_map=color_gap,
                 category_orders={"FACTOR_LABEL": factor_order_labels},
+                hover_data={"GAP_SE": ":.4f"},
+                labels={"GAP_SE": "SE (school-clustered)"},
                 title=f"Gender Gap Across Risk Factors (Overweight children, {DETAIL_YEAR})"
             )
 
@@ -640,16 +493,15 @@ if not df_norm_detail.empty and "top5_corr" in locals():
 # ------------------------------------------------------------
 # GRAPH 4 – Overweight by Age and Gender (2018)
 # ------------------------------------------------------------
-df_age_base = df[df["YEAR"] == DETAIL_YEAR].copy()
+age_base_where = {"YEAR": DETAIL_YEAR}
 if selected_country != "All countries":
-    df_age_base = df_age_base[df_age_base["COUNTRY_NAME"] == selected_country]
+    age_base_where["COUNTRY_CODE"] = country_code(selected_country)
+cube_age_base = filter_cube(cube, age_base_where)
 
-if not df_age_base.empty:
-    df_age_trend = (
-        df_age_base
-        .groupby(["AGE", "SEX"], as_index=False, observed=True)["OVERWEIGHT"]
-        .mean()
-    )
+if "fig4" not in cached_figs and not cube_age_base.empty:
+    df_age_trend = bootstrap.add_ci(query(cube_age_base, ["AGE", "SEX"]))[
+        ["AGE", "SEX", "OVERWEIGHT", "OVERWEIGHT_LO", "OVERWEIGHT_HI"]
+    ]
     df_age_trend["SEX_LABEL"] = df_age_trend["SEX"].map({1: "Boys", 2: "Girls"})
 
     fig4 = px.line(
@@ -669,19 +521,22 @@ if not df_age_base.empty:
         height=600,
         margin=dict(l=80, r=40, t=60, b=60)
     )
+    add_ci_bands(fig4, df_age_trend, x="AGE", group="SEX_LABEL")
 
 # ------------------------------------------------------------
 # GRAPH 5 – OW vs Non-OW – rozdíl faktorů
 # ------------------------------------------------------------
-if not df_norm_detail.empty:
-    df_fig5 = df_norm_detail.copy()
+if "fig5" not in cached_figs and not cube_detail.empty:
+    df_fig5 = normalize_means(
+        query(cube_detail, ["OVERWEIGHT"], factors=DASHBOARD_FACTORS), DASHBOARD_FACTORS
+    )
 
     df_ow_all = df_fig5[df_fig5["OVERWEIGHT"] == 1]
     df_non_all = df_fig5[df_fig5["OVERWEIGHT"] == 0]
 
     if not df_ow_all.empty and not df_non_all.empty:
-        ow_means = df_ow_all[list_columns].mean()
-        non_means = df_non_all[list_columns].mean()
+        ow_means = df_ow_all[DASHBOARD_FACTORS].iloc[0]
+        non_means = df_non_all[DASHBOARD_FACTORS].iloc[0]
         diff = ow_means - non_means
 
         df_diff = (
@@ -694,7 +549,7 @@ if not df_norm_detail.empty:
 
         df_diff = df_diff.sort_values("ABS_DIFF", ascending=False)
 
-        df_diff["FACTOR_LABEL"] = df_diff["FACTOR"].map(factor_alias)
+        df_diff["FACTOR_LABEL"] = df_diff["FACTOR"].map(FACTOR_ALIAS)
 
         df_diff["SIDE"] = np.where(
             df_diff["DIFFERENCE"] > 0,
@@ -743,24 +598,18 @@ if not df_norm_detail.empty:
 # ------------------------------------------------------------
 # GRAPH 6 – World map: where are girls vs boys more overweight?
 # ------------------------------------------------------------
-df_map = df[
-    (df["YEAR"] == DETAIL_YEAR) &
-    (df["AGE"] >= age_min) &
-    (df["AGE"] <= age_max)
-].copy()
-
-if not df_map.empty:
-    df_map["SEX_LABEL"] = df_map["SEX"].map({1: "Boys", 2: "Girls"})
-
-    df_gender = (
-        df_map
-        .groupby(["COUNTRY_NAME", "SEX_LABEL"], as_index=False, observed=True)["OVERWEIGHT"]
-        .mean()
-    )
+cube_map = filter_cube(cube_age, {"YEAR": DETAIL_YEAR})
+
+if "fig6" not in cached_figs and not cube_map.empty:
+    df_gender = query(cube_map, ["COUNTRY_CODE", "SEX"])
+    df_gender["SEX_LABEL"] = df_gender["SEX"].map({1: "Boys", 2: "Girls"})
+    # ISO3 z číselníku zemí – přesná shoda, žádné hledání podle názvu
+    df_gender["ISO3"] = df_gender["COUNTRY_CODE"].map(ISO3_BY_CODE)
+    df_gender = df_gender.dropna(subset=["ISO3"])[["ISO3", "COUNTRY_NAME", "SEX_LABEL", "OVERWEIGHT"]]
 
     df_pivot = (
         df_gender
-        .pivot(index="COUNTRY_NAME", columns="SEX_LABEL", values="OVERWEIGHT")
+        .pivot(index=["ISO3", "COUNTRY_NAME"], columns="SEX_LABEL", values="OVERWEIGHT")
         .reset_index()
     )
 
@@ -779,16 +628,24 @@ if not df_map.empty:
         "#be185d",
     ]
 
+    # přibalená geometrie → mapa funguje offline (children_da/geometry.py)
+    geometry = get_map_geometry()
+    if geometry is not None:
+        locations = dict(geojson=geometry, featureidkey="id")
+    else:
+        locations = dict(locationmode="ISO-3")
+
     fig6 = px.choropleth(
         df_pivot,
-        locations="COUNTRY_NAME",
-        locationmode="country names",
+        locations="ISO3",
+        **locations,
         color="GAP_PP",
         color_continuous_scale=gender_gap_colors,
         range_color=(-max_range, max_range),
         title=f"Where Are Girls vs Boys More Overweight? (2018, age {age_min}–{age_max})",
         hover_name="COUNTRY_NAME",
         hover_data={
+            "ISO3": False,
             "GAP_PP": ":.1f",
             "Boys": ":.1%",
             "Girls": ":.1%",
@@ -808,10 +665,26 @@ if not df_map.empty:
         landcolor="white",
         showcoastlines=True,
         showframe=False,
-        lataxis_range=[30, 75],
-        lonaxis_range=[-120, 80],
+        lataxis_range=list(MAP_LAT_RANGE),
+        lonaxis_range=list(MAP_LON_RANGE),
     )
 
+    if geometry is not None:
+        # podkladová mapa Plotly (topojson z CDN) vypnutá, pevnina z vlastní geometrie
+        fig6.update_geos(visible=False)
+        land_ids = [f["id"] for f in geometry["features"]]
+        fig6.add_trace(go.Choropleth(
+            geojson=geometry,
+            featureidkey="id",
+            locations=land_ids,
+            z=[0] * len(land_ids),
+            colorscale=[[0, "white"], [1, "white"]],
+            showscale=False,
+            hoverinfo="skip",
+        ))
+        # pevnina pod daty
+        fig6.data = fig6.data[-1:] + fig6.data[:-1]
+
     fig6.update_traces(
         marker_line_width=0.6,
         marker_line_color="black",
@@ -849,8 +722,14 @@ def fix_legend_right(fig, right_margin=160):
         ),
     )
 
-for f in [fig2, fig3, fig4, fig5]:
-    fix_legend_right(f)
+# graf z cache už legendu upravenou má (a upravovat se nesmí)
+for name, f in zip(["fig2", "fig3", "fig4", "fig5"], [fig2, fig3, fig4, fig5]):
+    if name not in cached_figs:
+        fix_legend_right(f)
+
+for name, fig in zip(["fig1", "fig2", "fig3", "fig4", "fig5", "fig6"], [fig1, fig2, fig3, fig4, fig5, fig6]):
+    if name not in cached_figs:
+        figures.put(name, fig)
 
 # ------------------------------------------------------------
 # DASHBOARD LAYOUT
@@ -883,6 +762,7 @@ with row3_col2:
 
 # Graph 6 – full width
 if 'fig6' in locals() and fig6 is not None:
-    st.plotly_chart(fig6, width='stretch', key="fig6")
+    # topojson z static/ místo z cdn.plot.ly (children_da/geometry.py)
+    st.plotly_chart(fig6, width='stretch', key="fig6", config={"topojsonURL": TOPOJSON_URL})
 else:
     st.info("Graph 6 not available for current filters.")
@@ -1,5 +1,14 @@
 import streamlit as st
-from openai import OpenAI
+
+from children_da.advice import risk_level, rule_based_recommendation
+from children_da.factors import barometer_risk
+from children_da.reccache import canonical_key
+from children_da.recommendation import (
+    CLIENT_POOL_SIZE, MODEL, REQUEST_TIMEOUT, RecommendationError, cancel_stale, request_key, start_job,
+)
+from children_da.store import (
+    get_barometer_model, get_client_pool, get_recommendation_cache, show_recommendation_cache_stats,
+)
 
 st.title("📊 Child Weight Risk Barometer")
 st.markdown("""
@@ -140,36 +149,19 @@ def compute_risk_score(user_data: dict) -> int:
     Returns lifestyle risk score 0–100.
     0 = very healthy habits, 100 = very unhealthy habits.
     """
+    # škály odpovědí jsou ve sdíleném číselníku faktorů (children_da/factors.py)
+    return int(round(barometer_risk(user_data) * 100))
 
-    # All 1–7 scales: 1 = best, 7 = worst
-    soft_drinks_risk = (user_data["SOFT_DRINKS"] - 1) / 6
-    sweets_risk      = (user_data["SWEETS"] - 1) / 6
-    vegetables_risk  = (user_data["VEGETABLES"] - 1) / 6
-    friend_talk_risk = (user_data["FRIEND_TALK"] - 1) / 6
-    phys_risk        = (user_data["PHYS_ACT_60"] - 1) / 6
-    breakfast_risk   = (user_data["BREAKFAST_WEEKDAYS"] - 1) / 6
-    feel_low_risk    = (user_data["FEEL_LOW"] - 1) / 6
-    talk_father_risk = (user_data["TALK_FATHER"] - 1) / 6
-
-    # Tooth brushing has 1–5 scale
-    teeth_risk       = (user_data["TOOTH_BRUSHING"] - 1) / 4
-
-    components = [
-        soft_drinks_risk,
-        sweets_risk,
-        vegetables_risk,
-        friend_talk_risk,
-        phys_risk,
-        breakfast_risk,
-        teeth_risk,
-        feel_low_risk,
-        talk_father_risk,
-    ]
-
-    base_score = sum(components) / len(components)   # 0–1
-    score_0_100 = int(round(base_score * 100))
-
-    return score_0_100
+
+# natrénovaný les (model.pkl), jednou za proces; None → ruční skóre výše
+model = get_barometer_model()
+
+
+def compute_model_score(user_data: dict, country) -> int:
+    """
+    Returns the model's overweight risk 0–100 (probability × 100).
+    """
+    return int(round(model.predict(user_data, country) * 100))
 
 
 # -----------------------------
@@ -226,6 +218,22 @@ talk_father = st.selectbox(
     talkfather_labels
 )
 
+country = None
+if model is not None and model.countries:
+    countries = sorted(model.countries)
+    country = st.selectbox(
+        "🌍 Which country do you live in?",
+        countries,
+        index=countries.index("Czech Republic") if "Czech Republic" in countries else 0,
+    )
+
+# rozpracované AI doporučení k jiným odpovědím se zruší
+answers_key = request_key(
+    sex_label, age, soft_drinks, sweets, vegetables, friend_talk, feel_low,
+    phys, breakfast, teeth, talk_father, country,
+)
+cancel_stale(st.session_state, answers_key)
+
 # -----------------------------
 # 5) COMPUTE - BAROMETER ONLY
 # -----------------------------
@@ -244,7 +252,12 @@ if st.button("🔍 Evaluate"):
         "TALK_FATHER": extract_number(talk_father)
     }
 
-    score = compute_risk_score(user_data)   # 0–100
+    if model is not None:
+        score = compute_model_score(user_data, country)   # 0–100
+        score_label = "Overweight risk score (model)"
+    else:
+        score = compute_risk_score(user_data)   # 0–100
+        score_label = "Lifestyle risk score"
     risk_ratio = score / 100               # 0–1
     arrow_pct = 2 + 96 * risk_ratio 
 
@@ -271,7 +284,7 @@ if st.button("🔍 Evaluate"):
     </div>
 
     <p style="text-align:center; font-size:14px; margin-top:4px;">
-        Lifestyle risk score: <b>{score}</b> / 100
+        {score_label}: <b>{score}</b> / 100
     </p>
     """
 
@@ -282,20 +295,21 @@ if st.button("🔍 Evaluate"):
 
     st.write("---")
     st.subheader("📊 Recommendation")
-    st.markdown(
-        "<p style='font-size:13px; color: #666;'>This may take a short while.</p>",
-        unsafe_allow_html=True
-    )
+
+    # lokální tipy z pravidel (children_da/advice.py) – hned, bez LLM
+    def show_local_tips(reason: str):
+        st.markdown(rule_based_recommendation(user_data, score))
+        st.caption(f"💡 Quick tips generated locally – {reason}.")
 
 
     API_KEY = st.secrets.get("OPENAI_API_KEY")
         
     if not API_KEY:
-        st.info("AI recommendation is not available because the API key is not configured.")
+        show_local_tips("the AI recommendation is not configured")
     else:
         SYSTEM_PROMPT = """
 You are a very supportive health coach for parents, focused to prevent obesity and/or overweight, that's your primary goal. 
-You receive a short profile of a child, including sex, age, a lifestyle risk score (0-100)
+You receive a short profile of a child, including sex, age, a risk score (0-100)
 and a description of daily habits (diet, physical activity, emotional state, hygiene).
 
 Your task:
@@ -319,18 +333,13 @@ Never give exact probabilities or medical diagnoses.
 Do not ask what you can do next. Give only one time recommendations, that's it.
 """
 
-        if score < 30:
-            risk_level = "low"
-        elif score < 60:
-            risk_level = "medium"
-        else:
-            risk_level = "high"
+        level = risk_level(score)
 
         user_summary = f"""
 Child profile:
 - Sex: {sex_label}
 - Age: {age}
-- Lifestyle risk score: {score}/100 ({risk_level} risk)
+- {score_label}: {score}/100 ({level} risk)
 
 Habits:
 - Soft drinks: {soft_drinks_labels[user_data['SOFT_DRINKS'] - 1]}
@@ -344,26 +353,48 @@ Habits:
 - Talking to father: {talkfather_labels[user_data['TALK_FATHER'] - 1]}
 """
 
-        client = OpenAI(api_key=API_KEY)
+        # stejný profil už někdo odeslal → doporučení z disku, bez volání LLM
+        rec_cache = get_recommendation_cache()
+        cache_key = canonical_key(MODEL, SYSTEM_PROMPT, user_summary)
+        cached = rec_cache.get(cache_key)
+
+        timeout = float(st.secrets.get("OPENAI_TIMEOUT", REQUEST_TIMEOUT))
+        pool = get_client_pool(API_KEY, int(st.secrets.get("OPENAI_POOL_SIZE", CLIENT_POOL_SIZE)), timeout)
+
+        if cached is not None:
+            st.write(cached.text)
+            st.caption(
+                f"⚡ Served from the recommendation cache – saved about {cached.latency_ms / 1000:.1f} s."
+            )
+        elif not pool.has_capacity():
+            # pod zátěží nečekat ve frontě na klienta
+            show_local_tips("the AI coach is busy right now")
+        else:
+            st.markdown(
+                "<p style='font-size:13px; color: #666;'>This may take a short while.</p>",
+                unsafe_allow_html=True
+            )
 
-        try:
-            response = client.responses.create(
-                model="gpt-5-nano",  
-                input=[
+            # odpověď běží na pozadí a text se vypisuje průběžně
+            job = start_job(
+                st.session_state,
+                pool,
+                answers_key,
+                [
                     {"role": "system", "content": SYSTEM_PROMPT},
                     {"role": "user", "content": user_summary},
                 ],
+                timeout=timeout,
             )
 
-            
             try:
-                recommendation_text = response.output[0].content[0].text
-            except Exception:
-                recommendation_text = getattr(response, "output_text", "I could not parse the response text.")
+                st.write_stream(job.chunks())
+            except RecommendationError as e:
+                st.warning(f"The AI recommendation is not available right now ({e}).")
+                show_local_tips("used instead of the AI recommendation")
 
-            st.write(recommendation_text)
+            if job.completed and job.text:
+                rec_cache.put(cache_key, job.text, job.elapsed_ms)
 
-        except Exception as e:
-            st.error("Sorry, there was an error while generating the recommendation.")
-            st.text(str(e))
+        show_recommendation_cache_stats()
 
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# testy se spouští z kořene repozitáře (`python -m pytest`), i odjinud
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,98 @@
+"""
+Lokální falešný server OpenAI Responses API (jen streamované odpovědi).
+
+`POST /v1/responses` se `stream: true` vrátí SSE události
+`response.output_text.delta` po slovech z `words` s pauzou `delay`
+a nakonec `response.completed`. Režim `error` pošle po dvou slovech
+událost `error`. Server počítá souběžné požadavky a spojení, která
+klient zavřel uprostřed streamu.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeResponsesServer:
+    def __init__(self, words=("Hello", " parents", ",", " great", " job", "!"), delay=0.01):
+        self.words = list(words)
+        self.delay = delay
+        self.mode = "ok"
+        self.requests = []
+        self.active = 0
+        self.max_active = 0
+        self.disconnects = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._httpd.server_port}/v1"
+
+    def start(self) -> "FakeResponsesServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _enter(self, body):
+        with self._lock:
+            self.requests.append(body)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+
+    def _leave(self, disconnected):
+        with self._lock:
+            self.active -= 1
+            self.disconnects += disconnected
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, event: dict):
+                data = f"event: {event['type']}\ndata: {json.dumps(event)}\n\n".encode()
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                self.wfile.flush()
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                server._enter(body)
+                disconnected = False
+                try:
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/event-stream")
+                    self.send_header("Transfer-Encoding", "chunked")
+                    self.end_headers()
+                    for i, word in enumerate(server.words):
+                        time.sleep(server.delay)
+                        if server.mode == "error" and i == 2:
+                            self._send({"type": "error", "code": "server_error", "message": "boom",
+                                        "param": None, "sequence_number": i})
+                            break
+                        self._send({"type": "response.output_text.delta", "delta": word, "item_id": "msg",
+                                    "output_index": 0, "content_index": 0, "logprobs": [],
+                                    "sequence_number": i})
+                    else:
+                        self._send({"type": "response.completed", "sequence_number": len(server.words),
+                                    "response": {"id": "resp", "object": "response", "created_at": 0,
+                                                 "model": body.get("model"), "output": [],
+                                                 "parallel_tool_calls": False, "tool_choice": "auto",
+                                                 "tools": []}})
+                    self.wfile.write(b"0\r\n\r\n")
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    disconnected = True
+                finally:
+                    server._leave(disconnected)
+
+        return Handler
@@ -0,0 +1,43 @@
+import pytest
+
+from children_da.advice import (
+    GENERAL_TIPS, MAX_CONCERNS, OPENING, TIPS, risk_level, rule_based_recommendation,
+)
+from children_da.factors import BAROMETER_SCALE_MAX
+
+HEALTHIEST = {"SEX": 2, "AGE": 15, **{f: 1 for f in BAROMETER_SCALE_MAX}}
+RISKIEST = {"SEX": 1, "AGE": 11, **BAROMETER_SCALE_MAX}
+
+
+@pytest.mark.parametrize("score, level", [
+    (0, "low"), (29, "low"), (30, "medium"), (59, "medium"), (60, "high"), (100, "high"),
+])
+def test_risk_level_boundaries(score, level):
+    assert risk_level(score) == level
+    assert rule_based_recommendation(HEALTHIEST, score).startswith(OPENING[level])
+
+
+def test_output_is_deterministic():
+    answers = {**HEALTHIEST, "SWEETS": 6, "VEGETABLES": 5, "FEEL_LOW": 7, "TOOTH_BRUSHING": 3}
+    first = rule_based_recommendation(answers, 45)
+    assert rule_based_recommendation(dict(reversed(list(answers.items()))), 45) == first
+    assert all(rule_based_recommendation(answers, 45) == first for _ in range(5))
+
+
+def test_no_concerns_falls_back_to_general_tips():
+    text = rule_based_recommendation(HEALTHIEST, 10)
+
+    assert "**Main concerns:**" not in text
+    assert "**What is going well:**" in text
+    start = text.split("**Where to start:**\n")[1].split("\n\n")[0]
+    assert start.splitlines() == [f"- {tip}" for tip in GENERAL_TIPS[:2]]
+
+
+def test_riskiest_answers_list_concerns_and_specific_tips():
+    text = rule_based_recommendation(RISKIEST, 90)
+
+    concerns = [f for f, (concern, _, _) in TIPS.items() if concern in text]
+    # při shodě rizika vyhrává pořadí v TIPS
+    assert concerns == list(TIPS)[:MAX_CONCERNS]
+    assert not any(tip in text for tip in GENERAL_TIPS)
+    assert "Boys around this age" in text
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from children_da.barometer import CONTROLLED_FEATURES, BarometerModel
+from children_da.factors import BAROMETER_SCALE_MAX, SCALE_MAX, normalize_means
+
+FEATURES = CONTROLLED_FEATURES + ["COUNTRY_NAME_Czech Republic", "COUNTRY_NAME_Poland"]
+ANSWERS = [f for f in CONTROLLED_FEATURES if f in BAROMETER_SCALE_MAX]
+
+HEALTHIEST = {"SEX": 2, "AGE": 15, **{f: 1 for f in ANSWERS}}
+RISKIEST = {"SEX": 1, "AGE": 11, **{f: BAROMETER_SCALE_MAX[f] for f in ANSWERS}}
+
+
+def _survey_risk(vector: np.ndarray) -> np.ndarray:
+    """0–1 risk per answer of survey-coded rows (factors registry, 1 = riskier)."""
+    frame = pd.DataFrame(np.atleast_2d(vector)[:, :len(CONTROLLED_FEATURES)], columns=CONTROLLED_FEATURES)
+    return normalize_means(frame, ANSWERS)[ANSWERS].to_numpy()
+
+
+def test_answers_are_translated_to_survey_codes():
+    model = BarometerModel(forest=None, features=FEATURES)
+
+    for answers in (HEALTHIEST, RISKIEST):
+        x = model.vector(answers, "Poland")
+        for f in ANSWERS:
+            assert 1 <= x[FEATURES.index(f)] <= SCALE_MAX[f]
+        assert x[FEATURES.index("COUNTRY_NAME_Poland")] == 1.0
+
+    healthy = _survey_risk(model.vector(HEALTHIEST))[0]
+    risky = _survey_risk(model.vector(RISKIEST))[0]
+    # nejzdravější odpověď je v kódech průzkumu nejmenší riziko u každé otázky
+    assert (healthy < risky).all()
+    assert healthy.max() < 0.3 and risky.min() == 1.0
+
+
+def test_healthiest_answers_score_lower_than_riskiest():
+    ensemble = pytest.importorskip("sklearn.ensemble")
+    from children_da.forest import FlatForest
+
+    rng = np.random.default_rng(0)
+    n = 3000
+    X = np.zeros((n, len(FEATURES)), dtype="float32")
+    X[:, 0] = rng.choice([1, 2], n)
+    X[:, 1] = rng.integers(10, 17, n)
+    for f in ANSWERS:
+        X[:, FEATURES.index(f)] = rng.integers(1, SCALE_MAX[f] + 1, n)
+    X[np.arange(n), rng.choice([11, 12], n)] = 1.0
+    # nadváha roste s rizikem odpovědí v kódech průzkumu
+    risk = _survey_risk(X).mean(axis=1)
+    y = (risk + rng.normal(0, 0.08, n) > 0.55).astype(int)
+    sk = ensemble.RandomForestClassifier(n_estimators=30, max_depth=6, random_state=0).fit(X, y)
+    model = BarometerModel(FlatForest.from_sklearn(sk), FEATURES)
+
+    assert model.predict(HEALTHIEST, "Poland") < model.predict(RISKIEST, "Poland")
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from children_da.cluster import SchoolClusters, build_school_cells
+from children_da.data import build_cache, load_data
+from children_da.schema import apply_dtypes
+
+
+def _frame(school=True):
+    rng = np.random.default_rng(0)
+    n = 400
+    df = pd.DataFrame({
+        "YEAR": 2018,
+        "COUNTRY_CODE": rng.choice([203, 616], n),
+        "SEX": rng.choice([1, 2], n),
+        "AGE": rng.choice([11, 13, 15], n),
+        "OVERWEIGHT": rng.choice([0, 1], n).astype("float64"),
+        "SWEETS": rng.integers(1, 8, n).astype("float64"),
+    })
+    df.loc[::7, "OVERWEIGHT"] = np.nan
+    if school:
+        df["SCHOOL_NO"] = rng.integers(1, 30, n)
+    return apply_dtypes(df)
+
+
+def test_missing_overweight_is_left_out_of_prevalence():
+    df = _frame()
+    cells = build_school_cells(df)
+
+    known = df["OVERWEIGHT"].notna()
+    assert cells["N"].sum() == known.sum()
+    assert cells["N_OW"].sum() == (df["OVERWEIGHT"] == 1).sum()
+    # faktory dál počítají všechny děti
+    assert cells["SWEETS_CNT"].sum() == df["SWEETS"].notna().sum()
+
+    got = SchoolClusters(cells).prevalence(["SEX"]).set_index("SEX")["OVERWEIGHT"]
+    expected = df.groupby("SEX")["OVERWEIGHT"].mean()
+    assert np.allclose(got.sort_index(), expected.sort_index())
+
+
+def test_without_school_no_falls_back_to_unclustered_se():
+    df = _frame(school=False)
+    with pytest.warns(UserWarning, match="SCHOOL_NO"):
+        cells = build_school_cells(df)
+
+    out = SchoolClusters(cells).prevalence(["SEX"]).set_index("SEX")
+    y = df.dropna(subset=["OVERWEIGHT"]).groupby("SEX")["OVERWEIGHT"]
+    p, n = y.mean(), y.size()
+    # každý žák je vlastní shluk: var = p (1 − p) / (n − 1)
+    assert np.allclose(out["OVERWEIGHT_SE"], np.sqrt(p * (1 - p) / (n - 1)))
+    assert (out["N_SCHOOLS"] == n).all()
+
+
+def test_load_data_without_school_no(tmp_path):
+    csv = tmp_path / "data.csv"
+    frame = _frame(school=False).assign(COUNTRY_NAME="Czech Republic").drop(columns="COUNTRY_CODE")
+    frame.to_csv(csv, index=False)
+    build_cache(csv, tmp_path / "cache")
+
+    df = load_data(columns=["YEAR", "COUNTRY_CODE", "SEX", "AGE", "OVERWEIGHT", "SCHOOL_NO", "SWEETS"],
+                   csv_path=csv, cache_dir=tmp_path / "cache")
+    assert "SCHOOL_NO" not in df.columns
+    with pytest.warns(UserWarning, match="SCHOOL_NO"):
+        cells = build_school_cells(df)
+    assert SchoolClusters(cells).prevalence([])["OVERWEIGHT_SE"].notna().all()
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+
+from children_da.correlation import CorrelationStats
+from children_da.cube import build_cube
+
+
+def test_corr_ignores_missing_overweight():
+    rng = np.random.default_rng(0)
+    n = 400
+    df = pd.DataFrame({
+        "YEAR": np.int16(2018),
+        "COUNTRY_CODE": rng.choice(np.array([10, 32], dtype="int16"), n),
+        "COUNTRY_NAME": "x",
+        "SEX": rng.integers(1, 3, n).astype("int8"),
+        "AGE": pd.array(rng.integers(11, 16, n), dtype="Int8"),
+        "OVERWEIGHT": pd.array(rng.integers(0, 2, n), dtype="Int8"),
+        "SWEETS": pd.array(rng.integers(1, 8, n), dtype="Int8"),
+        "SOFT_DRINKS": pd.array(rng.integers(1, 8, n), dtype="Int8"),
+    })
+    df.loc[rng.random(n) < 0.2, "OVERWEIGHT"] = pd.NA
+    df.loc[rng.random(n) < 0.1, "SWEETS"] = pd.NA
+
+    stats = CorrelationStats(build_cube(df), factors=["SWEETS", "SOFT_DRINKS"])
+    got = stats.corr()
+    expected = df[["OVERWEIGHT", "SWEETS", "SOFT_DRINKS"]].astype("float64").corr()["OVERWEIGHT"]
+    assert got.notna().all()
+    np.testing.assert_allclose(got.to_numpy(), expected[["SWEETS", "SOFT_DRINKS"]].to_numpy())
+
+    boys = stats.corr({"SEX": 1})
+    sub = df[df["SEX"] == 1][["OVERWEIGHT", "SWEETS"]].astype("float64")
+    np.testing.assert_allclose(boys["SWEETS"], sub.corr().loc["OVERWEIGHT", "SWEETS"])
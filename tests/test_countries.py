@@ -0,0 +1,24 @@
+from children_da.countries import COUNTRY_DIM, EU_CODES, NAME_BY_CODE
+
+# EU-28 v roce 2018
+EU_28 = {
+    "Austria", "Belgium", "Bulgaria", "Croatia", "Cyprus", "Czech Republic",
+    "Denmark", "Estonia", "Finland", "France", "Germany", "Greece",
+    "Hungary", "Ireland", "Italy", "Latvia", "Lithuania", "Luxembourg",
+    "Malta", "Netherlands", "Poland", "Portugal", "Romania", "Slovakia",
+    "Slovenia", "Spain", "Sweden", "United Kingdom",
+}
+
+# dřívější `eu_list` ze stránky Countries
+OLD_EU_LIST = EU_28 - {"Cyprus", "Luxembourg"}
+
+
+def test_eu_is_eu28():
+    eu = {NAME_BY_CODE[code] for code in EU_CODES}
+    assert eu == EU_28
+    assert len(EU_CODES) == 28
+    assert eu - OLD_EU_LIST == {"Cyprus", "Luxembourg"}
+
+
+def test_eu_flag_matches_codes():
+    assert set(COUNTRY_DIM.loc[COUNTRY_DIM["EU"], "COUNTRY_CODE"]) == set(EU_CODES)
@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+from children_da.cube import load_cube, query
+from children_da.data import build_cache, load_data
+
+
+def _write_csv(path):
+    pd.DataFrame({
+        "YEAR": [2018] * 6,
+        "COUNTRY_NAME": ["Czech Republic"] * 3 + ["Poland"] * 3,
+        "SEX": [1, 2, 1, 2, 1, 2],
+        "AGE": [11, 11, 13, 13, 15, 15],
+        "OVERWEIGHT": [1, 0, np.nan, 1, 0, np.nan],
+        "SWEETS": [3, 4, 5, np.nan, 2, 6],
+    }).to_csv(path, index=False)
+
+
+def test_build_cache_with_missing_overweight(tmp_path):
+    csv = tmp_path / "data.csv"
+    _write_csv(csv)
+    build_cache(csv, tmp_path / "cache")
+
+    cube = load_cube(tmp_path / "cache")
+    assert cube["N"].sum() == 4               # děti bez OVERWEIGHT se do N nepočítají
+    assert cube["N_OW"].sum() == 2
+
+    df = load_data(csv_path=csv, cache_dir=tmp_path / "cache")
+    got = query(cube, ["COUNTRY_CODE"], factors=["SWEETS"]).set_index("COUNTRY_NAME")
+    # stejně jako groupby(...).mean() nad řádky (NaN se přeskočí)
+    expected = df.groupby("COUNTRY_NAME", observed=True)[["OVERWEIGHT", "SWEETS"]].mean()
+    for col in ("OVERWEIGHT", "SWEETS"):
+        assert got[col].to_dict() == expected[col].astype("float64").to_dict()
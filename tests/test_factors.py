@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from children_da.factors import (
+    DASHBOARD_FACTORS, REVERSE_SCALES, SCALE_MAX, check_scales, normalize_means, normalize_se,
+)
+
+# (maximum škály, obrácená škála) – změna tady posune grafy Countries i Gender
+EXPECTED = {
+    "FRUITS": (7, True),
+    "SOFT_DRINKS": (7, False),
+    "SWEETS": (7, False),
+    "VEGETABLES": (7, True),
+    "FRIEND_TALK": (7, True),
+    "TIME_EXE": (7, False),
+    "PHYS_ACT_60": (7, True),
+    "DRUNK_30": (7, False),
+    "FAMILY_MEALS_TOGETHER": (6, False),
+    "BREAKFAST_WEEKDAYS": (6, True),
+    "BREAKFAST_WEEKEND": (3, True),
+    "TOOTH_BRUSHING": (5, False),
+    "STUD_TOGETHER": (5, False),
+    "BUL_OTHERS": (5, False),
+    "BUL_BEEN": (5, False),
+    "FIGHT_YEAR": (5, False),
+    "INJURED_YEAR": (5, False),
+    "HEADACHE": (5, True),
+    "FEEL_LOW": (5, True),
+    "NERVOUS": (5, True),
+    "SLEEP_DIF": (5, True),
+    "DIZZY": (5, True),
+    "TALK_MOTHER": (5, False),
+    "TALK_FATHER": (5, False),
+    "LIKE_SCHOOL": (4, False),
+    "SCHOOL_PRESSURE": (4, False),
+    "COMPUTER_NO": (4, False),
+}
+
+
+def test_dashboard_scales_are_pinned():
+    assert list(EXPECTED) == DASHBOARD_FACTORS
+    got = {f: (SCALE_MAX[f], f in REVERSE_SCALES) for f in DASHBOARD_FACTORS}
+    assert got == EXPECTED
+
+
+@pytest.mark.parametrize("factor", DASHBOARD_FACTORS)
+def test_normalisation_formula(factor):
+    scale, reverse = EXPECTED[factor]
+    x = np.arange(1, scale + 1, dtype="float64")
+    expected = (scale + 1 - x) / scale if reverse else x / scale
+
+    got = normalize_means(pd.DataFrame({factor: x}), [factor])[factor].to_numpy()
+    np.testing.assert_allclose(got, expected)
+    # 1 = rizikovější chování, hodnoty zůstávají v (0, 1]
+    assert got.max() == 1.0 and got.min() > 0
+
+    se = normalize_se(pd.DataFrame({f"{factor}_SE": [scale / 10]}), [factor])
+    assert se[f"{factor}_SE"].iloc[0] == pytest.approx(0.1)
+
+
+def test_normalised_mean_equals_mean_of_normalised_rows():
+    # proto stránky normalizují rovnou průměry z kostky
+    rng = np.random.default_rng(0)
+    raw = pd.DataFrame({f: rng.integers(1, SCALE_MAX[f] + 1, 200).astype("float64")
+                        for f in DASHBOARD_FACTORS})
+    raw.iloc[::9, 3] = np.nan
+
+    per_row = normalize_means(raw, DASHBOARD_FACTORS).mean()
+    of_means = normalize_means(raw.mean().to_frame().T, DASHBOARD_FACTORS).iloc[0]
+    np.testing.assert_allclose(of_means, per_row)
+
+
+def test_codes_outside_scale_warn():
+    df = pd.DataFrame({"FAMILY_MEALS_TOGETHER": [1, 6], "DRUNK_30": [1, 8]})
+    with pytest.warns(UserWarning, match="DRUNK_30"):
+        bad = check_scales(df)
+    assert list(bad) == ["DRUNK_30"]
@@ -0,0 +1,47 @@
+import json
+
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from children_da.figcache import CachedFigure, FigureCache, PageFigures
+
+
+def _fig(n=3):
+    return go.Figure(go.Bar(x=list(range(n)), y=list(range(n))), layout=dict(title="Test"))
+
+
+def test_hit_returns_stored_dict_without_rebuilding():
+    cache = FigureCache()
+    fig = _fig()
+    cache.put("a", fig)
+
+    got = cache.get("a")
+    assert isinstance(got, CachedFigure)
+    # obě zásahy sdílí jeden slovník, nic se znovu nestaví
+    assert got.to_dict() is cache.get("a").to_dict()
+    assert got.to_dict() == fig.to_dict()
+    assert json.loads(got.to_json()) == json.loads(pio.to_json(fig))
+    assert cache.stats()["hits"] == 2
+
+
+def test_unavailable_figure_is_cached():
+    figures = PageFigures(FigureCache(), "gender", ("All countries",), "v1")
+    assert figures.lookup("fig6") == (False, None)
+
+    figures.put("fig6", None)
+    assert figures.lookup("fig6") == (True, None)
+    assert figures.get("fig6") is None
+    assert figures.cache.stats()["entries"] == 1
+
+
+def test_evicts_least_recently_used_by_size():
+    size = len(pio.to_json(_fig().to_dict(), validate=False))
+    cache = FigureCache(max_bytes=2 * size)
+    cache.put("a", _fig())
+    cache.put("b", _fig())
+    cache.get("a")
+    cache.put("c", _fig())
+
+    assert cache.lookup("b") == (False, None)
+    assert cache.lookup("a")[0] and cache.lookup("c")[0]
+    assert cache.nbytes == 2 * size and cache.evictions == 1
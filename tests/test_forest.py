@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+ensemble = pytest.importorskip("sklearn.ensemble")
+
+from children_da.forest import FlatForest  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def fitted():
+    rng = np.random.default_rng(0)
+    # odpovědi 1–7 a jeden one-hot sloupec, jako vstup Barometru
+    X = np.column_stack([rng.integers(1, 8, size=(600, 5)), rng.integers(0, 2, size=600)]) \
+        .astype("float32")
+    y = (X[:, 0] + X[:, 1] - X[:, 2] + rng.normal(0, 2, 600) > 4).astype(int)
+    model = ensemble.RandomForestClassifier(n_estimators=25, max_depth=8, random_state=0).fit(X, y)
+    return model, FlatForest.from_sklearn(model)
+
+
+def _rows(n, seed=1):
+    return np.random.default_rng(seed).integers(0, 8, size=(n, 6)).astype("float32")
+
+
+def test_predict_proba_matches_sklearn(fitted):
+    model, forest = fitted
+    X = _rows(500)
+    np.testing.assert_allclose(forest.predict_proba(X), model.predict_proba(X), atol=1e-12)
+
+
+def test_predict_one_matches_sklearn(fitted):
+    model, forest = fitted
+    X = _rows(50, seed=2)
+    got = [forest.predict_one(x) for x in X]
+    np.testing.assert_allclose(got, model.predict_proba(X)[:, 1], atol=1e-12)
+
+
+def test_save_load_roundtrip(fitted, tmp_path):
+    _, forest = fitted
+    forest.save(tmp_path / "forest.npz")
+    loaded = FlatForest.load(tmp_path / "forest.npz")
+    X = _rows(100, seed=3)
+    np.testing.assert_array_equal(loaded.predict_proba(X), forest.predict_proba(X))
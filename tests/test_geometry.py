@@ -0,0 +1,52 @@
+import json
+
+from children_da.countries import COUNTRY_DIM
+from children_da.geometry import (
+    TOPOJSON_DIR, TOPOJSON_LAYERS, TOPOJSON_NAME, _topology_features, build_geometry, load_geometry,
+    to_topology,
+)
+
+
+def _square(lon, lat, size=1.0):
+    return [[[lon, lat], [lon + size, lat], [lon + size, lat + size], [lon, lat + size], [lon, lat]]]
+
+
+def _collection(*features):
+    return {"type": "FeatureCollection", "features": [
+        {"type": "Feature", "id": iso3, "properties": {}, "geometry": {"type": "Polygon", "coordinates": ring}}
+        for iso3, ring in features
+    ]}
+
+
+def test_bundled_geometry_covers_every_country():
+    ids = {f["id"] for f in load_geometry()["features"]}
+    assert set(COUNTRY_DIM["ISO3"].dropna()) <= ids
+
+    topology = json.loads((TOPOJSON_DIR / TOPOJSON_NAME).read_text(encoding="utf-8"))
+    assert {g["id"] for g in topology["objects"]["countries"]["geometries"]} == ids
+
+
+def test_later_sources_only_add_missing_countries(tmp_path):
+    first = tmp_path / "world.geojson"
+    first.write_text(json.dumps(_collection(("CZE", _square(14, 49)), ("POL", _square(19, 51)))))
+    extra = tmp_path / "extra.geojson"
+    extra.write_text(json.dumps(_collection(("CZE", _square(0, 40)), ("MLT", _square(14.2, 35.8, 0.3)))))
+
+    info = build_geometry([first, extra], tmp_path / "geo.json", tmp_path / "topojson")
+
+    geometry = load_geometry(tmp_path / "geo.json")
+    assert info["features"] == 3
+    assert [f["id"] for f in geometry["features"]] == ["CZE", "POL", "MLT"]
+    assert geometry["features"][0]["geometry"]["coordinates"][0][0][0] == [14.0, 49.0]
+
+    topology = json.loads((tmp_path / "topojson" / TOPOJSON_NAME).read_text(encoding="utf-8"))
+    assert set(topology["objects"]) == set(TOPOJSON_LAYERS)
+
+
+def test_topology_round_trip():
+    collection = {"type": "FeatureCollection", "features": [
+        {"type": "Feature", "id": "CZE", "properties": {},
+         "geometry": {"type": "MultiPolygon", "coordinates": [_square(14, 49), _square(16, 49)]}},
+    ]}
+    decoded = _topology_features(to_topology(collection))
+    assert decoded == [("CZE", [[[tuple(p) for p in _square(14, 49)[0]]], [[tuple(p) for p in _square(16, 49)[0]]]])]
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from children_da.cube import load_cube, query
+from children_da.data import build_cache, load_data, read_manifest
+from children_da.ingest import _source_columns, append_table, build_union
+
+
+def _write_raw(raw_dir, table, year, n=40, seed=0):
+    """Synthetic raw wave with every source column the mapping reads."""
+    rng = np.random.default_rng(seed)
+    cols = {c: rng.integers(1, 4, n).astype(str) for c in _source_columns(table)}
+    cols.update({
+        "countryno" if table != "HBSC_2014" else "COUNTRYno": np.repeat(["203000", "616000"], n // 2),
+        "surveyyear" if table == "HBSC_2001" else "HBSC": np.full(n, str(year)),
+        "sex": rng.integers(1, 3, n).astype(str),
+    })
+    if table == "HBSC_2018":
+        cols["oweight_who"] = rng.integers(0, 2, n).astype(str)
+    age_col = "AGE" if table == "HBSC_2014" else "age"
+    cols[age_col] = rng.choice(["11,5", "13.2", "15"], n)
+    pd.DataFrame(cols).to_csv(raw_dir / f"{table}.csv", index=False)
+
+
+@pytest.mark.parametrize("first, appended", [("HBSC_2018", "HBSC_2014"), ("HBSC_2014", "HBSC_2018")])
+def test_ingest_output_round_trips_through_cache(tmp_path, first, appended):
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    _write_raw(raw, "HBSC_2014", 2014, seed=1)
+    _write_raw(raw, "HBSC_2018", 2018, seed=2)
+    csv = tmp_path / "data.csv"
+    cache = tmp_path / "cache"
+
+    # 2014 má OVERWEIGHT = NULL (jako v union_code.sql), 2018 ho má vyplněné
+    build_union(raw, tables=[first], workers=1).to_csv(csv, index=False)
+    build_cache(csv, cache)
+    manifest = append_table(appended, raw_dir=raw, cache_dir=cache)
+    assert manifest["years"] == [2014, 2018]
+
+    df = load_data(csv_path=csv, cache_dir=cache)
+    assert df.loc[df["YEAR"] == 2014, "OVERWEIGHT"].isna().all()
+    assert df.loc[df["YEAR"] == 2018, "OVERWEIGHT"].notna().all()
+
+    cube = load_cube(cache)
+    per_year = query(cube, ["YEAR"], factors=["SWEETS"]).set_index("YEAR")
+    assert per_year.loc[2014, "N"] == 0                 # bez OVERWEIGHT žádná prevalence
+    assert np.isnan(per_year.loc[2014, "OVERWEIGHT"])
+    assert per_year.loc[2018, "N"] == (df["YEAR"] == 2018).sum()
+    assert per_year.loc[2014, "SWEETS"] == df.loc[df["YEAR"] == 2014, "SWEETS"].mean()
+
+
+def test_full_union_builds_cache(tmp_path):
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    _write_raw(raw, "HBSC_2014", 2014, seed=1)
+    _write_raw(raw, "HBSC_2018", 2018, seed=2)
+    csv = tmp_path / "data.csv"
+    build_union(raw, tables=["HBSC_2014", "HBSC_2018"], workers=1).to_csv(csv, index=False)
+
+    manifest = build_cache(csv, tmp_path / "cache")
+    assert manifest["years"] == [2014, 2018]
+    assert read_manifest(tmp_path / "cache")["rows"] == 80
@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+
+from children_da.correlation import CorrelationStats
+from children_da.cube import load_cube
+from children_da.data import build_cache
+from children_da.kpi import countries_kpis
+
+
+def test_rows_without_country_are_not_counted_as_a_country(tmp_path):
+    csv = tmp_path / "data.csv"
+    pd.DataFrame({
+        "YEAR": [2018] * 6,
+        "COUNTRY_NAME": ["Czech Republic", "Czech Republic", "Poland", "Poland", np.nan, np.nan],
+        "SEX": [1, 2, 1, 2, 1, 2],
+        "AGE": [11, 13, 11, 13, 15, 15],
+        "OVERWEIGHT": [1, 0, 0, 1, 0, 1],
+        "SWEETS": [3, 4, 5, 2, 2, 6],
+    }).to_csv(csv, index=False)
+    build_cache(csv, tmp_path / "cache")
+
+    cube = load_cube(tmp_path / "cache")
+    assert (cube["COUNTRY_CODE"] == -1).any()
+    assert countries_kpis(cube, CorrelationStats(cube))["n_countries"] == 2
@@ -0,0 +1,138 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("openai")
+
+from children_da.recommendation import (  # noqa: E402
+    SESSION_KEY, ClientPool, RecommendationError, RecommendationJob, cancel_stale, openai_client,
+    start_job,
+)
+from fake_responses import FakeResponsesServer  # noqa: E402
+
+
+MESSAGES = [{"role": "user", "content": "Child profile: …"}]
+
+
+@pytest.fixture
+def server():
+    srv = FakeResponsesServer().start()
+    yield srv
+    srv.stop()
+
+
+def make_pool(server, size=2, timeout=5.0):
+    return ClientPool(lambda: openai_client("test-key", timeout=timeout, base_url=server.url), size=size)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_streams_deltas(server):
+    pool = make_pool(server)
+    job = RecommendationJob(pool, "k", MESSAGES, timeout=5).start()
+
+    chunks = list(job.chunks())
+
+    assert chunks == server.words
+    assert job.text == "Hello parents, great job!"
+    assert job.completed and job.elapsed_ms > 0
+    assert server.requests[0]["stream"] is True
+    assert server.requests[0]["input"] == MESSAGES
+    assert wait_for(lambda: pool.in_use == 0)
+
+
+def test_error_event(server):
+    server.mode = "error"
+    pool = make_pool(server)
+    job = RecommendationJob(pool, "k", MESSAGES, timeout=5).start()
+
+    with pytest.raises(RecommendationError, match="boom"):
+        list(job.chunks())
+    assert not job.completed
+    assert job.text == "Hello parents"
+    assert wait_for(lambda: pool.in_use == 0)
+
+
+def test_deadline_timeout(server):
+    server.delay = 0.3
+    pool = make_pool(server)
+    job = RecommendationJob(pool, "k", MESSAGES, timeout=0.5).start()
+
+    t0 = time.monotonic()
+    with pytest.raises(RecommendationError, match="longer than 0.5 s"):
+        list(job.chunks())
+    assert time.monotonic() - t0 < 1.0
+    assert job.cancelled and not job.completed
+    # stream se zavře a klient se vrátí do poolu
+    assert wait_for(lambda: not job._thread.is_alive())
+    assert pool.in_use == 0
+
+
+def test_cancel_when_answers_change(server):
+    server.delay = 0.1
+    pool = make_pool(server)
+    state = {}
+    job = start_job(state, pool, "answers-1", MESSAGES, timeout=10)
+    chunks = job.chunks()
+    assert next(chunks) == "Hello"
+
+    cancel_stale(state, "answers-1")          # stejné odpovědi → běží dál
+    assert state[SESSION_KEY] is job and not job.cancelled
+
+    cancel_stale(state, "answers-2")
+    assert SESSION_KEY not in state and job.cancelled
+    assert wait_for(lambda: not job._thread.is_alive())
+    assert pool.in_use == 0
+    assert wait_for(lambda: server.disconnects == 1)
+
+
+def test_abandoned_stream_is_cancelled(server):
+    server.delay = 0.1
+    pool = make_pool(server)
+    job = RecommendationJob(pool, "k", MESSAGES, timeout=10).start()
+    chunks = job.chunks()
+    next(chunks)
+
+    del chunks                                 # rerun Streamlitu opustí generátor
+
+    assert job.cancelled
+    assert wait_for(lambda: not job._thread.is_alive())
+    assert pool.in_use == 0
+
+
+def test_pool_exhaustion(server):
+    server.delay = 0.2
+    pool = make_pool(server, size=1)
+    busy = RecommendationJob(pool, "a", MESSAGES, timeout=10).start()
+    assert wait_for(lambda: not pool.has_capacity())
+
+    waiting = RecommendationJob(pool, "b", MESSAGES, timeout=0.3).start()
+    with pytest.raises(RecommendationError):
+        list(waiting.chunks())
+
+    assert "".join(busy.chunks()) == "Hello parents, great job!"
+    assert wait_for(pool.has_capacity)
+
+
+def test_pool_bounds_concurrent_requests(server):
+    server.delay = 0.05
+    pool = make_pool(server, size=2)
+    jobs = [RecommendationJob(pool, f"k{i}", MESSAGES, timeout=20).start() for i in range(5)]
+    texts = []
+    readers = [threading.Thread(target=lambda j=j: texts.append("".join(j.chunks()))) for j in jobs]
+    for reader in readers:
+        reader.start()
+    for reader in readers:
+        reader.join()
+
+    assert texts == ["Hello parents, great job!"] * 5
+    assert server.max_active == 2
+    assert pool._created == 2
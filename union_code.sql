@@ -1,3 +1,5 @@
+-- Lokální náhrada bez warehouse: children_da/ingest.py (COLUMN_MAP drží stejná mapování).
+
 CREATE OR REPLACE TABLE T01_INPUT_UNION AS
 
 SELECT 